@@ -0,0 +1,108 @@
+"""
+Fleet-wide anomaly detection: compute cost and detection latency.
+
+Simulates --servers servers reporting every 15 seconds (the stats loop interval) into a full
+ResourceHistory with noisy but healthy memory and CPU. At a fixed tick a memory leak (--leak-rate
+percentage points per hour) starts on --leaks servers and a CPU spike on --spikes other servers. The
+detector runs after every tick, as in the stats loop, and the benchmark reports:
+  - wall time per detector run and per recorded tick at fleet scale
+  - simulated time from injection to the first finding, per anomaly
+  - findings on servers that were never injected (false positives)
+
+Run from the repository root:
+    python -m benchmarks.anomaly_bench [--servers 100 250 500] [--leaks 5] [--spikes 5]
+"""
+import argparse
+import time
+import numpy as np
+from helper.anomaly import AnomalyDetector
+from helper.resource_history import ResourceHistory
+
+TICK_SECONDS = 15
+DETECTION_TICKS = 4 * 3600 // TICK_SECONDS  # Give up on an injected anomaly after 4 simulated hours
+
+def run(servers: int, leaks: int, spikes: int, leak_rate: float, seed: int):
+    rng = np.random.default_rng(seed)
+    server_ids = [f"srv{i:04d}" for i in range(servers)]
+    history = ResourceHistory()
+    detector = AnomalyDetector(history)
+    base_mem = rng.uniform(20, 60, servers)
+    base_cpu = rng.uniform(5, 30, servers)
+    leak_rows = set(range(leaks))
+    spike_rows = set(range(leaks, leaks + spikes))
+    clock = time.time()
+
+    def tick(step: int, leak_since: int | None, spike_at: int | None):
+        mem = base_mem + rng.normal(0, 0.5, servers)
+        cpu = np.clip(base_cpu + rng.normal(0, 3, servers), 0, 100)
+        if leak_since is not None:
+            for row in leak_rows:
+                mem[row] += leak_rate * (step - leak_since) * TICK_SECONDS / 3600
+        if spike_at is not None and step >= spike_at:
+            for row in spike_rows:
+                cpu[row] = 95.0
+        samples = {
+            server_ids[row]: {"mem_pct": float(mem[row]), "cpu_pct": float(cpu[row]), "disk_pct": 40.0}
+            for row in range(servers)
+        }
+        started = time.perf_counter()
+        history.record(clock + step * TICK_SECONDS, samples)
+        recorded = time.perf_counter() - started
+        started = time.perf_counter()
+        findings = detector.run(now=clock + step * TICK_SECONDS)
+        return findings, recorded, time.perf_counter() - started
+
+    # Fill the buffer with healthy history; anything flagged here is a false positive
+    false_positives = 0
+    for step in range(history.capacity):
+        findings, _, _ = tick(step, None, None)
+        false_positives += len(findings)
+
+    inject = history.capacity
+    detected = {}
+    record_times = []
+    run_times = []
+    for step in range(inject, inject + DETECTION_TICKS):
+        findings, recorded, ran = tick(step, inject, inject)
+        record_times.append(recorded)
+        run_times.append(ran)
+        for finding in findings:
+            row = server_ids.index(finding["server_id"])
+            expected = "memory_leak" if row in leak_rows else "cpu_spike" if row in spike_rows else None
+            if finding["kind"] != expected:
+                false_positives += 1
+                continue
+            detected.setdefault((finding["kind"], row), (step - inject) * TICK_SECONDS)
+        if len(detected) == leaks + spikes:
+            break
+
+    leak_latency = [seconds for (kind, _), seconds in detected.items() if kind == "memory_leak"]
+    spike_latency = [seconds for (kind, _), seconds in detected.items() if kind == "cpu_spike"]
+    print(f"{servers} servers, {history.capacity} samples each")
+    print(f"  detector run   p50 {np.median(run_times) * 1000:6.2f} ms, max {max(run_times) * 1000:6.2f} ms")
+    print(f"  record tick    p50 {np.median(record_times) * 1000:6.2f} ms")
+    if leak_latency:
+        print(f"  memory leak ({leak_rate:g}%/h) detected on {len(leak_latency)}/{leaks} after "
+              f"{min(leak_latency) / 60:.1f}-{max(leak_latency) / 60:.1f} min (simulated)")
+    else:
+        print(f"  memory leak ({leak_rate:g}%/h) not detected within {DETECTION_TICKS * TICK_SECONDS // 3600} h")
+    if spike_latency:
+        print(f"  cpu spike detected on {len(spike_latency)}/{spikes} on tick "
+              f"{min(spike_latency) // TICK_SECONDS + 1}-{max(spike_latency) // TICK_SECONDS + 1} after it started")
+    else:
+        print("  cpu spike not detected")
+    print(f"  false positives: {false_positives}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--servers", type=int, nargs="+", default=[100, 250, 500])
+    parser.add_argument("--leaks", type=int, default=5)
+    parser.add_argument("--spikes", type=int, default=5)
+    parser.add_argument("--leak-rate", type=float, default=6.0, help="memory leak in percentage points per hour")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    for servers in args.servers:
+        run(servers, args.leaks, args.spikes, args.leak_rate, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Bucketed vs linear image matching in the game catalog.
+
+Builds synthetic catalogs (one glob and one regex image pattern per game, spread over registries and
+orgs), then times a cold lookup (no memo) through GameCatalog's bucketed matcher against trying every
+pattern in catalog order, plus memoized and exact-name lookups.
+
+Run from the repository root:
+    python -m benchmarks.game_catalog_bench [--games 500 2000] [--lookups 20000]
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from fnmatch import translate
+import yaml
+from helper.game_catalog import GameCatalog
+
+REGISTRIES = ["ghcr.io", "docker.io", "quay.io", "registry.gitlab.com", "public.ecr.aws"]
+
+def build_catalog(games: int) -> dict:
+    entries = {}
+    for i in range(games):
+        registry = REGISTRIES[i % len(REGISTRIES)]
+        org = f"org{i % 40}"
+        entries[f"Game{i}"] = {
+            "aliases": [f"game{i}alias"],
+            "images": [f"{registry}/{org}/game{i}:*", f"re:{re.escape(registry)}/{org}/game{i}-(server|dedicated)(:.*)?"],
+        }
+    return {"games": entries}
+
+def sample_images(games: int, count: int) -> list[str]:
+    rng = random.Random(games)
+    images = []
+    for _ in range(count):
+        i = rng.randrange(games)
+        registry = REGISTRIES[i % len(REGISTRIES)]
+        kind = rng.random()
+        if kind < 0.45:
+            images.append(f"{registry}/org{i % 40}/game{i}:{rng.randrange(10)}")
+        elif kind < 0.9:
+            images.append(f"{registry}/org{i % 40}/game{i}-dedicated:latest")
+        else:
+            images.append(f"{registry}/org{i % 40}/unknown{i}:latest")
+    return images
+
+def linear_patterns(raw: dict) -> list[tuple[re.Pattern, str]]:
+    patterns = []
+    for game_name, entry in raw["games"].items():
+        for pattern in entry["images"]:
+            regex = pattern[3:] if pattern.startswith("re:") else translate(pattern.lower())
+            patterns.append((re.compile(regex, re.IGNORECASE), game_name))
+    return patterns
+
+def match_linear(patterns: list[tuple[re.Pattern, str]], image: str) -> str | None:
+    for pattern, game_name in patterns:
+        if pattern.match(image):
+            return game_name
+    return None
+
+def per_lookup_us(func, items: list) -> float:
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+def run(games: int, lookups: int):
+    raw = build_catalog(games)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(raw, f, sort_keys=False)
+        started = time.perf_counter()
+        catalog = GameCatalog(path)
+        load_ms = (time.perf_counter() - started) * 1000
+    linear = linear_patterns(raw)
+    images = sample_images(games, lookups)
+
+    mismatches = sum(catalog._match_patterns(image) != match_linear(linear, image) for image in images)
+    bucketed = per_lookup_us(catalog._match_patterns, images)
+    linear_us = per_lookup_us(lambda image: match_linear(linear, image), images)
+    # A working set that fits the memo, as a real fleet's handful of images does
+    repeated = images[:1000] * max(1, lookups // 1000)
+    catalog._image_cache.clear()
+    for image in repeated[:1000]:
+        catalog.match_image(image, "")
+    memoized = per_lookup_us(lambda image: catalog.match_image(image, ""), repeated)
+    exact = per_lookup_us(lambda i: catalog.match_name(f"game{i % games}alias"), list(range(lookups)))
+
+    print(f"{games} games ({len(linear)} patterns, {len(catalog._buckets)} buckets), load {load_ms:.0f} ms")
+    print(f"  cold bucketed  {bucketed:8.2f} us/lookup")
+    print(f"  cold linear    {linear_us:8.2f} us/lookup  ({linear_us / bucketed:.0f}x slower)")
+    print(f"  memoized       {memoized:8.2f} us/lookup")
+    print(f"  exact name     {exact:8.2f} us/lookup")
+    print(f"  results differing from linear: {mismatches}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+    for games in args.games:
+        run(games, args.lookups)
+
+if __name__ == "__main__":
+    main()
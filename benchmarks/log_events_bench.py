@@ -0,0 +1,126 @@
+"""
+Log event extraction throughput on a synthetic Minecraft log.
+
+Generates a log of --size-mb (default 1 GB) in --block-mb blocks (default 32 MB, the pipeline's
+MAX_READ_BYTES) with about --event-ratio of the lines being joins, leaves, chat, errors and startups,
+and feeds it through the Minecraft patterns from games.yaml:
+  - parse only (EventParser.parse, per-pattern finditer over each block)
+  - end to end (parse + EventStore.save into a SQLite file, as each poll does)
+  - optionally (--compare) the same patterns as one combined alternation over the block, and searched
+    line by line, the two approaches the parser doesn't take
+
+A pool of distinct blocks is generated up front and cycled, so generation time isn't measured.
+
+Run from the repository root:
+    python -m benchmarks.log_events_bench [--size-mb 1024] [--block-mb 32] [--compare]
+"""
+import argparse
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from helper.game_catalog import catalog
+from helper.log_events import EventParser, EventStore
+
+BLOCK_POOL = 4
+PLAYERS = [f"Player{i}" for i in range(200)]
+NOISE = [
+    "[Server thread/INFO]: Saving chunks for level 'ServerLevel[world]'/minecraft:overworld",
+    "[Server thread/INFO]: ThreadedAnvilChunkStorage: All dimensions are saved",
+    "[Worker-Main-12/INFO]: Preparing spawn area: {pct}%",
+    "[Server thread/WARN]: Can't keep up! Is the server overloaded? Running {ms}ms or {ticks} ticks behind",
+    "[Server thread/INFO]: [STDOUT]: tick {ticks} took {ms}ms",
+]
+EVENTS = [
+    "[Server thread/INFO]: {player} joined the game",
+    "[Server thread/INFO]: {player} left the game",
+    "[Server thread/INFO]: <{player}> anyone up for the nether? {ms}",
+    "[Server thread/ERROR]: Encountered an unexpected exception in tick {ticks}",
+    "[Server thread/INFO]: Done ({seconds}s)! For help, type \"help\"",
+]
+
+class BenchConfig:
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+
+def make_block(size: int, event_ratio: float, seed: int) -> bytes:
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        template = rng.choice(EVENTS) if rng.random() < event_ratio else rng.choice(NOISE)
+        line = (f"[{rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}] " + template.format(
+            player=rng.choice(PLAYERS), pct=rng.randrange(100), ms=rng.randrange(5000), ticks=rng.randrange(10 ** 6),
+            seconds=f"{rng.uniform(5, 90):.3f}",
+        ) + "\n").encode("utf-8")
+        lines.append(line)
+        total += len(line)
+    return b"".join(lines)
+
+def combined_parse(regex: re.Pattern, block: bytes) -> int:
+    return sum(1 for _ in regex.finditer(block))
+
+def per_line_parse(regexes: list[re.Pattern], block: bytes) -> int:
+    return sum(1 for line in block.split(b"\n") for regex in regexes if regex.search(line))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--block-mb", type=int, default=32)
+    parser.add_argument("--event-ratio", type=float, default=0.012)
+    parser.add_argument("--compare", action="store_true", help="also time one combined alternation")
+    args = parser.parse_args()
+
+    patterns = catalog.games["Minecraft"]["events"]
+    event_parser = EventParser(patterns)
+    block_size = args.block_mb * 1024 * 1024
+    blocks = args.size_mb // args.block_mb
+    started = time.perf_counter()
+    pool = [make_block(block_size, args.event_ratio, seed) for seed in range(min(BLOCK_POOL, blocks))]
+    print(f"Generated {len(pool)} distinct {args.block_mb} MB block(s) in {time.perf_counter() - started:.1f}s, "
+          f"cycling them for {blocks * args.block_mb} MB")
+
+    parse_seconds = 0.0
+    store_seconds = 0.0
+    events = 0
+    with tempfile.TemporaryDirectory() as directory:
+        store = EventStore(BenchConfig(os.path.join(directory, "bench.db")))
+        offset = 0
+        for i in range(blocks):
+            block = pool[i % len(pool)]
+            started = time.perf_counter()
+            found = event_parser.parse(block, offset)
+            parse_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            store.save("bench", "logs/latest.log", offset + len(block), block[-64:], found, time.time())
+            store_seconds += time.perf_counter() - started
+            events += len(found)
+            offset += len(block)
+        store.conn.close()
+
+    megabytes = blocks * args.block_mb
+    lines = sum(block.count(b"\n") for block in pool) / len(pool) * blocks
+    print(f"{megabytes} MB, {lines:,.0f} lines, {events:,} events ({events / lines:.2%} of lines)")
+    print(f"  parse only   {megabytes / parse_seconds:7.0f} MB/s  ({parse_seconds:.1f}s)")
+    print(f"  end to end   {megabytes / (parse_seconds + store_seconds):7.0f} MB/s  "
+          f"({parse_seconds + store_seconds:.1f}s, {store_seconds:.1f}s in SQLite)")
+
+    if args.compare:
+        # Group names repeat across patterns, so they become plain groups in the alternation
+        alternation = "|".join(f"(?:{re.sub(r'[(][?]P<[^>]+>', '(?:', pattern)})" for pattern in patterns.values())
+        combined = re.compile(alternation.encode("utf-8"))
+        started = time.perf_counter()
+        for block in pool:
+            combined_parse(combined, block)
+        seconds = (time.perf_counter() - started) / len(pool) * blocks
+        print(f"  combined alternation {megabytes / seconds:7.0f} MB/s  (extrapolated from {len(pool)} block(s))")
+        regexes = [regex for _, regex in event_parser.patterns]
+        started = time.perf_counter()
+        per_line_parse(regexes, pool[0])
+        seconds = (time.perf_counter() - started) * blocks
+        print(f"  per-line search      {megabytes / seconds:7.0f} MB/s  (extrapolated from 1 block)")
+
+if __name__ == "__main__":
+    main()
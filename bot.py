@@ -8,6 +8,10 @@ from helper.api_manager import APIManager
 from helper.utilities import get_client_id, version_check, version_tuple
 from helper.logger import logger, print_colored
 from helper.config_db import load_config, validate_config, create_config
+from helper.steam_handler import a2s_client
+from helper.file_cache import FileCache, DEFAULT_MAX_BYTES
+from helper.dispatcher import OutboundDispatcher
+from helper.autocomplete import ServerIndex
 import helper.console as console_module
 
 version = "1.0.7"
@@ -61,6 +65,13 @@ token = config.get("discord", "bot_token")
 bot.panel_config = config.get_section("panel")
 bot.api_manager = APIManager(bot.panel_config, bot.config)
 bot.control_channel = config.get("discord", "control_channel")
+try:
+    file_cache_mb = float(config.get("bot", "fileCacheMaxMB", DEFAULT_MAX_BYTES // (1024 * 1024)))
+except (TypeError, ValueError):
+    file_cache_mb = DEFAULT_MAX_BYTES // (1024 * 1024)
+bot.file_cache = FileCache(max_bytes=int(file_cache_mb * 1024 * 1024))
+bot.dispatcher = OutboundDispatcher()
+bot.server_index = ServerIndex(config)
 shutdown_event = asyncio.Event()
 console_task = None
 cogs = [
@@ -84,7 +95,9 @@ async def shutdown():
             logger.info(f"Unloaded Cog: {cog}")
         except Exception as e:
             logger.error(f"Failed to unload cog {cog}: {e}")
+    await bot.dispatcher.close()
     await bot.api_manager.close()
+    await a2s_client.close()
     await bot.close()
     bot.config.close()
     shutdown_event.set()
@@ -104,6 +117,7 @@ async def main():
             print_colored(f"- {name} (ID: {server_id})", logging.INFO)
     except Exception as e:
         logger.error(f"Error loading servers from API on startup: {e}")
+    bot.server_index.invalidate()
     for cog in cogs:
         await bot.load_extension(f"cogs.{cog}")
         logger.info(f"Loaded Cog: {cog}")
@@ -4,40 +4,37 @@ import html
 import re
 import asyncio
 from helper.logger import logger
-from helper.utilities import validate_command_context
+from helper.utilities import validate_command_context, get_visible_servers
 from discord import app_commands
+from helper.autocomplete import server_autocomplete
+
+DEFAULT_ANNOUNCEMENT_INTERVAL = 3600
+MIN_ANNOUNCEMENT_INTERVAL = 60
+ANNOUNCEMENT_CONCURRENCY = 8
 
 def _clean_html(raw_html):
     text = re.sub(r"<[^>]*>", "", raw_html)
     return html.unescape(text.strip())
 
-def create_announcement_embed(attr, server_name):
+def create_announcement_embed(attr, server_name, other_servers: int = 0):
     cleaned_message = _clean_html(attr.get("message", ""))
     color = int(attr.get("color", "#3498db").lstrip("#"), 16)
+    label = f"{server_name} +{other_servers} more" if other_servers else server_name
 
     embed = discord.Embed(
-        title=f"📢 [{server_name}] {attr.get('title', 'Announcement')}",
-        description=cleaned_message,
+        title=f"📢 [{label}] {attr.get('title', 'Announcement')}"[:256],
+        description=cleaned_message[:4096],
         color=color
     )
     if not attr.get("dismissible", True):
         embed.set_footer(text="🚫 This announcement is not dismissible.")
     return embed
 
-
-async def send_to_channel(channel, embed):
-    if not channel:
-        logger.warning("Announcement channel not configured or not found.")
-        return
-    try:
-        await channel.send(embed=embed)
-    except Exception as e:
-        logger.error(f"Failed to send announcement embed: {e}")
-
 class Announcements(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.api_manager = bot.api_manager
+        self.dispatcher = bot.dispatcher
         self.cfg = bot.config
         self.control_channel = bot.control_channel
         self.announcement_channel_id = bot.config.get("discord", "announcement_channel", self.control_channel or None)
@@ -50,6 +47,11 @@ class Announcements(commands.Cog):
             self.seen_announcement_ids = set()
         logger.info(f"Announcement Loop enabled: {self.do_announcement_loop}")
         if self.do_announcement_loop:
+            try:
+                interval = float(bot.config.get("bot", "announcementInterval", DEFAULT_ANNOUNCEMENT_INTERVAL))
+            except (TypeError, ValueError):
+                interval = DEFAULT_ANNOUNCEMENT_INTERVAL
+            self.announcement_task.change_interval(seconds=max(interval, MIN_ANNOUNCEMENT_INTERVAL))
             self.announcement_task.start()
         else:
             logger.info("Announcement Loop is disabled in your Config. Skipping..")
@@ -62,7 +64,17 @@ class Announcements(commands.Cog):
         seen_str = ",".join(self.seen_announcement_ids)
         self.bot.config.set("bot", "seen_announcements", seen_str)
 
-    @tasks.loop(hours=1)
+    async def _fetch_announcements(self, server_id: str, server_name: str, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                url = f"{self.api_manager.base_url}/servers/{server_id}/announcements"
+                data = await self.api_manager.make_request(url)
+                return server_name, data.get("data", [])
+            except Exception as e:
+                logger.warning(f"Failed to check announcements for {server_name} ({server_id}): {e}")
+                return server_name, None
+
+    @tasks.loop(seconds=DEFAULT_ANNOUNCEMENT_INTERVAL)
     async def announcement_task(self):
         await self.bot.wait_until_ready()
         if not self.announcement_channel_id:
@@ -75,35 +87,47 @@ class Announcements(commands.Cog):
             asyncio.create_task(self.retry_announcement_task())
             return
 
-        servers = {
-            key: self.cfg.get_section(key)
-            for key in self.cfg.all().keys()
-            if key.startswith("server_")
-        }
+        servers = get_visible_servers(self.cfg)
         if not servers:
             logger.warning("No servers found in config for announcements check.")
             return
-        for key, info in servers.items():
-            if info.get("hide", False):
-                continue
-            server_id = info.get("id")
-            server_name = info.get("name")
-            if not server_id:
+        semaphore = asyncio.Semaphore(ANNOUNCEMENT_CONCURRENCY)
+        results = await asyncio.gather(*(
+            self._fetch_announcements(info["id"], info.get("name", info["id"]), semaphore) for info in servers
+        ))
+
+        # The same announcement is often posted to many servers: collect once per ID
+        new_announcements = {}
+        current_ids = set()
+        all_ok = True
+        for server_name, announcements in results:
+            if announcements is None:
+                all_ok = False
                 continue
-            try:
-                url = f"{self.api_manager.base_url}/servers/{server_id}/announcements"
-                data = await self.api_manager.make_request(url)
-                announcements = data.get("data", [])
-                for ann in announcements:
-                    ann_id = str(ann["attributes"]["id"])
-                    if ann_id in self.seen_announcement_ids:
-                        continue
-                    self.seen_announcement_ids.add(ann_id)
-                    await self._persist_seen_ids()
-                    embed = create_announcement_embed(ann["attributes"], server_name)
-                    await send_to_channel(channel, embed)
-            except Exception as e:
-                logger.warning(f"Failed to check announcements for {server_name} ({server_id}): {e}")
+            for ann in announcements:
+                ann_id = str(ann["attributes"]["id"])
+                current_ids.add(ann_id)
+                if ann_id in self.seen_announcement_ids:
+                    continue
+                entry = new_announcements.setdefault(ann_id, (ann["attributes"], []))
+                entry[1].append(server_name)
+
+        embeds = [
+            create_announcement_embed(attributes, server_names[0], len(server_names) - 1)
+            for attributes, server_names in new_announcements.values()
+        ]
+        if embeds:
+            logger.info(f"Posting {len(embeds)} new announcement(s) from {len(servers)} server(s).")
+            # Queued rather than awaited: the dispatcher packs these into as few messages as fit
+            self.dispatcher.send(channel, embeds=embeds)
+
+        seen = self.seen_announcement_ids | current_ids
+        if all_ok:
+            # Forget announcements the panel no longer returns, so the seen set doesn't grow forever
+            seen = current_ids
+        if seen != self.seen_announcement_ids:
+            self.seen_announcement_ids = seen
+            await self._persist_seen_ids()
 
     async def retry_announcement_task(self):
         logger.info("Retrying announcement task in 60 seconds...")
@@ -114,6 +138,7 @@ class Announcements(commands.Cog):
 
     @app_commands.command(name="announcements", description="Fetch announcements for a specific server")
     @app_commands.describe(query="Server name or ID to fetch announcements from")
+    @app_commands.autocomplete(query=server_autocomplete)
     async def slash_fetch_announcements(self, interaction: discord.Interaction, query: str):
         """
         Fetches announcements for a specific server via slash command.
@@ -133,9 +158,8 @@ class Announcements(commands.Cog):
                                                         ephemeral=True)
                 return
             await interaction.response.defer()
-            for ann in announcements:
-                embed = create_announcement_embed(ann["attributes"], server_name)
-                await interaction.followup.send(embed=embed)
+            embeds = [create_announcement_embed(ann["attributes"], server_name) for ann in announcements]
+            await self.dispatcher.send(interaction.followup, embeds=embeds)
         except Exception as e:
             logger.error(f"Error fetching announcements for {server_name} ({server_id}): {e}")
             await interaction.response.send_message(
@@ -3,6 +3,7 @@ import discord
 from helper.logger import logger
 from helper.utilities import validate_command_context
 from discord import app_commands
+from helper.autocomplete import CHOICE_LIMIT, rank_matches, server_autocomplete
 
 class SendCommand(commands.Cog):
     def __init__(self, bot):
@@ -16,6 +17,7 @@ class SendCommand(commands.Cog):
         server_input="Server name or ID to send the command to",
         command="The command text to send"
     )
+    @app_commands.autocomplete(server_input=server_autocomplete)
     async def slash_send_command(self, interaction: discord.Interaction, server_input: str, command: str):
         """
         Sends a command to the specified server via API (slash command).
@@ -40,5 +42,23 @@ class SendCommand(commands.Cog):
             logger.error(f"Error sending command to {server_id}: {e}")
             await interaction.response.send_message(f"❌ Failed to send command: {e}", ephemeral=True)
 
+    @slash_send_command.autocomplete("command")
+    async def command_autocomplete(self, interaction: discord.Interaction, current: str):
+        """
+        Complete the word being typed with the names of players online on the chosen server, from the
+        player sync's in-memory cache. Offers nothing until the command has a space in it.
+        """
+        prefix, space, word = current.rpartition(" ")
+        players_cog = interaction.client.get_cog("PlayerListControl")
+        server_id = interaction.client.server_index.lookup(interaction.namespace.server_input)
+        if not space or players_cog is None or server_id is None:
+            return []
+        choices = []
+        for name in rank_matches(word, players_cog.player_sync.online_names(server_id)):
+            value = f"{prefix} {name}"
+            if len(value) <= CHOICE_LIMIT:
+                choices.append(app_commands.Choice(name=value, value=value))
+        return choices
+
 async def setup(bot):
     await bot.add_cog(SendCommand(bot))
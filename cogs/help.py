@@ -63,8 +63,11 @@ class HelpCommand(commands.Cog):
         for i, chunk in enumerate(field_chunks):
             embed.add_field(name=f"Slash Command Reference {i + 1}", value=f"```{chunk}```", inline=False)
 
+        latency = self.bot.dispatcher.latency()
         embed.set_footer(
-            text="⚠️ Use commands responsibly!\n— ServerSage, your digital server wizard 🧙‍♂️"
+            text="⚠️ Use commands responsibly!\n— ServerSage, your digital server wizard 🧙‍♂️\n"
+                 f"Outbound queue: {self.bot.dispatcher.pending} pending, "
+                 f"wait p50 {latency['p50']:.2f}s / p95 {latency['p95']:.2f}s"
         )
         return embed
 
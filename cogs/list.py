@@ -71,6 +71,8 @@ class ServerList(commands.Cog):
                     self.cfg.set(section, "id", server_id)
                     self.cfg.set(section, "name", name)
                     self.cfg.set(section, "hide", False)
+                    if attributes.get("docker_image"):
+                        self.cfg.set(section, "docker_image", attributes["docker_image"])
                     next_index += 1
                     updated = True
                     logger.info(f"Added missing server '{name}' with ID '{server_id}' to config.")
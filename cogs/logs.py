@@ -1,12 +1,28 @@
+import io
 import os
+import re
+import time
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from helper.logger import logger
-from helper.utilities import validate_command_context
+from helper.utilities import validate_command_context, get_visible_servers, parse_duration
 from helper.get_game import get_game_name_and_data
+from helper.log_fetcher import LogFetcher
+from helper.log_follow import LogFollowManager
+from helper.log_compress import LogArchiver, DEFAULT_UPLOAD_LIMIT
+from helper.log_grep import LogGrep
+from helper.log_events import LogEventPipeline, EVENT_TYPES
 from discord import app_commands
+from helper.autocomplete import server_autocomplete
 
 CACHE_DIR = "SS.Cache"
+MAX_TAIL_LINES = 100000
+MAX_FOLLOW_MINUTES = 240
+MAX_ATTACHMENTS = 10
+EMBED_DESCRIPTION_LIMIT = 4096
+DEFAULT_EVENT_INTERVAL = 60
+MIN_EVENT_INTERVAL = 15
+PRUNE_INTERVAL_SECONDS = 3600
 
 class Logs(commands.Cog):
     def __init__(self, bot):
@@ -14,15 +30,83 @@ class Logs(commands.Cog):
         self.api_manager = bot.api_manager
         self.cfg = bot.config
         self.control_channel = bot.control_channel
+        self.file_cache = bot.file_cache
+        self.log_fetcher = LogFetcher(self.api_manager, cache=self.file_cache, config=self.cfg)
+        self.follow_manager = LogFollowManager(self.api_manager)
+        self.event_pipeline = LogEventPipeline(self.api_manager, self.cfg)
+        self._last_prune = 0
         if not os.path.exists(CACHE_DIR):
             os.makedirs(CACHE_DIR)
+        raw_loop_value = bot.config.get("bot", "doLogEvents", False)
+        self.do_log_events = str(raw_loop_value).lower() == "true"
+        logger.info(f"Log Event Extraction enabled: {self.do_log_events}")
+        if self.do_log_events:
+            try:
+                interval = float(bot.config.get("bot", "logEventInterval", DEFAULT_EVENT_INTERVAL))
+            except (TypeError, ValueError):
+                interval = DEFAULT_EVENT_INTERVAL
+            self.log_event_task.change_interval(seconds=max(interval, MIN_EVENT_INTERVAL))
+            self.log_event_task.start()
+        else:
+            logger.info("Log Event Extraction is disabled in your Config. Skipping..")
 
-    @app_commands.command(name="logs", description="Fetch logs for a specified server")
+    async def cog_unload(self):
+        if self.do_log_events and self.log_event_task.is_running():
+            self.log_event_task.cancel()
+        await self.follow_manager.close()
+
+    @tasks.loop(seconds=DEFAULT_EVENT_INTERVAL)
+    async def log_event_task(self):
+        await self.bot.wait_until_ready()
+        try:
+            await self.event_pipeline.poll([s["id"] for s in get_visible_servers(self.cfg)])
+            if time.time() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                self.event_pipeline.store.prune()
+                self._last_prune = time.time()
+        except Exception as e:
+            logger.error(f"Unexpected error in log_event_task loop: {e}")
+
+    logs = app_commands.Group(name="logs", description="Fetch and follow server logs")
+
+    async def _resolve_log_path(self, interaction: discord.Interaction, server_id: str, log_path: str | None) -> str | None:
+        """
+        Return the given log path, or the game's default log file. Responds to the interaction and
+        returns None when no path can be determined.
+        """
+        if log_path:
+            return log_path
+        game_info = await get_game_name_and_data(self.api_manager, server_id)
+        if not game_info:
+            await interaction.response.send_message(
+                "⚠️ Unable to determine the log file path for this game.\n"
+                "Please re-run the command with a specific file path, like:\n"
+                "`/logs fetch <ServerID> <path/to/logfile>`\n"
+                "_(Example: `/logs fetch myserver logs/latest.log`)_\n\n"
+                "**Consider submitting a GitHub request to add this game to auto support.**",
+                ephemeral=True
+            )
+            return None
+
+        _, game_data = game_info
+        log_path = game_data.get("log_file")
+        if not log_path:
+            await interaction.response.send_message(
+                "❌ This game has no known log file entry. Provide the path manually.",
+                ephemeral=True
+            )
+            return None
+        return log_path
+
+    @logs.command(name="fetch", description="Fetch logs for a specified server")
     @app_commands.describe(
         server_input="Server name or ID to fetch logs from",
-        log_path="Optional path to the log file"
+        log_path="Optional path to the log file",
+        tail="Only fetch the last N lines",
+        since="Only fetch lines added since the last /logs fetch for this file"
     )
-    async def slash_fetch_logs(self, interaction: discord.Interaction, server_input: str, log_path: str = None):
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def slash_fetch_logs(self, interaction: discord.Interaction, server_input: str, log_path: str = None,
+                               tail: app_commands.Range[int, 1, MAX_TAIL_LINES] = None, since: bool = False):
         is_valid, server_id, server_name, error_message = await validate_command_context(
             interaction, self.cfg, self.control_channel, server_input
         )
@@ -30,56 +114,230 @@ class Logs(commands.Cog):
             await interaction.response.send_message(error_message, ephemeral=True)
             return
 
+        log_path = await self._resolve_log_path(interaction, server_id, log_path)
         if not log_path:
-            game_info = await get_game_name_and_data(self.api_manager, server_name)
-            if not game_info:
-                await interaction.response.send_message(
-                    "⚠️ Unable to determine the log file path for this game.\n"
-                    "Please re-run the command with a specific file path, like:\n"
-                    "`/logs <ServerID> <path/to/logfile>`\n"
-                    "_(Example: `/logs myserver logs/latest.log`)_\n\n"
-                    "**Consider submitting a GitHub request to add this game to auto support.**",
-                    ephemeral=True
-                )
-                return
-
-            _, game_data = game_info
-            log_path = game_data.get("log_file")
-            if not log_path:
-                await interaction.response.send_message(
-                    "❌ This game has no known log file entry. Provide the path manually.",
-                    ephemeral=True
-                )
-                return
+            return
 
         filename = os.path.basename(log_path)
         file_path = os.path.join(CACHE_DIR, filename)
+        upload_limit = interaction.guild.filesize_limit if interaction.guild else DEFAULT_UPLOAD_LIMIT
 
         await interaction.response.defer()
 
+        archiver = LogArchiver(file_path, upload_limit)
         try:
-            logger.info(f"Fetching log file: {log_path} for server {server_input}")
-            file_info = await self.api_manager.make_request(
-                f"{self.api_manager.base_url}/servers/{server_id}/files/download?file={log_path}"
-            )
-            signed_url = file_info.get("attributes", {}).get("url")
-            if not signed_url:
-                await interaction.followup.send("❌ Failed to get signed URL for the log file.", ephemeral=True)
+            logger.info(f"Fetching log file: {log_path} for server {server_input} (tail={tail}, since={since})")
+            if since:
+                result = await self.log_fetcher.fetch_since_last(server_id, log_path, tail)
+                if tail and result.data:
+                    result.data = b"\n".join(result.data.rstrip(b"\n").split(b"\n")[-tail:]) + b"\n"
+            elif tail:
+                result = await self.log_fetcher.fetch_tail(server_id, log_path, tail)
+            else:
+                result = await self.log_fetcher.fetch_full(server_id, log_path, sink=archiver.write)
+            logger.info(f"Fetched {log_path} for server {server_id}: {result.summary()}")
+            if (since or tail) and not result.data:
+                await interaction.followup.send(f"ℹ️ No new lines in `{log_path}`.\n-# {result.summary()}")
                 return
-            file_data = await self.api_manager.download_file(signed_url)
-            with open(file_path, "wb") as f:
-                f.write(file_data)
-            await interaction.followup.send(file=discord.File(file_path, filename=filename))
+            if since or tail:
+                await archiver.write(result.data)
+            upload_paths = await archiver.finish()
+            summary = result.summary()
+            if archiver.compressing:
+                summary += f", {archiver.summary()}"
+            files = [discord.File(path, filename=os.path.basename(path)) for path in upload_paths]
+            for start in range(0, len(files), MAX_ATTACHMENTS):
+                content = f"📄 `{log_path}` from `{server_name}`\n-# {summary}" if start == 0 else None
+                await interaction.followup.send(content=content, files=files[start:start + MAX_ATTACHMENTS])
         except Exception as e:
             logger.error(f"Error fetching or sending logs: {e}")
             await interaction.followup.send(f"❌ An error occurred while fetching the log file:\n{e}", ephemeral=True)
         finally:
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.info(f"Deleted cached file: {file_path}")
-                except Exception as cleanup_err:
-                    logger.warning(f"Failed to delete cached file {file_path}: {cleanup_err}")
+            await archiver.cleanup()
+            logger.info(f"Deleted cached file(s) for {file_path}")
+
+    @logs.command(name="grep", description="Search a server log with a regular expression")
+    @app_commands.describe(
+        server_input="Server name or ID to search logs on",
+        pattern="Regular expression to search for",
+        log_path="Optional path to the log file",
+        context="Lines of context to show around each match",
+        max_matches="Stop after this many matches",
+        ignore_case="Match case-insensitively"
+    )
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def slash_grep_logs(self, interaction: discord.Interaction, server_input: str, pattern: str,
+                              log_path: str = None, context: app_commands.Range[int, 0, 10] = 2,
+                              max_matches: app_commands.Range[int, 1, 200] = 20, ignore_case: bool = False):
+        is_valid, server_id, server_name, error_message = await validate_command_context(
+            interaction, self.cfg, self.control_channel, server_input
+        )
+        if not is_valid:
+            await interaction.response.send_message(error_message, ephemeral=True)
+            return
+
+        try:
+            grep = LogGrep(pattern, context=context, max_matches=max_matches, ignore_case=ignore_case)
+        except re.error as e:
+            await interaction.response.send_message(f"❌ Invalid regular expression: {e}", ephemeral=True)
+            return
+
+        log_path = await self._resolve_log_path(interaction, server_id, log_path)
+        if not log_path:
+            return
+
+        await interaction.response.defer()
+
+        try:
+            cache_hit, chunks = await self.log_fetcher.open_chunks(server_id, log_path)
+            await grep.run(chunks)
+            summary = grep.summary() + (", from the local file cache" if cache_hit else "")
+            logger.info(f"Searched {log_path} on server {server_id} for /{pattern}/: {summary}")
+            header = f"🔎 `/{pattern}/` in `{log_path}` from `{server_name}`\n-# {summary}"
+            if not grep.matches:
+                await interaction.followup.send(f"{header}\nNo matches found.")
+                return
+            body = "\n--\n".join(match.render() for match in grep.matches)
+            if len(body) + 8 <= EMBED_DESCRIPTION_LIMIT:
+                embed = discord.Embed(
+                    title=f"Matches in {os.path.basename(log_path)}",
+                    description=f"```\n{body}```",
+                    color=discord.Color.blue()
+                )
+                await interaction.followup.send(content=header, embed=embed)
+            else:
+                filename = f"{os.path.basename(log_path)}.grep.txt"
+                await interaction.followup.send(
+                    content=header,
+                    file=discord.File(io.BytesIO(body.encode("utf-8")), filename=filename)
+                )
+        except Exception as e:
+            logger.error(f"Error searching logs: {e}")
+            await interaction.followup.send(f"❌ An error occurred while searching the log file:\n{e}", ephemeral=True)
+
+    @logs.command(name="events", description="Show structured events extracted from a server's log")
+    @app_commands.describe(
+        server_input="Server name or ID",
+        event_type="Only show this type of event",
+        window="Time window to report on (e.g. 24h, 7d) [24h]"
+    )
+    @app_commands.choices(event_type=[app_commands.Choice(name=t, value=t) for t in EVENT_TYPES])
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def slash_log_events(self, interaction: discord.Interaction, server_input: str,
+                               event_type: app_commands.Choice[str] = None, window: str = "24h"):
+        is_valid, server_id, server_name, error_message = await validate_command_context(
+            interaction, self.cfg, self.control_channel, server_input
+        )
+        if not is_valid:
+            await interaction.response.send_message(error_message, ephemeral=True)
+            return
+        duration = parse_duration(window)
+        if not duration:
+            await interaction.response.send_message(
+                "❌ Invalid window. Use formats like `24h`, `7d`, `1mo`.", ephemeral=True
+            )
+            return
+
+        since = time.time() - duration.total_seconds()
+        store = self.event_pipeline.store
+        counts = store.counts(server_id, since)
+        recent = store.recent(server_id, since, event_type.value if event_type else None)
+        if not counts:
+            note = "" if self.do_log_events else " Log Event Extraction is disabled in your Config."
+            await interaction.response.send_message(
+                f"ℹ️ No log events for `{server_name}` in the last {window}.{note}", ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(title=f"🧾 Log Events for {server_name} ({window})", color=discord.Color.blue())
+        embed.add_field(
+            name="Counts",
+            value=" • ".join(f"{t}: {counts[t]}" for t in sorted(counts, key=lambda t: -counts[t])),
+            inline=False
+        )
+        lines = []
+        for ts, kind, player, message, value in recent:
+            detail = player or ""
+            if kind == "startup" and value is not None:
+                detail = f"started in {value:.1f}s"
+            elif message and kind in ("chat", "error", "crash"):
+                detail = f"{detail}: {message}" if detail else message
+            lines.append(f"<t:{int(ts)}:R> **{kind}** {detail[:150]}")
+        if lines:
+            embed.add_field(name="Recent", value="\n".join(lines)[:1024], inline=False)
+        if self.event_pipeline.bytes_parsed:
+            embed.set_footer(text=f"Parser throughput: {self.event_pipeline.throughput:.0f} MB/s over "
+                                  f"{self.event_pipeline.bytes_parsed / (1024 * 1024):.1f} MB this session")
+        await interaction.response.send_message(embed=embed)
+
+    @logs.command(name="cache", description="Show local file cache usage and hit ratio")
+    async def slash_cache_stats(self, interaction: discord.Interaction):
+        if str(interaction.channel.id) != str(self.control_channel):
+            await interaction.response.send_message(
+                "⚠️ Commands can only be used in the designated control channel.", ephemeral=True
+            )
+            return
+        await interaction.response.send_message(f"🗄️ File cache: {self.file_cache.summary()}", ephemeral=True)
+
+    @logs.command(name="follow", description="Stream new log lines for a server into a thread")
+    @app_commands.describe(
+        server_input="Server name or ID to follow logs from",
+        log_path="Optional path to the log file",
+        minutes="Stop following after this many minutes (default 30)"
+    )
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def slash_follow_logs(self, interaction: discord.Interaction, server_input: str, log_path: str = None,
+                                minutes: app_commands.Range[int, 1, MAX_FOLLOW_MINUTES] = 30):
+        is_valid, server_id, server_name, error_message = await validate_command_context(
+            interaction, self.cfg, self.control_channel, server_input
+        )
+        if not is_valid:
+            await interaction.response.send_message(error_message, ephemeral=True)
+            return
+
+        log_path = await self._resolve_log_path(interaction, server_id, log_path)
+        if not log_path:
+            return
+
+        await interaction.response.send_message(
+            f"📡 Following `{log_path}` from `{server_name}` for {minutes} minute(s). "
+            f"Use `/logs unfollow` in the thread to stop."
+        )
+        try:
+            message = await interaction.original_response()
+            thread = await message.create_thread(
+                name=f"{server_name} · {os.path.basename(log_path)}"[:100],
+                auto_archive_duration=60
+            )
+            await self.follow_manager.follow(server_id, log_path, thread, minutes * 60)
+        except Exception as e:
+            logger.error(f"Failed to start following {log_path} for server {server_id}: {e}")
+            await interaction.followup.send(f"❌ Failed to start following the log:\n{e}", ephemeral=True)
+
+    @logs.command(name="unfollow", description="Stop following logs (run in a follow thread, or give a server)")
+    @app_commands.describe(server_input="Stop every log follow for this server name or ID")
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def slash_unfollow_logs(self, interaction: discord.Interaction, server_input: str = None):
+        if server_input is None:
+            if not self.follow_manager.is_following(interaction.channel.id):
+                await interaction.response.send_message(
+                    "⚠️ Run this inside a log follow thread, or pass a server to stop all of its follows.",
+                    ephemeral=True
+                )
+                return
+            await interaction.response.send_message("⏹️ Stopping log follow.", ephemeral=True)
+            await self.follow_manager.unfollow(interaction.channel.id)
+            return
+
+        is_valid, server_id, server_name, error_message = await validate_command_context(
+            interaction, self.cfg, self.control_channel, server_input
+        )
+        if not is_valid:
+            await interaction.response.send_message(error_message, ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        stopped = await self.follow_manager.unfollow_server(server_id)
+        await interaction.followup.send(f"⏹️ Stopped {stopped} log follow(s) for `{server_name}`.", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Logs(bot))
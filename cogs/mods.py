@@ -1,10 +1,89 @@
+import asyncio
+import time
 import discord
 from discord.ext import commands
 from discord import app_commands
 from fnmatch import fnmatch
-from helper.utilities import validate_command_context
-from helper.get_game import get_game_name_and_data
+from helper.utilities import validate_command_context, resolve_server_targets
+from helper.mod_index import ModIndex, get_mods_layout, mod_inventory, diff_inventories
+from helper.pagination import PaginatedEmbedView, paginate_lines
+from helper.log_fetcher import format_bytes
 from helper.logger import logger
+from helper.autocomplete import CHOICE_LIMIT, fleet_autocomplete, rank_matches, server_autocomplete
+
+PLAN_CONCURRENCY = 8
+RENAME_CONCURRENCY = 4
+RENAME_BATCH_SIZE = 100
+
+def build_rename_plan(entries: list[dict], action: str, mod_pattern: str, suffix: str) -> tuple[list[dict], list[str]]:
+    """
+    Work out the renames for enabling/disabling the entries matching `mod_pattern` (by name or path).
+    Returns (renames as {"from", "to"}, matching folders that can't be toggled).
+    """
+    renames = []
+    folders = []
+    for entry in entries:
+        if not (fnmatch(entry["name"], mod_pattern) or fnmatch(entry["path"], mod_pattern)):
+            continue
+        if not entry["is_file"]:
+            folders.append(entry["path"])
+        elif action == "disable" and not entry["disabled"]:
+            renames.append({"from": entry["path"], "to": f"{entry['path']}{suffix}"})
+        elif action == "enable" and entry["disabled"]:
+            renames.append({"from": entry["path"], "to": entry["path"][:-len(suffix)]})
+    return renames, folders
+
+def format_plan_line(plan: dict, action: str, dry_run: bool) -> str:
+    name = plan["server_name"]
+    if plan["error"]:
+        return f"❌ **{name}**: {plan['error']}"
+    if not plan["renames"]:
+        return f"➖ **{name}**: nothing to {action}"
+    names = ", ".join(r["from"].rsplit("/", 1)[-1] for r in plan["renames"][:5])
+    more = f" (+{len(plan['renames']) - 5} more)" if len(plan["renames"]) > 5 else ""
+    icon = "🔍" if dry_run else "✅"
+    verb = f"would {action}" if dry_run else f"{action}d"
+    return f"{icon} **{name}**: {verb} {len(plan['renames'])} — {names}{more}"
+
+def format_diff_lines(diff: dict, base_name: str, other_name: str) -> list[str]:
+    lines = []
+    if diff["missing"]:
+        lines.append(f"**Missing on {other_name}** ({len(diff['missing'])}): " + ", ".join(diff["missing"]))
+    if diff["extra"]:
+        lines.append(f"**Extra on {other_name}** ({len(diff['extra'])}): " + ", ".join(diff["extra"]))
+    for mod, base_disabled, other_disabled in diff["disabled"]:
+        side = other_name if other_disabled else base_name
+        lines.append(f"⛔ `{mod}` disabled on {side} only")
+    for mod, base_files, other_files in diff["version"]:
+        lines.append(f"🔀 `{mod}`: {', '.join(base_files)} ≠ {', '.join(other_files)}")
+    for mod, filename in diff["changed"]:
+        lines.append(f"📏 `{filename}` differs in size")
+    return lines
+
+def diff_counts(diff: dict) -> str:
+    parts = [f"{len(diff[k])} {k}" for k in ("missing", "extra", "disabled", "version", "changed") if diff[k]]
+    return ", ".join(parts) if parts else "in sync"
+
+def format_mod_line(entry: dict) -> str:
+    if not entry["is_file"]:
+        return f"📁 `{entry['path']}/`"
+    modified = f" • <t:{entry['modified']}:d>" if entry["modified"] else ""
+    status = "⛔ " if entry["disabled"] else ""
+    return f"{status}`{entry['path']}` • {format_bytes(entry['size'])}{modified}"
+
+def format_name_list(names: list[str], limit: int = 800) -> str:
+    """
+    Join names one per line, cutting off with '... and N more' past `limit` characters.
+    """
+    shown = []
+    size = 0
+    for name in names:
+        if size + len(name) + 1 > limit:
+            shown.append(f"... and {len(names) - len(shown)} more")
+            break
+        shown.append(name)
+        size += len(name) + 1
+    return "\n".join(shown)
 
 class ModsManager(commands.Cog):
     def __init__(self, bot):
@@ -12,30 +91,27 @@ class ModsManager(commands.Cog):
         self.api_manager = bot.api_manager
         self.cfg = bot.config
         self.control_channel = bot.control_channel
+        self.mod_index = ModIndex(self.api_manager)
 
-    async def get_mods_dir_for_server(self, server_name: str):
+    async def get_mods_layout_for_server(self, server_id: str, server_name: str) -> dict | None:
         try:
-            game_info = await get_game_name_and_data(self.api_manager, server_name)
-            if not game_info:
-                logger.warning(f"Could not find game info for server '{server_name}'")
-                return None
-            _, game_data = game_info
-            mods_dir = game_data.get("mods_dir")
-            return mods_dir.strip() if mods_dir and mods_dir.strip() else None
+            layout = await get_mods_layout(self.api_manager, server_id)
+            if not layout:
+                logger.warning(f"Could not find a mods directory for server '{server_name}'")
+            return layout
         except Exception as e:
-            logger.error(f"Error getting mods_dir for server '{server_name}': {e}")
+            logger.error(f"Error getting mods directories for server '{server_name}': {e}")
             return None
 
-    async def list_mods_files(self, server_id: str, mods_dir: str):
-        url = f"{self.api_manager.base_url}/servers/{server_id}/files/list?directory=/{mods_dir}"
-        response = await self.api_manager.make_request(url)
-        return [file["attributes"] for file in response.get("data", []) if "attributes" in file]
-
     mods = app_commands.Group(name="mods", description="Manage server mods")
 
     @mods.command(name="list", description="List mods for a server")
-    @app_commands.describe(server_input="Server name or ID")
-    async def mods_list(self, interaction: discord.Interaction, server_input: str):
+    @app_commands.describe(
+        server_input="Server name or ID",
+        refresh="Re-crawl the mods directories instead of using the cached index"
+    )
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def mods_list(self, interaction: discord.Interaction, server_input: str, refresh: bool = False):
         is_valid, server_id, server_name, error_message = await validate_command_context(
             interaction, self.cfg, self.control_channel, server_input
         )
@@ -43,52 +119,173 @@ class ModsManager(commands.Cog):
             await interaction.response.send_message(error_message, ephemeral=True)
             return
 
-        mods_dir = await self.get_mods_dir_for_server(server_name)
-        if not mods_dir:
+        layout = await self.get_mods_layout_for_server(server_id, server_name)
+        if not layout:
             await interaction.response.send_message(
                 f"❌ Server '{server_name}' does not have a mods directory configured.",
                 ephemeral=True
             )
             return
 
+        await interaction.response.defer()
         try:
-            files = await self.list_mods_files(server_id, mods_dir)
-            if not files:
-                await interaction.response.send_message(
-                    f"ℹ️ No files found in mods directory `{mods_dir}` for server `{server_name}`.",
-                    ephemeral=True
+            snapshot = await self.mod_index.get(server_id, layout, refresh=refresh)
+            dirs = ", ".join(f"/{d}" for d in layout["dirs"])
+            if not snapshot["entries"]:
+                await interaction.followup.send(
+                    f"ℹ️ No files found in mods directories `{dirs}` for server `{server_name}`."
                 )
                 return
 
-            file_names = sorted(
-                f"{f['name']}/" if not f.get("is_file", False) else f["name"]
-                for f in files
-            )
-            file_list_str = "\n".join(file_names)
-            embed = discord.Embed(
-                title=f"Mods List for {server_name} (directory: /{mods_dir})",
-                description=file_list_str,
-                color=discord.Color.blue()
-            )
-            await interaction.response.send_message(embed=embed)
+            files = [e for e in snapshot["entries"] if e["is_file"]]
+            disabled = sum(1 for e in files if e["disabled"])
+            total_size = sum(e["size"] for e in files)
+            summary = (f"{len(files)} file(s), {disabled} disabled, {format_bytes(total_size)} in "
+                       f"{snapshot['directories']} director(ies)")
+            if snapshot["truncated"]:
+                summary += " (crawl limit reached)"
+            pages = [
+                discord.Embed(
+                    title=f"Mods List for {server_name} ({dirs})",
+                    description=f"-# {summary}\n{body}",
+                    color=discord.Color.blue()
+                )
+                for body in paginate_lines([format_mod_line(e) for e in snapshot["entries"]])
+            ]
+            await PaginatedEmbedView(pages).send(interaction)
         except Exception as e:
+            await interaction.followup.send(f"⚠️ Failed to fetch mods list for `{server_name}`: {e}", ephemeral=True)
+
+    async def _inventory(self, server_id: str, server_name: str) -> tuple[dict | None, str | None]:
+        """
+        Return (snapshot with its "inventory", None) or (None, error) for a server.
+        """
+        layout = await self.get_mods_layout_for_server(server_id, server_name)
+        if not layout:
+            return None, "no mods directory configured"
+        try:
+            snapshot = await self.mod_index.get(server_id, layout)
+        except Exception as e:
+            return None, f"listing failed: {e}"
+        if "inventory" not in snapshot:
+            snapshot["inventory"] = mod_inventory(snapshot)
+        return snapshot, None
+
+    @mods.command(name="diff", description="Compare mod inventories between servers")
+    @app_commands.describe(
+        server_a="Server to compare from (name or ID)",
+        server_b="Server to compare against: a name or ID, a glob, a tag (tag:<name>) or 'all'"
+    )
+    @app_commands.autocomplete(server_a=server_autocomplete, server_b=fleet_autocomplete)
+    async def mods_diff(self, interaction: discord.Interaction, server_a: str, server_b: str):
+        is_valid, base_id, base_name, error_message = await validate_command_context(
+            interaction, self.cfg, self.control_channel, server_a
+        )
+        if not is_valid:
+            await interaction.response.send_message(error_message, ephemeral=True)
+            return
+        targets = [(sid, name) for sid, name in resolve_server_targets(self.cfg, server_b) if sid != base_id]
+        if not targets:
             await interaction.response.send_message(
-                f"⚠️ Failed to fetch mods list for `{server_name}`: {e}",
+                f"No other server found matching '{server_b}'. Please check the ID, name, glob or tag.",
                 ephemeral=True
             )
+            return
+
+        await interaction.response.defer()
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(PLAN_CONCURRENCY)
+
+        async def load(server_id: str, server_name: str):
+            async with semaphore:
+                return await self._inventory(server_id, server_name)
+
+        base, *others = await asyncio.gather(
+            load(base_id, base_name), *(load(server_id, name) for server_id, name in targets)
+        )
+        base_snapshot, base_error = base
+        if base_error:
+            await interaction.followup.send(f"⚠️ Cannot read mods on `{base_name}`: {base_error}")
+            return
+
+        overview = []
+        detail_pages = []
+        for (server_id, name), (snapshot, error) in zip(targets, others):
+            if error:
+                overview.append(f"❌ **{name}**: {error}")
+                continue
+            diff = diff_inventories(base_snapshot["inventory"], snapshot["inventory"],
+                                    base_snapshot["disabled_suffix"], snapshot["disabled_suffix"])
+            counts = diff_counts(diff)
+            overview.append(f"{'✅' if counts == 'in sync' else '⚠️'} **{name}**: {counts}")
+            for body in paginate_lines(format_diff_lines(diff, base_name, name)):
+                if body:
+                    detail_pages.append(discord.Embed(
+                        title=f"Mod drift: {base_name} → {name}"[:256],
+                        description=body,
+                        color=discord.Color.orange()
+                    ))
+        elapsed = time.monotonic() - started
+        logger.info(f"/mods diff {base_name} against {len(targets)} server(s) in {elapsed:.2f}s")
+
+        summary = f"-# {len(base_snapshot['inventory'])} mod(s) on {base_name}, compared in {elapsed:.1f}s"
+        pages = [
+            discord.Embed(title=f"Mod drift from {base_name}"[:256], description=f"{summary}\n{body}",
+                          color=discord.Color.blue())
+            for body in paginate_lines(overview)
+        ]
+        if len(targets) == 1 and detail_pages:
+            pages = [discord.Embed(title=p.title, description=f"{summary}\n{p.description}", color=p.color)
+                     for p in detail_pages]
+        else:
+            pages.extend(detail_pages)
+        await PaginatedEmbedView(pages).send(interaction)
 
-    @mods.command(name="manage", description="Enable or disable mods for a server")
+    async def _plan_server(self, server_id: str, server_name: str, action: str, mod_pattern: str) -> dict:
+        result = {"server_id": server_id, "server_name": server_name, "renames": [], "folders": [], "error": None}
+        layout = await self.get_mods_layout_for_server(server_id, server_name)
+        if not layout:
+            result["error"] = "no mods directory configured"
+            return result
+        try:
+            snapshot = await self.mod_index.get(server_id, layout)
+        except Exception as e:
+            result["error"] = f"listing failed: {e}"
+            return result
+        result["renames"], result["folders"] = build_rename_plan(
+            snapshot["entries"], action, mod_pattern, layout["disabled_suffix"]
+        )
+        return result
+
+    async def _apply_plan(self, plan: dict):
+        url = f"{self.api_manager.base_url}/servers/{plan['server_id']}/files/rename"
+        try:
+            for start in range(0, len(plan["renames"]), RENAME_BATCH_SIZE):
+                json_body = {
+                    "root": "/",
+                    "files": plan["renames"][start:start + RENAME_BATCH_SIZE]
+                }
+                await self.api_manager.make_request(url, method="PUT", json=json_body)
+        except Exception as e:
+            plan["error"] = f"rename failed: {e}"
+        finally:
+            self.mod_index.invalidate(plan["server_id"])
+
+    @mods.command(name="manage", description="Enable or disable mods on one server or across the fleet")
     @app_commands.describe(
         action="Action to perform: enable or disable",
         mod_pattern="Mod filename pattern (supports wildcards)",
-        server_input="Server name or ID"
+        server_input="Server name or ID, a glob like 'survival-*', a tag (tag:<name>) or 'all'",
+        dry_run="Only show what would be renamed"
     )
+    @app_commands.autocomplete(server_input=fleet_autocomplete)
     async def mods_manage(
         self,
         interaction: discord.Interaction,
         action: str,
         mod_pattern: str,
-        server_input: str
+        server_input: str,
+        dry_run: bool = False
     ):
         action = action.lower()
         if action not in ("enable", "disable"):
@@ -96,83 +293,89 @@ class ModsManager(commands.Cog):
                 "❌ Action must be 'enable' or 'disable'.", ephemeral=True
             )
             return
-
-        is_valid, server_id, server_name, error_message = await validate_command_context(
-            interaction, self.cfg, self.control_channel, server_input
-        )
-        if not is_valid:
-            await interaction.response.send_message(error_message, ephemeral=True)
+        if str(interaction.channel.id) != str(self.control_channel):
+            await interaction.response.send_message(
+                "⚠️ Commands can only be used in the designated control channel.", ephemeral=True
+            )
             return
-
-        mods_dir = await self.get_mods_dir_for_server(server_name)
-        if not mods_dir:
+        targets = resolve_server_targets(self.cfg, server_input)
+        if not targets:
             await interaction.response.send_message(
-                f"❌ Server '{server_name}' does not have a mods directory configured.",
+                f"No server found matching '{server_input}'. Please check the ID, name, glob or tag.",
                 ephemeral=True
             )
             return
 
-        try:
-            files = await self.list_mods_files(server_id, mods_dir)
-            if not files:
-                await interaction.response.send_message(
-                    f"ℹ️ No files found in mods directory `{mods_dir}` for server `{server_name}`.",
-                    ephemeral=True
-                )
-                return
+        await interaction.response.defer()
+        semaphore = asyncio.Semaphore(PLAN_CONCURRENCY)
 
-            rename_files = []
-            affected_names = []
-            skipped_folders = []
-
-            for file in files:
-                filename = file.get("name", "")
-                if not fnmatch(filename, mod_pattern):
-                    continue
-                if not file.get("is_file", False):
-                    skipped_folders.append(filename)
-                    continue
-
-                from_path = f"{mods_dir}/{filename}"
-                if action == "disable" and not filename.endswith(".disabled"):
-                    to_path = f"{from_path}.disabled"
-                    rename_files.append({"from": from_path, "to": to_path})
-                    affected_names.append(filename)
-                elif action == "enable" and filename.endswith(".disabled"):
-                    to_path = f"{mods_dir}/{filename[:-9]}"
-                    rename_files.append({"from": from_path, "to": to_path})
-                    affected_names.append(filename)
-
-            if not rename_files and not skipped_folders:
-                await interaction.response.send_message(
-                    f"ℹ️ No mods matched or required action `{action}` in `{mods_dir}`.",
-                    ephemeral=True
-                )
-                return
+        async def plan_one(server_id: str, server_name: str) -> dict:
+            async with semaphore:
+                return await self._plan_server(server_id, server_name, action, mod_pattern)
 
-            if rename_files:
-                url = f"{self.api_manager.base_url}/servers/{server_id}/files/rename"
-                json_body = {
-                    "root": "/",
-                    "files": rename_files
-                }
-                await self.api_manager.make_request(url, method="PUT", json=json_body)
+        plans = await asyncio.gather(*(plan_one(server_id, name) for server_id, name in targets))
 
-            response_lines = []
-            if affected_names:
-                response_lines.append(f"✅ Successfully {action}d {len(affected_names)} mod(s):")
-                response_lines.append("```" + "\n".join(affected_names) + "```")
+        if not dry_run:
+            rename_semaphore = asyncio.Semaphore(RENAME_CONCURRENCY)
+
+            async def apply_one(plan: dict):
+                async with rename_semaphore:
+                    await self._apply_plan(plan)
+
+            await asyncio.gather(*(apply_one(plan) for plan in plans if plan["renames"] and not plan["error"]))
 
-            if skipped_folders:
+        renamed = sum(len(p["renames"]) for p in plans if not p["error"])
+        failed = sum(1 for p in plans if p["error"])
+        verb = f"would {action}" if dry_run else f"{action}d"
+        summary = f"{verb} {renamed} mod(s) across {len(plans)} server(s)"
+        if failed:
+            summary += f", {failed} failed"
+        logger.info(f"/mods manage {action} '{mod_pattern}' on '{server_input}' (dry_run={dry_run}): {summary}")
+
+        if len(plans) == 1 and not plans[0]["error"]:
+            plan = plans[0]
+            if not plan["renames"] and not plan["folders"]:
+                await interaction.followup.send(f"ℹ️ No mods matched or required action `{action}` on `{plan['server_name']}`.")
+                return
+            response_lines = []
+            if plan["renames"]:
+                title = f"🔍 Dry run: would {action}" if dry_run else f"✅ Successfully {action}d"
+                response_lines.append(f"{title} {len(plan['renames'])} mod(s):")
+                response_lines.append("```" + format_name_list([r["from"] for r in plan["renames"]]) + "```")
+            if plan["folders"]:
                 response_lines.append("⚠️ The following are folders and must be removed manually:")
-                response_lines.append("```" + "\n".join(skipped_folders) + "```")
+                response_lines.append("```" + format_name_list(plan["folders"]) + "```")
+            await interaction.followup.send("\n".join(response_lines))
+            return
 
-            await interaction.response.send_message("\n".join(response_lines))
-        except Exception as e:
-            await interaction.response.send_message(
-                f"⚠️ Failed to {action} mods on `{server_name}`: {e}",
-                ephemeral=True
-            )
+        lines = [format_plan_line(plan, action, dry_run) for plan in sorted(plans, key=lambda p: p["server_name"].lower())]
+        title = f"{'🔍 Dry run: ' if dry_run else ''}/mods manage {action} `{mod_pattern}` on {server_input}"
+        pages = [
+            discord.Embed(title=title[:256], description=f"-# {summary}\n{body}",
+                          color=discord.Color.orange() if dry_run else discord.Color.blue())
+            for body in paginate_lines(lines)
+        ]
+        await PaginatedEmbedView(pages).send(interaction)
+
+    @mods_manage.autocomplete("mod_pattern")
+    async def mod_pattern_autocomplete(self, interaction: discord.Interaction, current: str):
+        """
+        Filenames from the cached mod snapshots of the targeted servers; never lists the panel.
+        Enable offers disabled files and disable offers enabled ones.
+        """
+        want_disabled = {"enable": True, "disable": False}.get(str(interaction.namespace.action or "").lower())
+        names = set()
+        for server_id in interaction.client.server_index.targets(interaction.namespace.server_input):
+            snapshot = self.mod_index.snapshots.get(server_id)
+            if not snapshot:
+                continue
+            for entry in snapshot["entries"]:
+                if entry["is_file"] and (want_disabled is None or entry["disabled"] == want_disabled):
+                    names.add(entry["name"])
+        return [
+            app_commands.Choice(name=name[:CHOICE_LIMIT], value=name[:CHOICE_LIMIT])
+            for name in rank_matches(current, list(names))
+        ]
 
 async def setup(bot):
     await bot.add_cog(ModsManager(bot))
\ No newline at end of file
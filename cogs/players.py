@@ -1,54 +1,211 @@
+import asyncio
+import time
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands, Embed, Colour
-import re
-from datetime import datetime, timezone, timedelta
 from helper.logger import logger
-from helper.player_list import fetch_full_player_list
-from helper.utilities import validate_command_context
+from helper.pagination import paginate_lines
+from helper.player_store import PlayerSync
+from helper.player_purge import PurgeStore, PlayerPurge
+from helper.utilities import validate_command_context, parse_duration, get_visible_servers
+from helper.autocomplete import server_autocomplete
 
-def parse_duration(duration_str: str):
+EMBED_DESCRIPTION_LIMIT = 4000
+DEFAULT_SYNC_INTERVAL = 60
+MIN_SYNC_INTERVAL = 30
+PRUNE_INTERVAL_SECONDS = 3600
+PREVIEW_NAMES = 20
+
+async def send_reply(interaction: discord.Interaction, content: str):
     """
-    Parse a duration string that may contain multiple time units concatenated,
-    e.g. '2d12h15m', '1 week 3 days', '5h30m', etc.
-    Returns a timedelta or None if invalid.
+    Ephemeral reply that works whether or not the interaction was already deferred.
     """
-    pattern = re.compile(r"(\d+)\s*(d|w|mo|h|m|day|week|month|hour|minute)s?", re.IGNORECASE)
-    matches = pattern.findall(duration_str)
-    if not matches:
-        return None
-
-    total = timedelta()
-    for value, unit in matches:
-        value = int(value)
-        unit = unit.lower()
-        if unit in ("d", "day"):
-            total += timedelta(days=value)
-        elif unit in ("w", "week"):
-            total += timedelta(weeks=value)
-        elif unit in ("mo", "month"):
-            total += timedelta(days=value * 30)  # Approximate month
-        elif unit in ("h", "hour"):
-            total += timedelta(hours=value)
-        elif unit in ("m", "minute"):
-            total += timedelta(minutes=value)
-        else:
-            pass
+    if interaction.response.is_done():
+        await interaction.followup.send(content, ephemeral=True)
+    else:
+        await interaction.response.send_message(content, ephemeral=True)
+
+def create_purge_preview_embed(server_name: str, label: str, players: list[dict]) -> Embed:
+    names = ", ".join(p["username"] for p in players[:PREVIEW_NAMES])
+    if len(players) > PREVIEW_NAMES:
+        names += f" and {len(players) - PREVIEW_NAMES} more"
+    embed = Embed(
+        title="🧹 Dry Run: Inactive Players",
+        description=(
+            f"{len(players)} players on `{server_name}` have been inactive for over `{label}` "
+            f"(oldest last seen <t:{int(players[0]['last_seen'])}:R>).\n\n{names}"
+        ),
+        color=Colour.orange()
+    )
+    embed.set_footer(text="Nothing was removed. Run again without dry_run to purge.")
+    return embed
 
-    return total if total.total_seconds() > 0 else None
+def create_purge_progress_embed(server_name: str, counts: dict) -> Embed:
+    total = counts["pending"] + counts["done"] + counts["failed"]
+    finished = counts["done"] + counts["failed"]
+    percent = finished / total * 100 if total else 100
+    embed = Embed(
+        title="🧹 Clearing Inactive Players",
+        description=(
+            f"`{server_name}`: {finished}/{total} processed ({percent:.0f}%)\n"
+            f"Removed: {counts['done']} • Failed: {counts['failed']}"
+        ),
+        color=Colour.blurple()
+    )
+    embed.set_footer(text="Progress is checkpointed; an interrupted purge resumes when the bot restarts.")
+    return embed
 
+def create_purge_result_embed(server_name: str, label: str, counts: dict, failures: list[tuple]) -> Embed:
+    embed = Embed(
+        title="🧹 Cleared Inactive Players",
+        description=f"{counts['done']} players removed from `{server_name}` who were inactive for over `{label}`.",
+        color=Colour.red() if not counts["failed"] else Colour.orange()
+    )
+    if counts["failed"]:
+        lines = [f"{username}: {error}"[:100] for username, error in failures]
+        if counts["failed"] > len(failures):
+            lines.append(f"... and {counts['failed'] - len(failures)} more")
+        embed.add_field(name=f"⚠️ {counts['failed']} failed", value="\n".join(lines)[:1024], inline=False)
+    embed.set_footer(text="Inactive = offline and not seen within time window.")
+    return embed
+
+def format_hours(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+def create_player_stats_embed(server_name: str, window: str, report: dict, sync_enabled: bool = True) -> Embed:
+    embed = Embed(title=f"👥 Player Activity on `{server_name}` over the last {window}", color=Colour.green())
+    embed.add_field(
+        name="Playtime",
+        value=(f"Total: **{format_hours(report['total_playtime'])}**\n"
+               f"Per active player: {format_hours(report['average_playtime'])}\n"
+               f"Sessions: {report['sessions']} (avg {format_hours(report['average_session'])})"),
+        inline=True
+    )
+    peak_at = f" on <t:{int(report['peak_day'])}:D>" if report["peak_day"] is not None else ""
+    embed.add_field(
+        name="Activity",
+        value=(f"Daily active: **{report['average_dau']:.1f}** avg, {report['max_dau']} max\n"
+               f"Peak concurrent: **{report['peak_concurrency']}**{peak_at}"),
+        inline=True
+    )
+    embed.add_field(
+        name="Players",
+        value=(f"Active: **{report['active_players']}**\n"
+               f"New: {report['new_players']} • Returning: {report['returning_players']}"),
+        inline=True
+    )
+    footer = f"UTC-day resolution • {report['observed_days']} day(s) observed by the player sync"
+    if not sync_enabled:
+        footer += " • Player Sync is off, so playtime isn't being recorded"
+    embed.set_footer(text=footer)
+    return embed
 
 class PlayerListControl(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.api_manager = bot.api_manager
+        self.dispatcher = bot.dispatcher
         self.cfg = bot.config
         self.control_channel = bot.control_channel
+        raw_loop_value = bot.config.get("bot", "doPlayerSync", False)
+        self.do_player_sync = str(raw_loop_value).lower() == "true"
+        try:
+            interval = float(bot.config.get("bot", "playerSyncInterval", DEFAULT_SYNC_INTERVAL))
+        except (TypeError, ValueError):
+            interval = DEFAULT_SYNC_INTERVAL
+        self.sync_interval = max(interval, MIN_SYNC_INTERVAL)
+        self.player_sync = PlayerSync(self.api_manager, self.cfg,
+                                      self.sync_interval if self.do_player_sync else None)
+        self.purge_store = PurgeStore(self.cfg)
+        self._purges = {}
+        self._resume_task = None
+        self._last_prune = 0
+        logger.info(f"Player Sync enabled: {self.do_player_sync}")
+        if self.do_player_sync:
+            self.player_sync_task.change_interval(seconds=self.sync_interval)
+            self.player_sync_task.start()
+        else:
+            logger.info("Player Sync is disabled in your Config. Skipping..")
+            logger.warning("Playtime and sessions for /players stats are only recorded with doPlayerSync enabled.")
+
+    async def cog_load(self):
+        self._resume_task = asyncio.create_task(self._resume_purges())
+
+    async def cog_unload(self):
+        if self.do_player_sync and self.player_sync_task.is_running():
+            self.player_sync_task.cancel()
+        # Unfinished purges stay checkpointed and resume on the next start
+        tasks_to_stop = [t for t in (self._resume_task, *self._purges.values()) if t is not None]
+        for task in tasks_to_stop:
+            task.cancel()
+        await asyncio.gather(*tasks_to_stop, return_exceptions=True)
+
+    async def _resume_purges(self):
+        await self.bot.wait_until_ready()
+        for job in self.purge_store.jobs():
+            channel = self.bot.get_channel(int(job["channel_id"])) if job["channel_id"] else None
+            logger.info(f"Resuming player purge for {job['server_name']} ({job['server_id']}).")
+            self._start_purge(job["server_id"], job["server_name"], job["label"], channel, job["message_id"])
+
+    def _start_purge(self, server_id: str, server_name: str, label: str, channel, message_id):
+        task = asyncio.create_task(self._run_purge(server_id, server_name, label, channel, message_id))
+        self._purges[server_id] = task
+        task.add_done_callback(lambda _: self._purges.pop(server_id, None))
+
+    async def _run_purge(self, server_id: str, server_name: str, label: str, channel, message_id):
+        async def on_progress(counts: dict):
+            if channel is not None and message_id:
+                self.dispatcher.edit(channel, message_id, embed=create_purge_progress_embed(server_name, counts))
+
+        purge = PlayerPurge(self.api_manager, self.purge_store, server_id, self.player_sync.store, on_progress)
+        try:
+            counts = await purge.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Player purge for {server_name} ({server_id}) stopped: {e}")
+            return
+        embed = create_purge_result_embed(server_name, label, counts, self.purge_store.failures(server_id))
+        self.purge_store.finish(server_id)
+        logger.info(f"Player purge for {server_name} ({server_id}) finished: "
+                    f"{counts['done']} removed, {counts['failed']} failed.")
+        if channel is not None and message_id:
+            self.dispatcher.edit(channel, message_id, embed=embed)
+        elif channel is not None:
+            self.dispatcher.send(channel, embeds=[embed])
+
+    @tasks.loop(seconds=DEFAULT_SYNC_INTERVAL)
+    async def player_sync_task(self):
+        await self.bot.wait_until_ready()
+        try:
+            await self.player_sync.sync([s["id"] for s in get_visible_servers(self.cfg)])
+            if time.time() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                self.player_sync.store.prune()
+                self._last_prune = time.time()
+        except Exception as e:
+            logger.error(f"Unexpected error in player_sync_task loop: {e}")
+
+    async def _ensure_synced(self, interaction: discord.Interaction, server_id: str) -> dict:
+        """
+        Return the server's sync state, syncing first (after deferring) when the background loop
+        hasn't covered it recently.
+        """
+        state = self.player_sync.store.sync_state(server_id)
+        max_age = self.sync_interval * 2 if self.do_player_sync else 0
+        if state is None or time.time() - state["synced"] > max_age:
+            if not interaction.response.is_done():
+                await interaction.response.defer()
+            await self.player_sync.sync_server(server_id)
+            state = self.player_sync.store.sync_state(server_id)
+        return state
 
     players = app_commands.Group(name="players", description="Player management commands")
 
     @players.command(name="list", description="Show online players for a server")
     @app_commands.describe(server_input="Server name or ID")
+    @app_commands.autocomplete(server_input=server_autocomplete)
     async def list(self, interaction: discord.Interaction, server_input: str):
         is_valid, server_id, server_name, error_message = await validate_command_context(
             interaction, self.cfg, self.control_channel, server_input
@@ -58,47 +215,67 @@ class PlayerListControl(commands.Cog):
             return
 
         try:
-            players = await fetch_full_player_list(self.api_manager, server_id)
+            state = await self._ensure_synced(interaction, server_id)
         except Exception as e:
             logger.error(f"Failed to fetch player list for server {server_input}: {e}")
-            await interaction.response.send_message(
-                f"❌ Failed to fetch player list for server `{server_input}`:\n{e}", ephemeral=True
-            )
+            await send_reply(interaction, f"❌ Failed to fetch player list for server `{server_input}`:\n{e}")
             return
 
-        online_players = [p['username'] for p in players if p.get('status', '').lower() == 'online']
+        online_players = self.player_sync.store.online(server_id)
         if not online_players:
-            await interaction.response.send_message(f"No online players found for server `{server_name}`.", ephemeral=True)
+            await send_reply(interaction, f"No online players found for server `{server_name}`.")
             return
 
-        embed = Embed(
-            title=f"Online Players on Server `{server_name}`",
-            color=Colour.green()
+        pages = paginate_lines(online_players, limit=EMBED_DESCRIPTION_LIMIT, max_lines=len(online_players))
+        embeds = []
+        for i, page in enumerate(pages, start=1):
+            title = f"Online Players on Server `{server_name}`"
+            if len(pages) > 1:
+                title += f" ({i}/{len(pages)})"
+            embeds.append(Embed(title=title, description=page, color=Colour.green()))
+        embeds[-1].set_footer(
+            text=f"Total Online: {len(online_players)} • Synced {int(time.time() - state['synced'])}s ago"
+        )
+        if not interaction.response.is_done():
+            await interaction.response.defer()
+        await self.dispatcher.send(interaction.followup, embeds=embeds)
+
+    @players.command(name="stats", description="Playtime, daily active users and peak concurrency for a server")
+    @app_commands.describe(server_input="Server name or ID", window="Time window (e.g. 24h, 7d, 90d) [7d]")
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def stats(self, interaction: discord.Interaction, server_input: str, window: str = "7d"):
+        is_valid, server_id, server_name, error_message = await validate_command_context(
+            interaction, self.cfg, self.control_channel, server_input
+        )
+        if not is_valid:
+            await interaction.response.send_message(error_message, ephemeral=True)
+            return
+        duration = parse_duration(window)
+        if not duration:
+            await interaction.response.send_message(
+                "❌ Invalid window. Use formats like `24h`, `7d`, `1mo`.", ephemeral=True
+            )
+            return
+
+        report = self.player_sync.store.report(server_id, duration.total_seconds())
+        if not report["observed_days"]:
+            message = f"No player activity recorded for `{server_name}` yet."
+            if not self.do_player_sync:
+                message += " Enable `doPlayerSync` to start collecting it."
+            await interaction.response.send_message(message, ephemeral=True)
+            return
+        await interaction.response.send_message(
+            embed=create_player_stats_embed(server_name, window, report, self.do_player_sync)
         )
-        max_field_length = 1024
-        players_text = "\n".join(online_players)
-        if len(players_text) > max_field_length:
-            chunks = []
-            current_chunk = ""
-            for player in online_players:
-                line = f"{player}\n"
-                if len(current_chunk) + len(line) > max_field_length:
-                    chunks.append(current_chunk)
-                    current_chunk = line
-                else:
-                    current_chunk += line
-            if current_chunk:
-                chunks.append(current_chunk)
-            for i, chunk in enumerate(chunks, start=1):
-                embed.add_field(name=f"Players (cont. {i})", value=chunk, inline=False)
-        else:
-            embed.add_field(name="Players", value=players_text, inline=False)
-        embed.set_footer(text=f"Total Online: {len(online_players)}")
-        await interaction.response.send_message(embed=embed)
 
     @players.command(name="clear", description="Remove players inactive for a certain time")
-    @app_commands.describe(server_input="Server name or ID", time_str="Duration threshold (e.g., 1w2d3h)")
-    async def clear(self, interaction: discord.Interaction, server_input: str, time_str: str):
+    @app_commands.describe(
+        server_input="Server name or ID",
+        time_str="Duration threshold (e.g., 1w2d3h)",
+        dry_run="Only count the players that would be removed"
+    )
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def clear(self, interaction: discord.Interaction, server_input: str, time_str: str, dry_run: bool = False):
         is_valid, server_id, server_name, error_message = await validate_command_context(
             interaction, self.cfg, self.control_channel, server_input
         )
@@ -112,48 +289,36 @@ class PlayerListControl(commands.Cog):
                 "❌ Invalid time format. Use formats like `1w2d3h`, `3 days`, `5h30m`.", ephemeral=True
             )
             return
+        if server_id in self._purges and not dry_run:
+            await interaction.response.send_message(
+                f"⚠️ A purge is already running for `{server_name}`.", ephemeral=True
+            )
+            return
 
+        await interaction.response.defer()
         try:
-            players = await fetch_full_player_list(self.api_manager, server_id)
+            await self._ensure_synced(interaction, server_id)
         except Exception as e:
             logger.error(f"Failed to fetch players: {e}")
-            await interaction.response.send_message("❌ Failed to fetch player list.", ephemeral=True)
+            await send_reply(interaction, "❌ Failed to fetch player list.")
             return
 
-        now = datetime.now(timezone.utc)
-        to_delete = []
-
-        for player in players:
-            last_seen_str = player.get("last_seen")
-            if not last_seen_str or player.get("status", "").lower() == "online":
-                continue
-            try:
-                last_seen = datetime.fromisoformat(last_seen_str.replace("Z", "+00:00"))
-                if now - last_seen > threshold:
-                    to_delete.append(player)
-            except Exception as e:
-                logger.warning(f"Skipping player {player.get('username')} due to time parse issue: {e}")
-
-        deleted_count = 0
-        for player in to_delete:
-            player_id = player.get("id")
-            if not player_id:
-                continue
-            url = f"{self.api_manager.base_url}/servers/{server_id}/player/{player_id}"
-            try:
-                await self.api_manager.make_request(url, method="DELETE")
-                deleted_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to delete player {player.get('username')}: {e}")
-
-        embed = Embed(
-            title=f"🧹 Cleared Inactive Players",
-            description=f"{deleted_count} players removed from `{server_name}` who were inactive for over `{time_str}`.",
-            color=Colour.red()
-        )
-        embed.set_footer(text="Inactive = offline and not seen within time window.")
-        await interaction.response.send_message(embed=embed)
+        to_delete = self.player_sync.store.inactive(server_id, time.time() - threshold.total_seconds())
+        if not to_delete:
+            await interaction.followup.send(
+                f"✅ No players on `{server_name}` have been inactive for over `{time_str}`."
+            )
+            return
+        if dry_run:
+            await interaction.followup.send(embed=create_purge_preview_embed(server_name, time_str, to_delete))
+            return
 
+        self.purge_store.create(server_id, server_name, time_str, to_delete)
+        counts = self.purge_store.counts(server_id)
+        message = await interaction.followup.send(embed=create_purge_progress_embed(server_name, counts), wait=True)
+        self.purge_store.set_message(server_id, interaction.channel.id, message.id)
+        logger.info(f"Started player purge for {server_name} ({server_id}): {counts['pending']} player(s).")
+        self._start_purge(server_id, server_name, time_str, interaction.channel, message.id)
 
 async def setup(bot):
     await bot.add_cog(PlayerListControl(bot))
\ No newline at end of file
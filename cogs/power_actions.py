@@ -3,6 +3,7 @@ import discord
 from discord import app_commands
 from helper.logger import logger
 from helper.utilities import validate_command_context
+from helper.autocomplete import server_autocomplete
 
 class ServerControl(commands.Cog):
     def __init__(self, bot):
@@ -36,21 +37,25 @@ class ServerControl(commands.Cog):
 
     @app_commands.command(name="start", description="Start a server")
     @app_commands.describe(server_input="Server name or ID")
+    @app_commands.autocomplete(server_input=server_autocomplete)
     async def start(self, interaction: discord.Interaction, server_input: str):
         await self._send_power_action(interaction, server_input, "start")
 
     @app_commands.command(name="stop", description="Stop a server")
     @app_commands.describe(server_input="Server name or ID")
+    @app_commands.autocomplete(server_input=server_autocomplete)
     async def stop(self, interaction: discord.Interaction, server_input: str):
         await self._send_power_action(interaction, server_input, "stop")
 
     @app_commands.command(name="restart", description="Restart a server")
     @app_commands.describe(server_input="Server name or ID")
+    @app_commands.autocomplete(server_input=server_autocomplete)
     async def restart(self, interaction: discord.Interaction, server_input: str):
         await self._send_power_action(interaction, server_input, "restart")
 
     @app_commands.command(name="kill", description="Kill a server")
     @app_commands.describe(server_input="Server name or ID")
+    @app_commands.autocomplete(server_input=server_autocomplete)
     async def kill(self, interaction: discord.Interaction, server_input: str):
         await self._send_power_action(interaction, server_input, "kill")
 
@@ -1,21 +1,98 @@
-from discord.ext import commands
+from discord.ext import commands, tasks
 import discord
+import time
 from discord import app_commands
-from helper.steam_handler import query_server
-from helper.utilities import validate_command_context
+from helper.logger import logger
+from helper.steam_handler import query_server, query_servers
+from helper.query_history import QueryHistory
+from helper.utilities import validate_command_context, get_visible_servers, parse_duration
+from helper.autocomplete import server_autocomplete
+
+DEFAULT_POLL_INTERVAL = 60
+MIN_POLL_INTERVAL = 15
+PRUNE_INTERVAL_SECONDS = 3600
+
+async def query_target_autocomplete(interaction: discord.Interaction, current: str):
+    return interaction.client.server_index.choices(current, extras=("all",))
+
+def format_fleet_table(results: list[dict]) -> str:
+    """
+    Render fleet query results as a fixed-width table, responding servers first (most players first).
+    """
+    def sort_key(r):
+        info = r["info"] or {}
+        return (r["status"] != "ok", -(info.get("players") or 0), r["server_name"].lower())
+
+    rows = []
+    for r in sorted(results, key=sort_key):
+        name = r["server_name"][:24]
+        if r["status"] == "ok":
+            info = r["info"]
+            players = f"{info.get('players', 0)}/{info.get('max_players', 0)}"
+            map_name = (info.get("map") or "-")[:16]
+            ping = f"{round(info.get('_ping', 0))}ms"
+        else:
+            players, map_name, ping = "-", "-", "⏱️ timeout" if r["status"] == "timeout" else "⚠️ error"
+        rows.append(f"{name:<24} {players:>7}  {map_name:<16} {ping}")
+    header = f"{'Server':<24} {'Players':>7}  {'Map':<16} Ping"
+    return "\n".join([header, "-" * len(header), *rows])
 
 class QuerySteam(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.api_manager = bot.api_manager
-        self.panel_config = bot.panel_config
+        self.cfg = bot.config
         self.control_channel = bot.control_channel
+        self.query_history = QueryHistory(self.cfg)
+        self._last_prune = 0
+        raw_loop_value = bot.config.get("bot", "doQueryPoll", False)
+        self.do_query_poll = str(raw_loop_value).lower() == "true"
+        logger.info(f"Steam Query Poller enabled: {self.do_query_poll}")
+        if self.do_query_poll:
+            try:
+                interval = float(bot.config.get("bot", "queryPollInterval", DEFAULT_POLL_INTERVAL))
+            except (TypeError, ValueError):
+                interval = DEFAULT_POLL_INTERVAL
+            self.poll_interval = max(interval, MIN_POLL_INTERVAL)
+            self.query_poll_task.change_interval(seconds=self.poll_interval)
+            self.query_poll_task.start()
+        else:
+            logger.info("Steam Query Poller is disabled in your Config. Skipping..")
+
+    def cog_unload(self):
+        if self.do_query_poll and self.query_poll_task.is_running():
+            self.query_poll_task.cancel()
+
+    @tasks.loop(seconds=DEFAULT_POLL_INTERVAL)
+    async def query_poll_task(self):
+        await self.bot.wait_until_ready()
+        try:
+            servers = [(s["id"], s.get("name", s["id"])) for s in get_visible_servers(self.cfg)]
+            # Spread probes over most of the interval so a large fleet doesn't burst UDP traffic
+            results = await query_servers(self.api_manager, servers, spread=self.poll_interval * 0.8)
+            for r in results:
+                info = r["info"] or {}
+                self.query_history.record(r["server_id"], info.get("players"), info.get("_ping"))
+            self.query_history.flush()
+            if time.time() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                self.query_history.prune()
+                self._last_prune = time.time()
+        except Exception as e:
+            logger.error(f"Unexpected error in query_poll_task loop: {e}")
 
     @app_commands.command(name="query", description="Query a server via Steam Query and show info")
-    @app_commands.describe(server_input="Server name or ID to query")
-    async def query_steam(self, interaction: discord.Interaction, server_input: str):
-        is_valid, _, server_name, error_message = await validate_command_context(
-            interaction, self.panel_config, self.control_channel, server_input
+    @app_commands.describe(
+        server_input="Server name or ID to query, or 'all' for every query-capable server",
+        game="Only query servers running this game (with 'all')"
+    )
+    @app_commands.autocomplete(server_input=query_target_autocomplete)
+    async def query_steam(self, interaction: discord.Interaction, server_input: str, game: str = None):
+        if server_input.strip().lower() == "all":
+            await self._query_all(interaction, game)
+            return
+
+        is_valid, server_id, server_name, error_message = await validate_command_context(
+            interaction, self.cfg, self.control_channel, server_input
         )
         if not is_valid:
             await interaction.response.send_message(error_message, ephemeral=True)
@@ -23,7 +100,7 @@ class QuerySteam(commands.Cog):
 
         await interaction.response.send_message(f"📡 Querying `{server_name}` via Steam...")
 
-        result = await query_server(self.api_manager, self.panel_config, server_input)
+        result = await query_server(self.api_manager, server_id, server_name)
         if not result:
             await interaction.followup.send(f"❌ Failed to query server `{server_name}` or no data available.")
             return
@@ -49,5 +126,76 @@ class QuerySteam(commands.Cog):
 
         await interaction.followup.send(embed=embed)
 
+    async def _query_all(self, interaction: discord.Interaction, game: str | None):
+        if str(interaction.channel.id) != str(self.control_channel):
+            await interaction.response.send_message(
+                "⚠️ Commands can only be used in the designated control channel.", ephemeral=True
+            )
+            return
+        await interaction.response.defer()
+
+        servers = [(s["id"], s.get("name", s["id"])) for s in get_visible_servers(self.cfg)]
+        results = await query_servers(self.api_manager, servers, game=game)
+        if not results:
+            target = f"`{game}` servers" if game else "query-capable servers"
+            await interaction.followup.send(f"ℹ️ No {target} found.")
+            return
+
+        responding = sum(1 for r in results if r["status"] == "ok")
+        total_players = sum((r["info"] or {}).get("players", 0) for r in results)
+        table = format_fleet_table(results)
+        if len(table) > 4000:
+            table = table[:3990].rsplit("\n", 1)[0] + "\n..."
+        embed = discord.Embed(
+            title=f"Fleet Query Results{f' - {game}' if game else ''}",
+            description=f"```{table}```",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"{responding}/{len(results)} servers responded • {total_players} players online")
+        logger.info(f"Fleet query: {responding}/{len(results)} servers responded")
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="querystats", description="Player count and latency history from the Steam Query poller")
+    @app_commands.describe(
+        server_input="Server name or ID",
+        window="Time window to report on (e.g. 24h, 7d) [7d]"
+    )
+    @app_commands.autocomplete(server_input=server_autocomplete)
+    async def query_stats(self, interaction: discord.Interaction, server_input: str, window: str = "7d"):
+        is_valid, server_id, server_name, error_message = await validate_command_context(
+            interaction, self.cfg, self.control_channel, server_input
+        )
+        if not is_valid:
+            await interaction.response.send_message(error_message, ephemeral=True)
+            return
+        duration = parse_duration(window)
+        if not duration:
+            await interaction.response.send_message(
+                "❌ Invalid window. Use formats like `24h`, `7d`, `1mo`.", ephemeral=True
+            )
+            return
+
+        report = self.query_history.report(server_id, duration.total_seconds())
+        if not report["samples"]:
+            note = "" if self.do_query_poll else " The Steam Query Poller is disabled in your Config."
+            await interaction.response.send_message(
+                f"ℹ️ No query history for `{server_name}` in the last {window}.{note}", ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(title=f"📈 Query History for {server_name} ({window})", color=discord.Color.blue())
+        embed.add_field(name="Samples", value=f"{report['samples']} ({report['responded_pct']:.1f}% answered)", inline=False)
+        if report["peak_players"] is not None:
+            embed.add_field(name="Peak Players", value=f"{report['peak_players']} (<t:{report['peak_at']}:f>)", inline=False)
+            hour, average = report["busiest_hour"]
+            embed.add_field(name="Busiest Hour (UTC)", value=f"{hour:02d}:00 - avg {average:.1f} players", inline=False)
+        if report["ping_p50"] is not None:
+            embed.add_field(
+                name="Ping (ms)",
+                value=f"p50 {report['ping_p50']:.0f} • p95 {report['ping_p95']:.0f} • p99 {report['ping_p99']:.0f}",
+                inline=False
+            )
+        await interaction.response.send_message(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(QuerySteam(bot))
\ No newline at end of file
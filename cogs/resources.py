@@ -1,8 +1,22 @@
 from discord.ext import commands, tasks
 import discord
+import time
 from discord import app_commands
 from helper.logger import logger
-from helper.utilities import validate_command_context
+from helper.utilities import validate_command_context, parse_duration, get_visible_servers
+from helper.alerts import AlertEngine, load_alert_rules
+from helper.resource_history import ResourceHistory
+from helper.anomaly import AnomalyDetector
+from helper.uptime import UptimeTracker
+from helper.steam_handler import refresh_query_endpoint, note_server_state
+from helper.get_game import remember_docker_image
+from helper.autocomplete import server_autocomplete
+
+# Discord caps a single embed description at 4096 characters, a message at 10 embeds
+# and the combined text of all embeds in one message at 6000 characters.
+EMBED_DESCRIPTION_LIMIT = 4096
+MESSAGE_EMBED_LIMIT = 10
+MESSAGE_TOTAL_LIMIT = 6000
 
 def create_bar(percent: float, size: int = 15) -> str:
     if percent < 0:
@@ -91,12 +105,116 @@ def extract_resource_data(limits: dict, resources: dict) -> dict:
         "uptime_seconds": uptime_seconds
     }
 
+def chunk_stat_blocks(texts: list[str], limit: int = EMBED_DESCRIPTION_LIMIT) -> list[str]:
+    """
+    Pack server stat blocks into embed descriptions no longer than `limit`.
+    A block is never split across two descriptions.
+    """
+    chunks = []
+    current = ""
+    for text in texts:
+        if len(text) > limit:
+            text = text[:limit - 3] + "..."
+        candidate = f"{current}\n{text}" if current else text
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = text
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+def build_stat_shards(blocks: list[tuple[str, str]], shard_by: str = "size") -> list[list[tuple[str, str]]]:
+    """
+    Split (tag, text) stat blocks into stats board shards.
+    With shard_by="tag", servers are grouped by their configured tag and every group gets its own embed(s);
+    otherwise blocks are chunked purely by size.
+    Returns a list of messages, each a list of (title, description) embeds that fits Discord's limits.
+    """
+    groups: dict[str, list[str]] = {}
+    for tag, text in blocks:
+        group = tag if shard_by == "tag" else ""
+        groups.setdefault(group, []).append(text)
+    if not groups:
+        return [[("Combined Resource Stats", "")]]
+
+    embeds = []
+    for group in sorted(groups, key=lambda g: (g == "", g.lower())):
+        base_title = f"Resource Stats - {group}" if group else "Combined Resource Stats"
+        if shard_by == "tag" and not group and len(groups) > 1:
+            base_title = "Resource Stats - Untagged"
+        chunks = chunk_stat_blocks(groups[group])
+        for i, chunk in enumerate(chunks, start=1):
+            title = base_title if len(chunks) == 1 else f"{base_title} ({i}/{len(chunks)})"
+            embeds.append((title, chunk))
+
+    messages = []
+    current = []
+    current_size = 0
+    for title, description in embeds:
+        size = len(title) + len(description)
+        if current and (len(current) >= MESSAGE_EMBED_LIMIT or current_size + size > MESSAGE_TOTAL_LIMIT):
+            messages.append(current)
+            current = []
+            current_size = 0
+        current.append((title, description))
+        current_size += size
+    if current:
+        messages.append(current)
+    return messages
+
+def create_alert_embed(alert: dict) -> discord.Embed:
+    rule = alert["rule"]
+    value = alert["value"]
+    value_str = f"`{value}`" if rule.metric == "state" else f"{value:.0f}%"
+    if alert["status"] == "firing":
+        embed = discord.Embed(
+            title=f"🚨 [{alert['server_name']}] Alert: {rule.describe()}",
+            description=f"Current value: {value_str}\nBreaching since <t:{int(alert['since'])}:R>",
+            color=discord.Color.red()
+        )
+    else:
+        embed = discord.Embed(
+            title=f"✅ [{alert['server_name']}] Resolved: {rule.describe()}",
+            description=f"Current value: {value_str}\nFirst breached <t:{int(alert['since'])}:R>",
+            color=discord.Color.green()
+        )
+    embed.set_footer(text=f"Rule: {rule.key} • Server ID: {alert['server_id']}")
+    return embed
+
+def create_anomaly_embed(finding: dict, server_name: str) -> discord.Embed:
+    if finding["kind"] == "memory_leak":
+        description = (
+            f"Memory at {finding['value']:.0f}% and rising {finding['rate_per_hour']:.1f}% per hour "
+            f"(trend fit r={finding['correlation']:.2f})."
+        )
+        if finding.get("hours_to_full") is not None:
+            description += f"\nProjected to reach 100% in about {finding['hours_to_full']:.1f} hour(s)."
+        title = f"📈 [{server_name}] Possible memory leak"
+    else:
+        description = (
+            f"CPU at {finding['value']:.0f}% against a baseline of {finding['baseline']:.0f}% "
+            f"(z-score {finding['z_score']:.1f})."
+        )
+        title = f"⚡ [{server_name}] CPU spike"
+    embed = discord.Embed(title=title, description=description, color=discord.Color.orange())
+    embed.set_footer(text=f"Anomaly detection • Server ID: {finding['server_id']}")
+    return embed
+
 class Resources(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.api_manager = bot.api_manager
+        self.dispatcher = bot.dispatcher
         self.control_channel = bot.control_channel
         self.cfg = bot.config
+        self._shard_signatures = {}
+        self._missing_stats_messages = set()
+        self.alert_engine = AlertEngine()
+        self.resource_history = ResourceHistory()
+        self.anomaly_detector = AnomalyDetector(self.resource_history)
+        self.uptime_tracker = UptimeTracker(self.cfg)
         raw_loop_value = bot.config.get("bot", "doResourceLoop", False)
         self.do_resource_loop = str(raw_loop_value).lower() == "true"
         logger.info(f"Resource Loop enabled: {self.do_resource_loop}")
@@ -109,13 +227,99 @@ class Resources(commands.Cog):
         if self.do_resource_loop and self.stats_task.is_running():
             self.stats_task.cancel()
 
+    def _get_stats_message_ids(self) -> list[str]:
+        """
+        Return the persisted stats board message IDs, migrating the legacy single `stats_message_id` if needed.
+        """
+        message_ids = self.cfg.get("discord", "stats_message_ids", None)
+        if isinstance(message_ids, str):
+            message_ids = [m.strip() for m in message_ids.split(",") if m.strip()]
+        if message_ids:
+            return [str(m) for m in message_ids]
+        legacy_id = self.cfg.get("discord", "stats_message_id", None)
+        if legacy_id:
+            self.cfg.set("discord", "stats_message_ids", [str(legacy_id)])
+            self.cfg.set("discord", "stats_message_id", "")
+            logger.info("Migrated stats_message_id to stats_message_ids.")
+            return [str(legacy_id)]
+        return []
+
+    def _on_stats_edit_done(self, message_id: str, future):
+        if future.cancelled() or future.exception() is None:
+            return
+        # Forget the signature so the next iteration retries, or replaces the message if it was deleted
+        self._shard_signatures.pop(message_id, None)
+        if isinstance(future.exception(), discord.NotFound):
+            logger.info(f"Stats message {message_id} missing, a replacement will be sent.")
+            self._missing_stats_messages.add(message_id)
+
+    async def _publish_stat_shards(self, channel, shards: list[list[tuple[str, str]]]):
+        """
+        Send or edit one message per shard, skipping shards whose content is unchanged since the last edit.
+        Edits are queued on the dispatcher without waiting, so a rate-limited channel only delays the board
+        (queued edits of the same message collapse into the latest one). New messages are awaited because
+        their IDs are persisted. Surplus messages from a previously larger board are deleted.
+        """
+        message_ids = self._get_stats_message_ids()
+        new_ids = []
+        for index, shard in enumerate(shards):
+            signature = tuple(shard)
+            message_id = message_ids[index] if index < len(message_ids) else None
+            if message_id in self._missing_stats_messages:
+                self._missing_stats_messages.discard(message_id)
+                message_id = None
+            if message_id and self._shard_signatures.get(message_id) == signature:
+                new_ids.append(message_id)
+                continue
+            embeds = [
+                discord.Embed(title=title, description=description or None, color=discord.Color.blue())
+                for title, description in shard
+            ]
+            if message_id:
+                self._shard_signatures[message_id] = signature
+                self.dispatcher.edit(channel, message_id, embeds=embeds).add_done_callback(
+                    lambda future, message_id=message_id: self._on_stats_edit_done(message_id, future)
+                )
+                new_ids.append(message_id)
+                continue
+            try:
+                messages = await self.dispatcher.send(channel, embeds=embeds, pack=False)
+                logger.info(f"Sent stats board message {index + 1}/{len(shards)}.")
+            except Exception as e:
+                logger.error(f"Error sending stats message {index + 1}/{len(shards)}: {e}")
+                continue
+            msg = messages[0]
+            new_ids.append(str(msg.id))
+            self._shard_signatures[str(msg.id)] = signature
+
+        for stale_id in message_ids[len(shards):]:
+            self._shard_signatures.pop(stale_id, None)
+            self._missing_stats_messages.discard(stale_id)
+            self.dispatcher.delete(channel, stale_id)
+            logger.info(f"Deleting surplus stats message {stale_id}.")
+
+        if new_ids != message_ids:
+            self.cfg.set("discord", "stats_message_ids", new_ids)
+
+    async def _send_alerts(self, embeds: list[discord.Embed]):
+        """
+        Queue alert and anomaly notifications for the configured alert channel (falls back to the control channel).
+        """
+        channel_id = self.cfg.get("discord", "alert_channel", None) or self.control_channel
+        channel = self.bot.get_channel(int(channel_id)) if channel_id else None
+        if channel is None:
+            logger.error(f"Alert channel ID {channel_id} not found or bot missing access.")
+            return
+        for embed in embeds:
+            logger.info(f"Sending notification: {embed.title}")
+        self.dispatcher.send(channel, embeds=embeds)
+
     @tasks.loop(seconds=15.0)
     async def stats_task(self):
         await self.bot.wait_until_ready()
         try:
             stats_channel = self.cfg.get_section("discord")
             stats_channel_id = stats_channel.get("stats_channel")
-            stats_message_id = stats_channel.get("stats_message_id")
             if not stats_channel_id:
                 logger.warning("Stats channel ID not set in config. Skipping stats loop.")
                 return
@@ -131,8 +335,10 @@ class Resources(commands.Cog):
             if not servers:
                 logger.info("No servers found in panel config for stats loop.")
                 return
-            embed = discord.Embed(title="Combined Resource Stats", color=discord.Color.blue())
-            combined_text = []
+            self.alert_engine.set_rules(load_alert_rules(self.cfg))
+            alerts = []
+            samples = {}
+            blocks = []
             for key, info in servers.items():
                 if info.get("hide", False):
                     continue
@@ -140,66 +346,76 @@ class Resources(commands.Cog):
                 server_name = info.get("name")
                 if not server_id:
                     continue
+                tag = str(info.get("tag") or "").strip()
                 try:
                     server_details_url = f"{self.api_manager.base_url}/servers/{server_id}"
                     limits_response = await self.api_manager.make_request(server_details_url)
                     limits_data = limits_response.get("attributes", {}).get("limits", {})
+                    remember_docker_image(self.cfg, server_id, limits_response.get("attributes", {}).get("docker_image"))
+                    refresh_query_endpoint(server_id, limits_response.get("attributes", {}))
 
                     resources_url = f"{self.api_manager.base_url}/servers/{server_id}/resources"
                     stats_response = await self.api_manager.make_request(resources_url)
                     stats_attributes = stats_response.get("attributes", {})
                     server_state = stats_attributes.get("current_state")
                     resource_data = stats_attributes.get("resources", {})
+                    self.uptime_tracker.observe(server_id, server_state)
+                    note_server_state(server_id, server_state)
                     if server_state != "running":
-                        combined_text.append(
+                        alerts.extend(self.alert_engine.evaluate(
+                            server_id, server_name, {"state": server_state or "offline"}
+                        ))
+                        blocks.append((tag, (
                             f"~ {server_name} ~\n"
                             "--\n"
                             ":x: **Offline**\n"
                             "--\n"
                             ""
-                        )
+                        )))
                         continue
                     stats = extract_resource_data(limits_data, resource_data)
+                    samples[server_id] = {
+                        "mem_pct": stats["mem_pct"],
+                        "cpu_pct": stats["cpu_pct"],
+                        "disk_pct": stats["disk_pct"],
+                    }
+                    alerts.extend(self.alert_engine.evaluate(
+                        server_id, server_name, {"state": server_state, **samples[server_id]}
+                    ))
                     uptime_str = format_uptime(stats["uptime_seconds"])
-                    combined_text.append(
-                        format_server_stats(
-                            server_name,
-                            stats["mem_used_gb"], stats["mem_pct"],
-                            stats["cpu_used_pct"], stats["cpu_pct"],
-                            stats["disk_used_gb"], stats["disk_pct"],
-                            uptime_str
-                        )
-                    )
+                    blocks.append((tag, format_server_stats(
+                        server_name,
+                        stats["mem_used_gb"], stats["mem_pct"],
+                        stats["cpu_used_pct"], stats["cpu_pct"],
+                        stats["disk_used_gb"], stats["disk_pct"],
+                        uptime_str
+                    )))
                 except Exception as e:
                     logger.error(f"Failed to fetch stats for server {server_name} ({server_id}): {e}")
-                    combined_text.append(
+                    blocks.append((tag, (
                         f"~ {server_name} ~\n"
                         "--\n"
                         "⚠️ Error fetching stats\n"
                         "--\n"
                         ""
-                    )
-            if combined_text:
-                embed.description = "\n".join(combined_text)
-            try:
-                if stats_message_id:
-                    msg = await channel.fetch_message(int(stats_message_id))
-                    await msg.edit(embed=embed)
-                else:
-                    msg = await channel.send(embed=embed)
-                    self.bot.config.set("discord", "stats_message_id", str(msg.id))
-                    logger.info("Sent initial combined stats message and saved message ID.")
-            except discord.NotFound:
-                msg = await channel.send(embed=embed)
-                self.bot.config.set("discord", "stats_message_id", str(msg.id))
-                logger.info("Stats message missing, sent new combined message and updated config.")
-            except Exception as e:
-                logger.error(f"Error editing combined stats message: {e}")
+                    )))
+            shard_by = str(self.cfg.get("bot", "statsShardBy", "size") or "size").lower()
+            shards = build_stat_shards(blocks, shard_by)
+            await self._publish_stat_shards(channel, shards)
+            self.uptime_tracker.flush()
+            self.resource_history.record(time.time(), samples)
+            findings = self.anomaly_detector.run()
+            if alerts or findings:
+                names = {info.get("id"): info.get("name") for info in servers.values()}
+                embeds = [create_alert_embed(alert) for alert in alerts]
+                embeds += [create_anomaly_embed(f, names.get(f["server_id"], f["server_id"])) for f in findings]
+                await self._send_alerts(embeds)
         except Exception as e:
             logger.error(f"Unexpected error in stats_task loop: {e}")
 
     @app_commands.command(name="stats", description="Get resource stats for a server")
     @app_commands.describe(server="Server name or ID to query stats")
+    @app_commands.autocomplete(server=server_autocomplete)
     async def stats(self, interaction: discord.Interaction, server: str):
         is_valid, server_id, server_name, error_message = await validate_command_context(
             interaction, self.cfg, self.control_channel, server
@@ -250,5 +466,57 @@ class Resources(commands.Cog):
         except Exception as e:
             logger.error(f"Error fetching stats for {server_id}: {e}")
 
+
+    @app_commands.command(name="uptime", description="Show uptime and availability for servers")
+    @app_commands.describe(
+        server="Optional server name or ID (all visible servers if omitted)",
+        window="Time window to report on (e.g. 24h, 7d, 1mo) [7d]"
+    )
+    @app_commands.autocomplete(server=server_autocomplete)
+    async def uptime(self, interaction: discord.Interaction, server: str = None, window: str = "7d"):
+        if server:
+            is_valid, server_id, server_name, error_message = await validate_command_context(
+                interaction, self.cfg, self.control_channel, server
+            )
+            if not is_valid:
+                await interaction.response.send_message(error_message, ephemeral=True)
+                return
+            targets = [(server_id, server_name)]
+        else:
+            if str(interaction.channel.id) != str(self.control_channel):
+                await interaction.response.send_message(
+                    "⚠️ Commands can only be used in the designated control channel.", ephemeral=True
+                )
+                return
+            targets = [(info.get("id"), info.get("name")) for info in get_visible_servers(self.cfg)]
+
+        duration = parse_duration(window)
+        if not duration:
+            await interaction.response.send_message(
+                "❌ Invalid window. Use formats like `24h`, `7d`, `1mo`.", ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(title=f"⏱️ Availability over the last {window}", color=discord.Color.blue())
+        for server_id, server_name in targets[:25]:
+            report = self.uptime_tracker.report(server_id, duration.total_seconds())
+            if report["uptime_pct"] is None:
+                value = "No state history recorded yet."
+            else:
+                mtbf = format_uptime(report["mtbf"]) if report["mtbf"] is not None else "no crashes"
+                longest = format_uptime(report["longest_outage"]) if report["longest_outage"] else "none"
+                value = (
+                    f"Uptime: **{report['uptime_pct']:.2f}%**\n"
+                    f"MTBF: {mtbf}\n"
+                    f"Crashes: {report['crashes']} • Restarts: {report['restarts']}\n"
+                    f"Longest outage: {longest}"
+                )
+            embed.add_field(name=f"{server_name} ({server_id})", value=value, inline=False)
+        if len(targets) > 25:
+            embed.set_footer(text=f"Showing 25 of {len(targets)} servers. Specify a server for more.")
+        elif not self.do_resource_loop:
+            embed.set_footer(text="Resource Loop is disabled, so no new state history is being recorded.")
+        await interaction.response.send_message(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(Resources(bot))
\ No newline at end of file
@@ -0,0 +1,296 @@
+import asyncio
+import bz2
+import socket
+import struct
+import time
+import zlib
+from helper.logger import logger
+
+# Steam A2S query protocol, see https://developer.valvesoftware.com/wiki/Server_queries
+SIMPLE_HEADER = -1
+SPLIT_HEADER = -2
+A2S_INFO_REQUEST = b"\xFF\xFF\xFF\xFFTSource Engine Query\x00"
+A2S_PLAYER_REQUEST = b"\xFF\xFF\xFF\xFFU"
+A2S_RULES_REQUEST = b"\xFF\xFF\xFF\xFFV"
+CHALLENGE_RESPONSE = 0x41
+INFO_RESPONSE = 0x49
+GOLDSOURCE_INFO_RESPONSE = 0x6D
+PLAYER_RESPONSE = 0x44
+RULES_RESPONSE = 0x45
+NO_CHALLENGE = b"\xFF\xFF\xFF\xFF"
+MAX_CHALLENGE_ROUNDS = 3
+DEFAULT_TIMEOUT = 2.0
+
+class A2SError(Exception):
+    pass
+
+class _Reader:
+    """
+    Minimal cursor over an A2S response payload.
+    """
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = data
+        self.offset = offset
+
+    def remaining(self) -> int:
+        return len(self.data) - self.offset
+
+    def unpack(self, fmt: str):
+        size = struct.calcsize(fmt)
+        if self.remaining() < size:
+            raise A2SError("Truncated A2S response")
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += size
+        return values[0] if len(values) == 1 else values
+
+    def byte(self) -> int:
+        return self.unpack("<B")
+
+    def cstring(self) -> str:
+        end = self.data.find(b"\x00", self.offset)
+        if end == -1:
+            raise A2SError("Unterminated string in A2S response")
+        value = self.data[self.offset:end].decode("utf-8", errors="replace")
+        self.offset = end + 1
+        return value
+
+def parse_info(payload: bytes) -> dict:
+    reader = _Reader(payload, 1)
+    if payload[0] == GOLDSOURCE_INFO_RESPONSE:
+        info = {
+            "address": reader.cstring(),
+            "name": reader.cstring(),
+            "map": reader.cstring(),
+            "folder": reader.cstring(),
+            "game": reader.cstring(),
+            "players": reader.byte(),
+            "max_players": reader.byte(),
+            "protocol": reader.byte(),
+            "server_type": chr(reader.byte()),
+            "environment": chr(reader.byte()),
+            "visibility": reader.byte(),
+        }
+        return info
+    info = {
+        "protocol": reader.byte(),
+        "name": reader.cstring(),
+        "map": reader.cstring(),
+        "folder": reader.cstring(),
+        "game": reader.cstring(),
+        "app_id": reader.unpack("<H"),
+        "players": reader.byte(),
+        "max_players": reader.byte(),
+        "bots": reader.byte(),
+        "server_type": chr(reader.byte()),
+        "environment": chr(reader.byte()),
+        "visibility": reader.byte(),
+        "vac": reader.byte(),
+    }
+    if info["app_id"] == 2400:  # The Ship
+        info["mode"], info["witnesses"], info["duration"] = reader.unpack("<BBB")
+    info["version"] = reader.cstring()
+    if reader.remaining():
+        edf = reader.byte()
+        if edf & 0x80:
+            info["port"] = reader.unpack("<H")
+        if edf & 0x10:
+            info["steam_id"] = reader.unpack("<Q")
+        if edf & 0x40:
+            info["spectator_port"] = reader.unpack("<H")
+            info["spectator_name"] = reader.cstring()
+        if edf & 0x20:
+            info["keywords"] = reader.cstring()
+        if edf & 0x01:
+            info["game_id"] = reader.unpack("<Q")
+    return info
+
+def parse_players(payload: bytes) -> list[dict]:
+    reader = _Reader(payload, 1)
+    count = reader.byte()
+    players = []
+    for _ in range(count):
+        if not reader.remaining():
+            break  # Some servers report more players than they send
+        players.append({
+            "index": reader.byte(),
+            "name": reader.cstring(),
+            "score": reader.unpack("<l"),
+            "duration": reader.unpack("<f"),
+        })
+    return players
+
+def parse_rules(payload: bytes) -> dict:
+    reader = _Reader(payload, 1)
+    count = reader.unpack("<H")
+    rules = {}
+    for _ in range(count):
+        if not reader.remaining():
+            break
+        name = reader.cstring()
+        rules[name] = reader.cstring()
+    return rules
+
+class _PendingRequest:
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.fragments = {}
+        self.compression = None
+
+class _A2SProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client: "A2SClient"):
+        self.client = client
+
+    def datagram_received(self, data: bytes, addr):
+        self.client._on_datagram(data, addr[:2])
+
+    def error_received(self, exc: Exception):
+        logger.debug(f"A2S socket error: {exc}")
+
+    def connection_lost(self, exc: Exception | None):
+        self.client._on_connection_lost(exc)
+
+class A2SClient:
+    """
+    Asyncio A2S client. All queries share one UDP socket; responses are demultiplexed by source address,
+    so any number of servers can be queried concurrently (one in-flight request per server address,
+    since A2S responses carry no request ID).
+    """
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._transport = None
+        self._pending = {}
+        self._locks = {}
+        self._open_lock = None
+
+    async def _get_transport(self):
+        if self._transport is None or self._transport.is_closing():
+            if self._open_lock is None:
+                self._open_lock = asyncio.Lock()
+            async with self._open_lock:
+                if self._transport is None or self._transport.is_closing():
+                    loop = asyncio.get_running_loop()
+                    self._transport, _ = await loop.create_datagram_endpoint(
+                        lambda: _A2SProtocol(self), local_addr=("0.0.0.0", 0), family=socket.AF_INET
+                    )
+        return self._transport
+
+    async def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def _on_connection_lost(self, exc: Exception | None):
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(A2SError(f"A2S socket closed: {exc}"))
+        self._pending.clear()
+        self._transport = None
+
+    def _on_datagram(self, data: bytes, addr):
+        pending = self._pending.get(addr)
+        if pending is None or pending.future.done() or len(data) < 5:
+            return
+        try:
+            header = struct.unpack_from("<l", data)[0]
+            if header == SIMPLE_HEADER:
+                pending.future.set_result(data[4:])
+            elif header == SPLIT_HEADER:
+                self._on_fragment(pending, data)
+        except Exception as e:
+            pending.future.set_exception(A2SError(f"Malformed A2S packet: {e}"))
+
+    @staticmethod
+    def _on_fragment(pending: _PendingRequest, data: bytes):
+        reader = _Reader(data, 4)
+        packet_id = reader.unpack("<l")
+        total = reader.byte()
+        number = reader.byte()
+        reader.unpack("<H")  # Max packet size
+        compressed = bool(packet_id & 0x80000000)
+        if compressed and number == 0:
+            pending.compression = (reader.unpack("<L"), reader.unpack("<L"))
+        pending.fragments[number] = data[reader.offset:]
+        if len(pending.fragments) < total:
+            return
+        payload = b"".join(pending.fragments[i] for i in range(total))
+        if pending.compression:
+            size, crc = pending.compression
+            payload = bz2.decompress(payload)
+            if len(payload) != size or zlib.crc32(payload) != crc:
+                raise A2SError("Decompressed A2S payload failed size/CRC check")
+        if struct.unpack_from("<l", payload)[0] != SIMPLE_HEADER:
+            raise A2SError("Reassembled A2S payload has an invalid header")
+        pending.future.set_result(payload[4:])
+
+    async def _resolve(self, address: tuple[str, int]) -> tuple[str, int]:
+        host, port = address
+        try:
+            socket.inet_aton(host)
+            return host, int(port)
+        except OSError:
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+            return infos[0][4][0], int(port)
+
+    async def _exchange(self, addr, packet: bytes, timeout: float) -> bytes:
+        transport = await self._get_transport()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[addr] = _PendingRequest(future)
+        try:
+            transport.sendto(packet, addr)
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(addr, None)
+
+    async def _request(self, address, request: bytes, expected: tuple[int, ...], timeout: float | None,
+                       challenge_suffix: bool) -> tuple[bytes, float]:
+        addr = await self._resolve(address)
+        timeout = self.timeout if timeout is None else timeout
+        lock = self._locks.setdefault(addr, asyncio.Lock())
+        async with lock:
+            deadline = time.monotonic() + timeout
+            packet = request + NO_CHALLENGE if challenge_suffix else request
+            for _ in range(MAX_CHALLENGE_ROUNDS):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sent_at = time.monotonic()
+                try:
+                    payload = await self._exchange(addr, packet, remaining)
+                except asyncio.TimeoutError:
+                    break
+                ping = (time.monotonic() - sent_at) * 1000
+                if not payload:
+                    raise A2SError("Empty A2S response")
+                if payload[0] == CHALLENGE_RESPONSE:
+                    packet = request + payload[1:5]
+                    continue
+                if payload[0] not in expected:
+                    raise A2SError(f"Unexpected A2S response type 0x{payload[0]:02X}")
+                return payload, ping
+            raise TimeoutError(f"A2S query to {addr[0]}:{addr[1]} timed out after {timeout:.1f}s")
+
+    async def info(self, address: tuple[str, int], timeout: float | None = None) -> dict:
+        """
+        A2S_INFO query. Returns a dict with name, map, game, players, max_players, ... and `_ping` in ms.
+        """
+        payload, ping = await self._request(
+            address, A2S_INFO_REQUEST, (INFO_RESPONSE, GOLDSOURCE_INFO_RESPONSE), timeout, challenge_suffix=False
+        )
+        info = parse_info(payload)
+        info["_ping"] = ping
+        return info
+
+    async def players(self, address: tuple[str, int], timeout: float | None = None) -> list[dict]:
+        """
+        A2S_PLAYER query. Returns a list of {index, name, score, duration}.
+        """
+        payload, _ = await self._request(address, A2S_PLAYER_REQUEST, (PLAYER_RESPONSE,), timeout, challenge_suffix=True)
+        return parse_players(payload)
+
+    async def rules(self, address: tuple[str, int], timeout: float | None = None) -> dict:
+        """
+        A2S_RULES query. Returns a {name: value} dict of server rules.
+        """
+        payload, _ = await self._request(address, A2S_RULES_REQUEST, (RULES_RESPONSE,), timeout, challenge_suffix=True)
+        return parse_rules(payload)
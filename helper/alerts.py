@@ -0,0 +1,183 @@
+import time
+from helper.logger import logger
+from helper.utilities import parse_duration
+
+# Alert rules live in the config DB as `alert_<n>` sections, e.g.
+# [alert_1]
+# metric = "mem_pct"       # One of mem_pct, cpu_pct, disk_pct or state
+# threshold = 90           # Breach level (for 'state': the expected state, e.g. "running")
+# clear = 85               # Optional hysteresis level the metric must fall back past to resolve
+# direction = "above"      # Optional, "above" (default) or "below"
+# duration = "5m"          # How long the breach must last before alerting (seconds or e.g. "5m")
+# cooldown = "30m"         # Minimum time between two alerts for the same rule and server
+# server = ""              # Optional server ID, empty applies the rule to every server
+METRICS = ("mem_pct", "cpu_pct", "disk_pct", "state")
+DEFAULT_HYSTERESIS = 5.0
+DEFAULT_COOLDOWN_SECONDS = 1800
+DEFAULT_ALERT_RULES = [
+    {"metric": "mem_pct", "threshold": 90, "clear": 85, "duration": "5m", "cooldown": "30m"},
+    {"metric": "disk_pct", "threshold": 90, "clear": 85, "duration": "5m", "cooldown": "30m"},
+    {"metric": "state", "threshold": "running", "duration": "2m", "cooldown": "30m"},
+]
+
+def _to_seconds(value, default: float) -> float:
+    """
+    Convert a config value to seconds. Accepts plain numbers or duration strings like '5m' / '1h30m'.
+    """
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parsed = parse_duration(str(value))
+    return parsed.total_seconds() if parsed else default
+
+class AlertRule:
+    """
+    A single threshold rule evaluated against resource samples from the stats loop.
+    """
+    def __init__(self, key: str, metric: str, threshold, clear=None, direction: str = "above",
+                 duration: float = 0, cooldown: float = DEFAULT_COOLDOWN_SECONDS, server_id: str = ""):
+        self.key = key
+        self.metric = metric
+        self.direction = "below" if str(direction).lower() == "below" else "above"
+        self.duration = duration
+        self.cooldown = cooldown
+        self.server_id = server_id
+        if metric == "state":
+            self.threshold = str(threshold or "running").lower()
+            self.clear = self.threshold
+        else:
+            self.threshold = float(threshold)
+            if clear is None or clear == "":
+                offset = -DEFAULT_HYSTERESIS if self.direction == "above" else DEFAULT_HYSTERESIS
+                self.clear = self.threshold + offset
+            else:
+                self.clear = float(clear)
+
+    def is_breached(self, value) -> bool:
+        if self.metric == "state":
+            return str(value).lower() != self.threshold
+        if self.direction == "above":
+            return value >= self.threshold
+        return value <= self.threshold
+
+    def is_cleared(self, value) -> bool:
+        if self.metric == "state":
+            return str(value).lower() == self.clear
+        if self.direction == "above":
+            return value < self.clear
+        return value > self.clear
+
+    def describe(self) -> str:
+        if self.metric == "state":
+            return f"state is not `{self.threshold}`"
+        comparison = ">=" if self.direction == "above" else "<="
+        return f"{self.metric} {comparison} {self.threshold:g}%"
+
+def load_alert_rules(config) -> list[AlertRule]:
+    """
+    Read every `alert_<n>` section from the config DB into AlertRule objects, skipping invalid ones.
+    """
+    rules = []
+    for section in sorted(config.all_sections()):
+        if not section.startswith("alert_"):
+            continue
+        data = config.get_section(section)
+        metric = str(data.get("metric", "")).strip().lower()
+        if metric not in METRICS:
+            logger.warning(f"Alert rule {section} has unknown metric '{metric}', skipping.")
+            continue
+        try:
+            rules.append(AlertRule(
+                key=section,
+                metric=metric,
+                threshold=data.get("threshold"),
+                clear=data.get("clear"),
+                direction=data.get("direction", "above"),
+                duration=_to_seconds(data.get("duration"), 0),
+                cooldown=_to_seconds(data.get("cooldown"), DEFAULT_COOLDOWN_SECONDS),
+                server_id=str(data.get("server") or "").strip(),
+            ))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Alert rule {section} is invalid, skipping: {e}")
+    return rules
+
+class AlertEngine:
+    """
+    Incremental rule evaluator. Each (rule, server) pair keeps a tiny state machine, so feeding a
+    sample costs O(rules that apply to the server) with no history scans.
+    """
+    def __init__(self, rules: list[AlertRule] | None = None):
+        self._global_rules = []
+        self._server_rules = {}
+        self._states = {}
+        self.set_rules(rules or [])
+
+    def set_rules(self, rules: list[AlertRule]):
+        """
+        Replace the active rule set, keeping state for rules that still exist.
+        """
+        self._global_rules = [r for r in rules if not r.server_id]
+        self._server_rules = {}
+        for rule in rules:
+            if rule.server_id:
+                self._server_rules.setdefault(rule.server_id.lower(), []).append(rule)
+        keys = {r.key for r in rules}
+        self._states = {k: v for k, v in self._states.items() if k[0] in keys}
+
+    def evaluate(self, server_id: str, server_name: str, sample: dict, now: float | None = None) -> list[dict]:
+        """
+        Feed one sample ({"state": ..., "mem_pct": ..., ...}) for a server.
+        Returns a list of notifications: {"status": "firing"|"resolved", "rule", "server_id", "server_name", "value", "since"}.
+        """
+        now = time.time() if now is None else now
+        notifications = []
+        rules = self._global_rules + self._server_rules.get(server_id.lower(), [])
+        for rule in rules:
+            value = sample.get(rule.metric)
+            if value is None:
+                continue
+            state = self._states.setdefault((rule.key, server_id), {
+                "breach_since": None,
+                "active": False,
+                "last_notified": None,
+            })
+            status = self._step(rule, state, value, now)
+            if status:
+                notifications.append({
+                    "status": status,
+                    "rule": rule,
+                    "server_id": server_id,
+                    "server_name": server_name,
+                    "value": value,
+                    "since": state["breach_since"] or now,
+                })
+                if status == "resolved":
+                    state["breach_since"] = None
+        return notifications
+
+    @staticmethod
+    def _step(rule: AlertRule, state: dict, value, now: float) -> str | None:
+        if state["active"]:
+            if rule.is_cleared(value):
+                state["active"] = False
+                return "resolved"
+            return None
+
+        if rule.is_breached(value):
+            if state["breach_since"] is None:
+                state["breach_since"] = now
+            if now - state["breach_since"] < rule.duration:
+                return None
+            last = state["last_notified"]
+            if last is not None and now - last < rule.cooldown:
+                return None
+            state["active"] = True
+            state["last_notified"] = now
+            return "firing"
+
+        if rule.is_cleared(value):
+            state["breach_since"] = None
+        return None
@@ -0,0 +1,120 @@
+import time
+import numpy as np
+from helper.resource_history import ResourceHistory
+
+# Memory leak detection: a sustained upward trend in mem_pct over the leak window
+LEAK_WINDOW_SAMPLES = 480           # 2 hours at 15 second resolution
+LEAK_MIN_COVERAGE = 0.5             # Fraction of the window that must hold samples
+LEAK_MIN_SLOPE_PER_HOUR = 2.0       # Percentage points of memory gained per hour
+LEAK_MIN_CORRELATION = 0.8          # How linear (monotonic) the growth must be
+
+# CPU spike detection: latest sample compared to an EWMA baseline of the preceding samples
+SPIKE_BASELINE_SAMPLES = 240        # 1 hour at 15 second resolution
+SPIKE_EWMA_ALPHA = 0.05
+SPIKE_Z_THRESHOLD = 4.0
+SPIKE_MIN_PCT = 50.0                # Ignore "spikes" that stay below this CPU usage
+SPIKE_MIN_STD = 2.0                 # Floor for the baseline deviation so idle servers don't flag on noise
+
+FINDING_COOLDOWN_SECONDS = 3600
+
+def ewma_stats(matrix: np.ndarray, alpha: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exponentially weighted mean and standard deviation of each row's samples, newest weighted highest.
+    NaN samples are ignored. Computed in closed form over the whole servers × time matrix.
+    """
+    length = matrix.shape[1]
+    weights = (1.0 - alpha) ** np.arange(length - 1, -1, -1, dtype=np.float64)
+    mask = ~np.isnan(matrix)
+    values = np.where(mask, matrix, 0.0)
+    w = mask * weights
+    total = w.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (w * values).sum(axis=1) / total
+        var = (w * (values - mean[:, None]) ** 2).sum(axis=1) / total
+    return mean, np.sqrt(var)
+
+def trend_stats(matrix: np.ndarray, timestamps: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-row least squares slope (units per second), Pearson correlation against time,
+    and sample coverage, ignoring NaN samples.
+    """
+    mask = ~np.isnan(matrix) & ~np.isnan(timestamps)[None, :]
+    count = mask.sum(axis=1)
+    t0 = np.nanmin(timestamps) if mask.any() else 0.0
+    t = np.nan_to_num(timestamps - t0)
+    x = np.where(mask, matrix, 0.0).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_mean = (mask * t).sum(axis=1) / count
+        x_mean = x.sum(axis=1) / count
+        dt = np.where(mask, t[None, :] - t_mean[:, None], 0.0)
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        cov = (dt * dx).sum(axis=1)
+        var_t = (dt * dt).sum(axis=1)
+        var_x = (dx * dx).sum(axis=1)
+        slope = cov / var_t
+        corr = cov / np.sqrt(var_t * var_x)
+    coverage = count / max(matrix.shape[1], 1)
+    return slope, corr, coverage
+
+def detect_memory_leaks(history: ResourceHistory) -> list[dict]:
+    server_ids, matrix, timestamps = history.window("mem_pct", LEAK_WINDOW_SAMPLES)
+    if matrix.shape[1] < LEAK_WINDOW_SAMPLES // 4:
+        return []
+    slope, corr, coverage = trend_stats(matrix, timestamps)
+    per_hour = slope * 3600
+    flagged = (coverage >= LEAK_MIN_COVERAGE) & (per_hour >= LEAK_MIN_SLOPE_PER_HOUR) & (corr >= LEAK_MIN_CORRELATION)
+    findings = []
+    for row in np.flatnonzero(flagged):
+        latest = matrix[row][~np.isnan(matrix[row])][-1]
+        hours_left = (100.0 - latest) / per_hour[row] if per_hour[row] > 0 else None
+        findings.append({
+            "kind": "memory_leak",
+            "server_id": server_ids[row],
+            "value": float(latest),
+            "rate_per_hour": float(per_hour[row]),
+            "correlation": float(corr[row]),
+            "hours_to_full": float(hours_left) if hours_left is not None else None,
+        })
+    return findings
+
+def detect_cpu_spikes(history: ResourceHistory) -> list[dict]:
+    server_ids, matrix, _ = history.window("cpu_pct", SPIKE_BASELINE_SAMPLES + 1)
+    if matrix.shape[1] < 20:
+        return []
+    baseline, latest = matrix[:, :-1], matrix[:, -1]
+    mean, std = ewma_stats(baseline, SPIKE_EWMA_ALPHA)
+    with np.errstate(invalid="ignore"):
+        z = (latest - mean) / np.maximum(std, SPIKE_MIN_STD)
+        flagged = (z >= SPIKE_Z_THRESHOLD) & (latest >= SPIKE_MIN_PCT)
+    return [
+        {
+            "kind": "cpu_spike",
+            "server_id": server_ids[row],
+            "value": float(latest[row]),
+            "baseline": float(mean[row]),
+            "z_score": float(z[row]),
+        }
+        for row in np.flatnonzero(flagged)
+    ]
+
+class AnomalyDetector:
+    """
+    Runs the vectorized detectors over a ResourceHistory and suppresses repeat findings
+    for the same (kind, server) within FINDING_COOLDOWN_SECONDS.
+    """
+    def __init__(self, history: ResourceHistory, cooldown: float = FINDING_COOLDOWN_SECONDS):
+        self.history = history
+        self.cooldown = cooldown
+        self._last_reported = {}
+
+    def run(self, now: float | None = None) -> list[dict]:
+        now = time.time() if now is None else now
+        findings = []
+        for finding in detect_memory_leaks(self.history) + detect_cpu_spikes(self.history):
+            key = (finding["kind"], finding["server_id"])
+            last = self._last_reported.get(key)
+            if last is not None and now - last < self.cooldown:
+                continue
+            self._last_reported[key] = now
+            findings.append(finding)
+        return findings
@@ -1,8 +1,45 @@
 import aiohttp
+import asyncio
 import time
 from .logger import logger
 from .config_db import SQLiteConfig
 
+DEFAULT_REQUESTS_PER_MINUTE = 240
+BURST_SECONDS = 5
+
+class APIError(Exception):
+    """
+    A panel or file server response with an error status. `status` is the HTTP status code.
+    """
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+class RateLimiter:
+    """
+    Token bucket shared by every panel request: `per_minute` requests on average, with bursts of up to
+    BURST_SECONDS worth of tokens. Waiters are served in arrival order. A rate of 0 disables limiting.
+    """
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate * BURST_SECONDS, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1
+                self.updated = time.monotonic()
+            self.tokens -= 1
+
 class APIManager:
     """
     Async helper class for interacting with the BisectHosting API.
@@ -14,9 +51,22 @@ class APIManager:
         self.cfg = config
         self._session = None
         self._rate_limited_until = 0
+        try:
+            per_minute = float(config.get("bot", "apiRequestsPerMinute", DEFAULT_REQUESTS_PER_MINUTE))
+        except (TypeError, ValueError):
+            per_minute = DEFAULT_REQUESTS_PER_MINUTE
+        self.rate_limiter = RateLimiter(per_minute)
+
+    @property
+    def rate_limited_for(self) -> float:
+        """
+        Seconds left on a block set after a 429/504 response, 0 when requests are allowed.
+        """
+        return max(self._rate_limited_until - time.monotonic(), 0)
 
     async def download_file(self, url: str) -> bytes:
         session = await self._get_session()
+        await self.rate_limiter.acquire()
         now = time.monotonic()
         if now < self._rate_limited_until:
             wait_time = self._rate_limited_until - now
@@ -28,11 +78,11 @@ class APIManager:
                 if response.status == 429:
                     self._rate_limited_until = time.monotonic() + 60
                     logger.error("Rate limit hit (429). Blocking API calls for 60 seconds.")
-                    raise Exception("API rate limit exceeded (429). Pausing requests for 60 seconds.")
+                    raise APIError("API rate limit exceeded (429). Pausing requests for 60 seconds.", 429)
 
                 if response.status != 200:
                     text = await response.text()
-                    raise Exception(f"File download failed: {response.status} - {text}")
+                    raise APIError(f"File download failed: {response.status} - {text}", response.status)
 
                 logger.debug(f"File downloaded successfully from {url}")
                 return await response.read()
@@ -41,6 +91,38 @@ class APIManager:
             logger.error(f"File download error: {e}")
             raise
 
+    def _check_rate_limit(self):
+        now = time.monotonic()
+        if now < self._rate_limited_until:
+            wait_time = self._rate_limited_until - now
+            logger.warning(f"API requests are rate limited. Blocking calls for {wait_time:.1f} more seconds.")
+            raise Exception(f"API rate limited. Please wait {wait_time:.1f} seconds before retrying.")
+
+    async def stream_file(self, url: str, range_header: str | None = None, chunk_size: int = 65536):
+        """
+        Stream a (signed) file URL, optionally with an HTTP Range header.
+        Async generator: first yields (status, headers), then the body in chunks.
+        Status is 206 when the range was honoured, 200 when the server sent the whole file
+        and 416 when the range starts past the end of the file.
+        """
+        session = await self._get_session()
+        self._check_rate_limit()
+        await self.rate_limiter.acquire()
+        headers = {"Range": range_header} if range_header else None
+        async with session.get(url, headers=headers) as response:
+            if response.status == 429:
+                self._rate_limited_until = time.monotonic() + 60
+                logger.error("Rate limit hit (429). Blocking API calls for 60 seconds.")
+                raise APIError("API rate limit exceeded (429). Pausing requests for 60 seconds.", 429)
+            if response.status not in (200, 206, 416):
+                text = await response.text()
+                raise APIError(f"File download failed: {response.status} - {text}", response.status)
+            yield response.status, response.headers
+            if response.status == 416:
+                return
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
     async def _get_session(self):
         if self._session is None:
             self._session = aiohttp.ClientSession(headers={
@@ -61,14 +143,14 @@ class APIManager:
         if status == 429:
             self._rate_limited_until = time.monotonic() + 60
             logger.error("Rate limit hit (429). Blocking API calls for 60 seconds.")
-            raise Exception("API rate limit exceeded (429). Pausing requests for 60 seconds.")
+            raise APIError("API rate limit exceeded (429). Pausing requests for 60 seconds.", status)
         if status == 504:
             self._rate_limited_until = time.monotonic() + 600
             logger.error("CloudFlare Timeout (504). Blocking API calls for 10 minutes.")
-            raise Exception("API gateway timeout (504). Pausing requests for 10 minutes.")
+            raise APIError("API gateway timeout (504). Pausing requests for 10 minutes.", status)
 
         if status not in (200, 204, 201):
-            raise Exception(f"API request failed: {status} - {text}")
+            raise APIError(f"API request failed: {status} - {text}", status)
         if status == 204 or response.content_length == 0:
             return {"message": "Request completed successfully."}
         return await response.json()
@@ -80,6 +162,7 @@ class APIManager:
             wait_time = self._rate_limited_until - now
             logger.warning(f"API requests are rate limited. Blocking calls for {wait_time:.1f} more seconds.")
             raise Exception(f"API rate limited. Please wait {wait_time:.1f} seconds before retrying.")
+        await self.rate_limiter.acquire()
         try:
             method_upper = method.upper()
             if method_upper == 'GET':
@@ -117,6 +200,7 @@ class APIManager:
 
         api_server_ids = set()
         api_servers_map = {}
+        api_images_map = {}
 
         for server in servers:
             attributes = server.get("attributes", {})
@@ -125,6 +209,7 @@ class APIManager:
             if server_id:
                 api_server_ids.add(server_id)
                 api_servers_map[server_id] = name
+                api_images_map[server_id] = attributes.get("docker_image")
 
         config_id_to_key = {
             v.get("id"): k for k, v in current_servers.items() if "id" in v
@@ -146,6 +231,8 @@ class APIManager:
 
             self.cfg.set(section, "id", server_id)
             self.cfg.set(section, "name", name)
+            if api_images_map.get(server_id):
+                self.cfg.set(section, "docker_image", api_images_map[server_id])
             if self.cfg.get(section, "hide", None) is None:
                 self.cfg.set(section, "hide", False)
 
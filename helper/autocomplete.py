@@ -0,0 +1,113 @@
+import time
+from fnmatch import fnmatch
+from discord import app_commands
+from helper.utilities import get_visible_servers
+
+# Discord shows at most 25 choices, each name and value at most 100 characters
+MAX_CHOICES = 25
+CHOICE_LIMIT = 100
+SERVER_INDEX_TTL = 30
+
+def rank_matches(current: str, candidates: list[str]) -> list[str]:
+    """
+    Order candidates for a partially typed value: prefix matches first, then matches at the start of
+    a word, then anywhere. Case-insensitive, alphabetical within each group, at most MAX_CHOICES.
+    """
+    needle = current.strip().lower()
+    if not needle:
+        return sorted(candidates, key=str.lower)[:MAX_CHOICES]
+    ranked = []
+    for candidate in candidates:
+        lowered = candidate.lower()
+        position = lowered.find(needle)
+        if position == -1:
+            continue
+        if position == 0:
+            rank = 0
+        elif not lowered[position - 1].isalnum():
+            rank = 1
+        else:
+            rank = 2
+        ranked.append((rank, lowered, candidate))
+    ranked.sort()
+    return [candidate for _, _, candidate in ranked[:MAX_CHOICES]]
+
+class ServerIndex:
+    """
+    In-memory list of visible servers for autocomplete. Rebuilt from the local config at most every
+    SERVER_INDEX_TTL seconds, so a keystroke never waits on anything but this process.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.servers = []
+        self._built = 0
+
+    def _entries(self) -> list[dict]:
+        if time.monotonic() - self._built > SERVER_INDEX_TTL:
+            self.servers = [
+                {"id": str(s["id"]), "name": str(s.get("name") or s["id"]), "tag": str(s.get("tag") or "").strip()}
+                for s in get_visible_servers(self.config)
+            ]
+            self._built = time.monotonic()
+        return self.servers
+
+    def invalidate(self):
+        self._built = 0
+
+    def lookup(self, text: str | None) -> str | None:
+        """
+        Server ID for an exact ID, or a name containing `text` (like resolve_server).
+        """
+        if not text:
+            return None
+        needle = text.strip().lower()
+        servers = self._entries()
+        for server in servers:
+            if server["id"].lower() == needle:
+                return server["id"]
+        for server in servers:
+            if needle in server["name"].lower():
+                return server["id"]
+        return None
+
+    def targets(self, text: str | None) -> list[str]:
+        """
+        Server IDs for a fleet target, with the same rules as resolve_server_targets.
+        """
+        if not text:
+            return []
+        needle = text.strip().lower()
+        servers = self._entries()
+        if needle == "all":
+            return [s["id"] for s in servers]
+        tag = needle[4:] if needle.startswith("tag:") else needle
+        matched = [s["id"] for s in servers if s["tag"].lower() == tag]
+        if not matched and any(c in needle for c in "*?["):
+            matched = [s["id"] for s in servers if fnmatch(s["name"].lower(), needle) or fnmatch(s["id"].lower(), needle)]
+        if not matched and not needle.startswith("tag:"):
+            server_id = self.lookup(text)
+            matched = [server_id] if server_id else []
+        return matched
+
+    def choices(self, current: str, fleet: bool = False, extras: tuple[str, ...] = ()) -> list[app_commands.Choice[str]]:
+        """
+        Server choices labelled "name (id)" with the ID as value. With `fleet`, "all" and every
+        "tag:<tag>" are offered too; `extras` adds fixed keywords.
+        """
+        servers = self._entries()
+        labels = {f"{s['name']} ({s['id']})": s["id"] for s in servers}
+        labels.update({extra: extra for extra in extras})
+        if fleet:
+            labels["all"] = "all"
+            for tag in {s["tag"] for s in servers if s["tag"]}:
+                labels[f"tag:{tag}"] = f"tag:{tag}"
+        return [
+            app_commands.Choice(name=label[:CHOICE_LIMIT], value=labels[label][:CHOICE_LIMIT])
+            for label in rank_matches(current, list(labels))
+        ]
+
+async def server_autocomplete(interaction, current: str) -> list[app_commands.Choice[str]]:
+    return interaction.client.server_index.choices(current)
+
+async def fleet_autocomplete(interaction, current: str) -> list[app_commands.Choice[str]]:
+    return interaction.client.server_index.choices(current, fleet=True)
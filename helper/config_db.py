@@ -5,6 +5,7 @@ import platform
 import subprocess
 from helper.logger import logger
 from helper.input_handler import prompt_input
+from helper.alerts import DEFAULT_ALERT_RULES
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "serversage_config.db")
 
@@ -78,19 +79,40 @@ def create_config():
     do_announcement_loop = (prompt_input("Enable Announcement Loop? (yes/no) [yes]:") or "yes").strip().lower() in ("yes", "y")
     cfg.set("bot", "doResourceLoop", do_resource_loop)
     cfg.set("bot", "doAnnouncementLoop", do_announcement_loop)
+    cfg.set("bot", "announcementInterval", 3600)
+    cfg.set("bot", "statsShardBy", "size")
+    do_query_poll = (prompt_input("Enable Steam Query Poller? (yes/no) [no]:") or "no").strip().lower() in ("yes", "y")
+    cfg.set("bot", "doQueryPoll", do_query_poll)
+    cfg.set("bot", "queryPollInterval", 60)
+    cfg.set("bot", "fileCacheMaxMB", 512)
+    cfg.set("bot", "apiRequestsPerMinute", 240)
+    do_log_events = (prompt_input("Enable Log Event Extraction? (yes/no) [no]:") or "no").strip().lower() in ("yes", "y")
+    cfg.set("bot", "doLogEvents", do_log_events)
+    cfg.set("bot", "logEventInterval", 60)
+    do_player_sync = (prompt_input("Enable background Player Sync? (yes/no) [no]:") or "no").strip().lower() in ("yes", "y")
+    cfg.set("bot", "doPlayerSync", do_player_sync)
+    cfg.set("bot", "playerSyncInterval", 60)
     cfg.set("discord", "bot_token", prompt_input("Enter your Discord bot token:"))
     cfg.set("discord", "control_channel", prompt_input("Enter the ID of the Channel where commands should be accepted:"))
     cfg.set("discord", "guild_id", prompt_input("Enter the Discord Guild ID (Server ID) for slash command syncing:"))
     if do_resource_loop:
         cfg.set("discord", "stats_channel", prompt_input("Enter the channel ID for resource stats:"))
-        cfg.set("discord", "stats_message_id", "")
+        cfg.set("discord", "stats_message_ids", [])
     else:
         cfg.set("discord", "stats_channel", None)
-        cfg.set("discord", "stats_message_id", None)
+        cfg.set("discord", "stats_message_ids", [])
     if do_announcement_loop:
         cfg.set("discord", "announcement_channel", prompt_input("Enter the announcement channel ID:"))
     else:
         cfg.set("discord", "announcement_channel", None)
+    do_alerts = do_resource_loop and (prompt_input("Enable Resource Alerts? (yes/no) [yes]:") or "yes").strip().lower() in ("yes", "y")
+    if do_alerts:
+        cfg.set("discord", "alert_channel", prompt_input("Enter the channel ID for resource alerts:"))
+        for index, rule in enumerate(DEFAULT_ALERT_RULES, start=1):
+            for key, value in rule.items():
+                cfg.set(f"alert_{index}", key, value)
+    else:
+        cfg.set("discord", "alert_channel", None)
     cfg.set("panel", "APIKey", prompt_input("Enter your panel API key:"))
     logger.info("Enter server IDs one by one. Leave blank to finish.")
     logger.info("Find the ID in your Game Panel URL → https://games.bisecthosting.com/server/<ID>")
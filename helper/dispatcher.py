@@ -0,0 +1,251 @@
+import asyncio
+import time
+from collections import deque
+import discord
+from helper.logger import logger
+
+# Discord caps a message at 10 embeds and the combined text of all its embeds at 6000 characters.
+MESSAGE_EMBED_LIMIT = 10
+MESSAGE_TOTAL_LIMIT = 6000
+LATENCY_SAMPLES = 500
+SLOW_WAIT_SECONDS = 10
+
+def pack_embeds(embeds: list[discord.Embed]) -> list[list[discord.Embed]]:
+    """
+    Group embeds into messages of at most 10 embeds and 6000 characters, keeping their order.
+    """
+    messages = []
+    current = []
+    current_size = 0
+    for embed in embeds:
+        size = len(embed)
+        if current and (len(current) >= MESSAGE_EMBED_LIMIT or current_size + size > MESSAGE_TOTAL_LIMIT):
+            messages.append(current)
+            current = []
+            current_size = 0
+        current.append(embed)
+        current_size += size
+    if current:
+        messages.append(current)
+    return messages
+
+def _retrieve_exception(future: asyncio.Future):
+    # Fire-and-forget callers never await their future; failures are already logged by the worker
+    if not future.cancelled():
+        future.exception()
+
+class _Operation:
+    __slots__ = ("kind", "message_id", "content", "embeds", "kwargs", "pack", "future", "queued_at")
+
+    def __init__(self, kind: str, message_id=None, content=None, embeds=None, kwargs=None, pack=False):
+        self.kind = kind
+        self.message_id = message_id
+        self.content = content
+        self.embeds = embeds or []
+        self.kwargs = kwargs or {}
+        self.pack = pack
+        self.future = asyncio.get_running_loop().create_future()
+        self.future.add_done_callback(_retrieve_exception)
+        self.queued_at = time.monotonic()
+
+    @property
+    def packable(self) -> bool:
+        return self.kind == "send" and self.pack and self.content is None and not self.kwargs and bool(self.embeds)
+
+class OutboundDispatcher:
+    """
+    Queues outgoing Discord messages, edits and deletes per destination (a channel, or an interaction's
+    followup webhook) and sends them from one worker per destination. Discord's per-channel rate limits
+    are therefore waited out by the worker, not by the cog that queued the message.
+
+    - Sends with pack=True that are queued back to back are merged into as few messages as the embed
+      limits allow.
+    - An edit queued while an earlier edit of the same message is still waiting replaces that edit's
+      fields (last write wins); both callers get the same future.
+    - The time each operation spent queued is sampled for latency().
+
+    Every method returns a future. Background loops can ignore it; commands can await it for the result
+    (a list of sent messages for send, the edited message for edit) or the Discord exception.
+    """
+    def __init__(self):
+        self._queues = {}
+        self._workers = {}
+        self._pending_edits = {}
+        self.waits = deque(maxlen=LATENCY_SAMPLES)
+        self.sent = 0
+        self.edited = 0
+        self.deleted = 0
+        self.coalesced = 0
+        self.messages_saved = 0
+        self.failed = 0
+
+    @staticmethod
+    def _key(destination):
+        if isinstance(destination, discord.Webhook):
+            return "webhook", destination.token or destination.id
+        return "channel", destination.id
+
+    @staticmethod
+    def _label(key) -> str:
+        # Never log a webhook key: for interaction followups it is the interaction token
+        return f"channel {key[1]}" if key[0] == "channel" else "interaction followup"
+
+    def _enqueue(self, destination, operation: _Operation) -> asyncio.Future:
+        key = self._key(destination)
+        self._queues.setdefault(key, deque()).append(operation)
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._workers[key] = asyncio.create_task(self._drain(key, destination))
+        return operation.future
+
+    def send(self, destination, content: str | None = None, embeds: list[discord.Embed] | None = None,
+             pack: bool = True, **kwargs) -> asyncio.Future:
+        """
+        Queue a message. Embed lists longer than one message allows are split across several messages.
+        Set pack=False when the message must stand on its own (e.g. it is edited later by ID).
+        """
+        return self._enqueue(destination, _Operation("send", content=content, embeds=list(embeds or []),
+                                                     kwargs=kwargs, pack=pack))
+
+    def edit(self, destination, message_id, **fields) -> asyncio.Future:
+        """
+        Queue an edit of `message_id`, merging it into an edit of the same message that hasn't gone out yet.
+        """
+        key = (self._key(destination), str(message_id))
+        pending = self._pending_edits.get(key)
+        if pending is not None:
+            pending.kwargs.update(fields)
+            self.coalesced += 1
+            return pending.future
+        operation = _Operation("edit", message_id=str(message_id), kwargs=fields)
+        self._pending_edits[key] = operation
+        return self._enqueue(destination, operation)
+
+    def delete(self, destination, message_id) -> asyncio.Future:
+        return self._enqueue(destination, _Operation("delete", message_id=str(message_id)))
+
+    async def _drain(self, key, destination):
+        queue = self._queues[key]
+        while queue:
+            operation = queue.popleft()
+            batch = [operation]
+            if operation.kind == "edit":
+                self._pending_edits.pop((key, operation.message_id), None)
+            elif operation.packable:
+                while queue and queue[0].packable:
+                    batch.append(queue.popleft())
+
+            waited = time.monotonic() - operation.queued_at
+            self.waits.append(waited)
+            if waited > SLOW_WAIT_SECONDS:
+                logger.warning(f"Outbound message to {self._label(key)} waited {waited:.1f}s in the queue "
+                               f"({len(queue)} more pending).")
+            try:
+                if operation.kind == "send":
+                    await self._send_batch(destination, batch)
+                elif operation.kind == "edit":
+                    operation.future.set_result(await self._edit(destination, operation))
+                    self.edited += 1
+                else:
+                    await self._delete(destination, operation.message_id)
+                    operation.future.set_result(None)
+                    self.deleted += 1
+            except asyncio.CancelledError:
+                for pending in [*batch, *queue]:
+                    if not pending.future.done():
+                        pending.future.cancel()
+                queue.clear()
+                self._queues.pop(key, None)
+                self._workers.pop(key, None)
+                raise
+            except Exception as e:
+                self.failed += 1
+                if not (operation.kind == "delete" and isinstance(e, discord.NotFound)):
+                    logger.error(f"Failed to {operation.kind} Discord message in {self._label(key)}: {e}")
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+        self._queues.pop(key, None)
+        self._workers.pop(key, None)
+
+    async def _send_batch(self, destination, batch: list[_Operation]):
+        if len(batch) == 1 and not batch[0].packable:
+            operation = batch[0]
+            messages = []
+            for embeds in pack_embeds(operation.embeds) or [[]]:
+                content = operation.content if not messages else None
+                messages.append(await self._send(destination, content, embeds, operation.kwargs))
+            self.sent += len(messages)
+            operation.future.set_result(messages)
+            return
+
+        owners = {id(embed): operation for operation in batch for embed in operation.embeds}
+        results = {id(operation): [] for operation in batch}
+        packed = pack_embeds([embed for operation in batch for embed in operation.embeds])
+        for embeds in packed:
+            message = await self._send(destination, None, embeds, {})
+            self.sent += 1
+            for operation in {id(owners[id(e)]): owners[id(e)] for e in embeds}.values():
+                results[id(operation)].append(message)
+        self.messages_saved += sum(len(pack_embeds(operation.embeds)) for operation in batch) - len(packed)
+        for operation in batch:
+            operation.future.set_result(results[id(operation)])
+
+    @staticmethod
+    async def _send(destination, content, embeds, kwargs):
+        if isinstance(destination, discord.Webhook):
+            kwargs = {"wait": True, **kwargs}
+        if embeds:
+            kwargs = {"embeds": embeds, **kwargs}
+        return await destination.send(content, **kwargs)
+
+    @staticmethod
+    async def _edit(destination, operation: _Operation):
+        if isinstance(destination, discord.Webhook):
+            return await destination.edit_message(int(operation.message_id), **operation.kwargs)
+        return await destination.get_partial_message(int(operation.message_id)).edit(**operation.kwargs)
+
+    @staticmethod
+    async def _delete(destination, message_id: str):
+        if isinstance(destination, discord.Webhook):
+            await destination.delete_message(int(message_id))
+        else:
+            await destination.get_partial_message(int(message_id)).delete()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def latency(self) -> dict:
+        """
+        Queue wait percentiles in seconds over the last LATENCY_SAMPLES operations.
+        """
+        if not self.waits:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0, "samples": 0}
+        ordered = sorted(self.waits)
+        return {
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+            "max": ordered[-1],
+            "samples": len(ordered),
+        }
+
+    def summary(self) -> str:
+        latency = self.latency()
+        return (f"{self.pending} pending, queue wait p50 {latency['p50']:.2f}s / p95 {latency['p95']:.2f}s, "
+                f"{self.sent} sent, {self.edited} edited, {self.coalesced} edit(s) coalesced, "
+                f"{self.messages_saved} message(s) saved by packing, {self.failed} failed")
+
+    async def close(self, timeout: float = 5.0):
+        """
+        Give queued operations up to `timeout` seconds to go out, then cancel the rest.
+        """
+        workers = [worker for worker in self._workers.values() if not worker.done()]
+        if not workers:
+            return
+        _, still_running = await asyncio.wait(workers, timeout=timeout)
+        for worker in still_running:
+            worker.cancel()
+        if still_running:
+            await asyncio.gather(*still_running, return_exceptions=True)
+            logger.warning(f"Dropped outbound messages for {len(still_running)} destination(s) on shutdown.")
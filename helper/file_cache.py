@@ -0,0 +1,134 @@
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+from helper.log_fetcher import format_bytes
+from helper.logger import logger
+
+CACHE_DIR = os.path.join("SS.Cache", "files")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+def cache_key(server_id: str, path: str, size: int, modified: str) -> str:
+    """
+    Content address of a server file: any change to its size or modified time gives a new key.
+    """
+    return hashlib.sha256(f"{server_id}\0{path.lstrip('/')}\0{size}\0{modified}".encode("utf-8")).hexdigest()
+
+class CacheWriter:
+    """
+    Streams one file into the cache. Data goes to a temp file that only replaces the entry on commit(),
+    so readers never see a partial file.
+    """
+    def __init__(self, cache: "FileCache", key: str, expected_size: int):
+        self.cache = cache
+        self.key = key
+        self.expected_size = expected_size
+        self.temp_path = os.path.join(cache.directory, f"{key}.tmp-{uuid.uuid4().hex[:8]}")
+        self.size = 0
+        self._file = open(self.temp_path, "wb")
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        self._file.close()
+        if self.size != self.expected_size:
+            # The file changed between listing and download, so the key doesn't describe this content
+            self.abort()
+            return
+        os.replace(self.temp_path, self.cache.path_for(self.key))
+        self.cache._add(self.key, self.size)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+class FileCache:
+    """
+    Bounded on-disk cache of server files, keyed by (server, path, size, modified time) as reported by
+    the panel's file listing. Entries are evicted least-recently-used first once the total size passes
+    `max_bytes`. The index is rebuilt from the directory on startup, ordered by last access.
+    """
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if ".tmp-" in name:
+                # Left over from an interrupted write
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            found.append((stat.st_atime, name, stat.st_size))
+        for _, name, size in sorted(found):
+            self.entries[name] = size
+            self.total_bytes += size
+        self._evict()
+        if self.entries:
+            logger.info(f"File cache: {len(self.entries)} file(s), {format_bytes(self.total_bytes)} on disk.")
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, server_id: str, path: str, size: int, modified: str) -> str | None:
+        """
+        Return the cached file's local path and mark it as recently used, or None on a miss.
+        """
+        key = cache_key(server_id, path, size, modified)
+        if key not in self.entries or not os.path.exists(self.path_for(key)):
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        os.utime(self.path_for(key))
+        self.hits += 1
+        self.bytes_saved += self.entries[key]
+        return self.path_for(key)
+
+    def writer(self, server_id: str, path: str, size: int, modified: str) -> CacheWriter | None:
+        """
+        Start caching a file, or None if it is too large to be worth keeping.
+        """
+        if size > self.max_bytes // 2:
+            return None
+        return CacheWriter(self, cache_key(server_id, path, size, modified), size)
+
+    def _add(self, key: str, size: int):
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)
+        self.entries[key] = size
+        self.total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self.path_for(key))
+            except OSError as e:
+                logger.warning(f"Failed to evict cached file {key}: {e}")
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        return (f"{len(self.entries)} file(s), {format_bytes(self.total_bytes)} / {format_bytes(self.max_bytes)}, "
+                f"hit ratio {self.hit_ratio:.0%} ({self.hits} hit(s), {self.misses} miss(es)), "
+                f"{format_bytes(self.bytes_saved)} saved")
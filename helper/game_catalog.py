@@ -0,0 +1,253 @@
+import os
+import re
+import time
+from fnmatch import translate
+import yaml
+from helper.logger import logger
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "..", "games.yaml")
+RELOAD_CHECK_INTERVAL = 2.0
+MAX_IMAGE_CACHE = 4096
+# \1-style references and (?(1)...) conditionals, which renumber when patterns are combined
+NUMBERED_REFERENCE = re.compile(r"\\[1-9]|\(\?\(\d")
+
+def normalize_name(name: str) -> str:
+    """
+    Lowercase a game/image name and strip trailing digits, e.g. 'VRising2' -> 'vrising'.
+    """
+    return re.sub(r'\d+$', '', name.strip().lower())
+
+def build_game_data(game_name: str, entry: dict) -> dict:
+    """
+    Turn a catalog entry into the game_data dict used by the cogs.
+    Keeps the single `log_file` / `mods_dir` keys (first entry) alongside the full lists.
+    """
+    log_files = [str(p) for p in entry.get("log_files") or ([entry["log_file"]] if entry.get("log_file") else [])]
+    mods = entry.get("mods") or {}
+    mods_dirs = [str(d).strip("/") for d in mods.get("dirs") or ([entry["mods_dir"]] if entry.get("mods_dir") else [])]
+    steam = entry.get("steam") or {}
+    return {
+        "name": game_name,
+        "log_file": log_files[0] if log_files else "",
+        "log_files": log_files,
+        "mods_dir": mods_dirs[0] if mods_dirs else "",
+        "mods_dirs": mods_dirs,
+        "mods_disabled_suffix": mods.get("disabled_suffix") or ".disabled",
+        "steam": {
+            "query": bool(steam.get("query", False)),
+            "port": steam.get("port", 0),
+        },
+        "events": {str(event_type): str(pattern) for event_type, pattern in (entry.get("events") or {}).items()},
+    }
+
+def has_top_level_alternation(regex: str) -> bool:
+    """
+    Whether a regex has a `|` outside any group or character class, i.e. alternatives that each start fresh.
+    """
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(regex):
+        char = regex[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            if regex[i + 1:i + 2] == "]" or regex[i + 1:i + 3] == "^]":
+                i += 2 if regex[i + 1] == "]" else 3
+                continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif char == "|" and depth == 0:
+            return True
+        i += 1
+    return False
+
+def literal_prefix(pattern: str, is_regex: bool) -> str:
+    """
+    The literal text an image pattern must start with (lowercased), used to bucket patterns by registry/org.
+    A regex with top-level alternatives has no common prefix, and a character followed by a quantifier
+    isn't required, so it is left out (e.g. 'itzg/?foo' -> 'itzg').
+    """
+    if is_regex and has_top_level_alternation(pattern):
+        return ""
+    stop = set(".^$*+?{}[]|()") if is_regex else set("*?[")
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if is_regex and char == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            prefix.append(pattern[i + 1])
+            i += 2
+            continue
+        if char in stop or (is_regex and char == "\\"):
+            if is_regex and char in "*+?{" and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+        i += 1
+    return "".join(prefix).lower()
+
+def bucket_key(prefix: str) -> str:
+    """
+    Bucket on up to two complete leading path segments, e.g. 'ghcr.io/org/img' -> 'ghcr.io/org'.
+    Patterns without a complete literal segment share the '' bucket.
+    """
+    segments = prefix.split("/")[:-1]
+    return "/".join(segments[:2])
+
+class GameCatalog:
+    """
+    Game catalog loaded from games.yaml and compiled into:
+      - an exact index of normalized names and aliases (one dict lookup)
+      - image patterns bucketed by literal registry/org prefix, each bucket compiled into one combined regex,
+        so a lookup only runs the (at most three) buckets the image can fall in; results are memoized per image.
+        Patterns that don't survive being combined are matched one by one, and an invalid pattern only
+        drops itself
+    The file's mtime is checked at most every RELOAD_CHECK_INTERVAL seconds and the catalog is rebuilt
+    when it changes; a broken file keeps the previous catalog.
+    """
+    def __init__(self, path: str = CATALOG_PATH):
+        self.path = path
+        self.games = {}
+        self._exact = {}
+        self._buckets = {}
+        self._image_cache = {}
+        self._mtime = None
+        self._last_check = 0.0
+        self.reload()
+
+    def reload(self) -> bool:
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+            self._compile(raw.get("games") or {})
+        except FileNotFoundError:
+            logger.error(f"Game catalog not found at {self.path}, game detection is disabled.")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to load game catalog {self.path}, keeping the previous one: {e}")
+            return False
+        self._mtime = mtime
+        logger.info(f"Loaded {len(self.games)} game(s) from the game catalog.")
+        return True
+
+    def _compile(self, entries: dict):
+        games = {}
+        exact = {}
+        bucket_patterns = {}
+        order = 0
+        for game_name, entry in entries.items():
+            entry = entry or {}
+            game_name = str(game_name)
+            games[game_name] = build_game_data(game_name, entry)
+            for name in [game_name, *(entry.get("aliases") or [])]:
+                exact.setdefault(normalize_name(str(name)), game_name)
+            for pattern in entry.get("images") or []:
+                pattern = str(pattern)
+                is_regex = pattern.startswith("re:")
+                regex = pattern[3:] if is_regex else translate(pattern.lower())
+                try:
+                    compiled = re.compile(regex, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning(f"Skipping invalid image pattern {pattern!r} of {game_name}: {e}")
+                    continue
+                key = bucket_key(literal_prefix(pattern[3:] if is_regex else pattern, is_regex))
+                bucket_patterns.setdefault(key, []).append((order, game_name, regex, compiled))
+                order += 1
+        self.games = games
+        self._exact = exact
+        self._buckets = {key: self._compile_bucket(key, patterns) for key, patterns in bucket_patterns.items()}
+        self._image_cache = {}
+
+    @staticmethod
+    def _compile_bucket(key: str, patterns: list[tuple]) -> tuple:
+        """
+        Compile a bucket into (combined regex or None, {group: (order, game)}, standalone patterns).
+        Patterns that can't be wrapped in a named group (global inline flags) or whose numbered group
+        references would point elsewhere once combined are matched on their own, in catalog order.
+        """
+        combinable = []
+        standalone = []
+        for order, game_name, regex, compiled in patterns:
+            if compiled.groups and NUMBERED_REFERENCE.search(regex):
+                standalone.append((order, game_name, compiled))
+                continue
+            try:
+                re.compile(f"(?:{regex})")
+            except re.error:
+                standalone.append((order, game_name, compiled))
+                continue
+            combinable.append((order, game_name, regex, compiled))
+        combined = None
+        if combinable:
+            try:
+                combined = re.compile("|".join(f"(?P<g{i}>{regex})" for i, _, regex, _ in combinable), re.IGNORECASE)
+            except re.error as e:
+                logger.warning(f"Image patterns under '{key or '*'}' can't be combined, matching them one by one: {e}")
+                standalone.extend((order, game_name, compiled) for order, game_name, _, compiled in combinable)
+                combinable = []
+        groups = {f"g{i}": (i, game_name) for i, game_name, _, _ in combinable}
+        return combined, groups, sorted(standalone, key=lambda p: p[0])
+
+    def _match_patterns(self, docker_image: str) -> str | None:
+        parts = docker_image.split("/")
+        keys = {"", "/".join(parts[:1]) if len(parts) > 1 else "", "/".join(parts[:2]) if len(parts) > 2 else ""}
+        best = None
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            pattern, groups, standalone = bucket
+            match = pattern.match(docker_image) if pattern else None
+            if match and (best is None or groups[match.lastgroup][0] < best[0]):
+                best = groups[match.lastgroup]
+            for order, game_name, compiled in standalone:
+                if best is not None and order > best[0]:
+                    break
+                if compiled.match(docker_image):
+                    best = (order, game_name)
+                    break
+        return best[1] if best else None
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            logger.info("Game catalog changed on disk, reloading.")
+            self.reload()
+
+    def match_name(self, normalized_name: str) -> tuple[str, dict] | None:
+        self.maybe_reload()
+        game_name = self._exact.get(normalized_name)
+        return (game_name, self.games[game_name]) if game_name else None
+
+    def match_image(self, docker_image: str, normalized_name: str) -> tuple[str, dict] | None:
+        """
+        Match a docker image: exact name/alias first, then image patterns in catalog order.
+        """
+        self.maybe_reload()
+        game_name = self._exact.get(normalized_name)
+        if game_name is None:
+            if docker_image in self._image_cache:
+                game_name = self._image_cache[docker_image]
+            else:
+                game_name = self._match_patterns(docker_image)
+                if len(self._image_cache) >= MAX_IMAGE_CACHE:
+                    self._image_cache.clear()
+                self._image_cache[docker_image] = game_name
+        return (game_name, self.games[game_name]) if game_name else None
+
+catalog = GameCatalog()
@@ -1,43 +1,11 @@
 import re
 from helper.api_manager import APIManager
 from helper.logger import logger
+from helper.utilities import find_server_section
+from helper.game_catalog import catalog
 
-# GAME_LIST is a manually kept list, and I won't be adding every game Bisect offers ~
-# If you'd like your Bot to automatically grab logs without user input, please submit a Pull Request adding it in the format here
-# "<Game_Name>": {
-#     "log_file": "<Path to logfile (relative to /home/container)>",
-#     "mods_dir": "<Path to Mods/Plugins folder (relative to /home/container)>",
-#     "steam": {
-#         "query": <True/False>,  # Whether the server supports Steam Query
-#         "port": <int>  # Offset from game port to calculate the query port (e.g., 1 means query = game_port + 1)
-#     }
-# }
-GAME_LIST = {
-    "Minecraft": {
-        "log_file": "logs/latest.log",
-        "mods_dir": "mods",
-        "steam": {
-            "query": False,
-            "port": 0
-        },
-    },
-    "Enshrouded": {
-        "log_file": "logs/enshrouded_server.log",
-        "mods_dir": "",
-        "steam": {
-            "query": True,
-            "port": 1
-        },
-    },
-    "VRising": {
-        "log_file": "logs/VRisingServer.log",
-        "mods_dir": "BepInEx/plugins",
-        "steam": {
-            "query": True,
-            "port": 1
-        }
-    }
-}
+# Games are defined in games.yaml (see helper/game_catalog.py), which is reloaded automatically when it changes.
+# If you'd like your Bot to automatically grab logs without user input, please submit a Pull Request adding your game there
 
 def extract_game_name(docker_image: str) -> str:
     """
@@ -53,41 +21,58 @@ def extract_game_name(docker_image: str) -> str:
         logger.error('Failed to extract game name from docker image: %s (%s)', docker_image, e)
         return ""
 
+# Server ID -> docker image, mirrored from the `docker_image` key of each server's config section
+_detected_images = {}
+
 def match_game_name(normalized_name: str) -> tuple[str, dict] | None:
     """
-    Match normalized game name to GAME_LIST using lowercase and digit-stripped comparison.
-    Returns (original_key, game_data) or None if no match is found.
+    Match normalized game name against the game catalog names and aliases.
+    Returns (game_name, game_data) or None if no match is found.
     """
-    for game_key in GAME_LIST:
-        key_normalized = re.sub(r'\d+$', '', game_key.lower())
-        if key_normalized == normalized_name:
-            return game_key, GAME_LIST[game_key]
-    return None
+    return catalog.match_name(normalized_name)
 
-async def get_game_name_and_data(api_manager: APIManager, server_name: str):
+def detect_game(docker_image: str) -> tuple[str, dict] | None:
     """
-    Fetch the docker image for a given server from the API,
-    extract and normalize the game name, match it against known games,
-    and return (game_name, game_data).
-
-    Returns:
-        Tuple[str, dict] | None: (game_name, game_data) or None if not found.
+    Detect the game for a docker image by name/alias, then by the catalog's image patterns.
+    Returns (game_name, game_data) or None.
     """
-    url = f"{api_manager.base_url}?filter[name]={server_name}"
-    response = await api_manager.make_request(url)
-
-    servers = response.get("data", [])
-    if not servers:
+    if not docker_image:
         return None
+    return catalog.match_image(docker_image.lower(), extract_game_name(docker_image))
 
-    attributes = servers[0].get("attributes", {})
-    docker_image = attributes.get("docker_image", "")
-    normalized_name = extract_game_name(docker_image)
-    if not normalized_name:
-        return None
+def remember_docker_image(config, server_id: str, docker_image: str):
+    """
+    Store a server's docker image in its config section, so game detection survives restarts.
+    Called wherever server attributes are already fetched (reconciliation, stats loop), which also
+    picks up egg changes.
+    """
+    if not docker_image or _detected_images.get(server_id) == docker_image:
+        return
+    section = find_server_section(config, server_id)
+    if section:
+        previous = config.get(section, "docker_image", None)
+        if previous != docker_image:
+            if previous:
+                logger.info("Docker image changed for server %s: %s -> %s", server_id, previous, docker_image)
+            config.set(section, "docker_image", docker_image)
+    _detected_images[server_id] = docker_image
 
-    match = match_game_name(normalized_name)
-    if not match:
-        return None
+async def get_game_name_and_data(api_manager: APIManager, server_id: str):
+    """
+    Detect the game for a server by ID and return (game_name, game_data).
+    Uses the cached docker image when known; otherwise fetches the server once and caches its image.
 
-    return match  # (game_name, game_data)
\ No newline at end of file
+    Returns:
+        Tuple[str, dict] | None: (game_name, game_data) or None if not found.
+    """
+    docker_image = _detected_images.get(server_id)
+    if docker_image is None:
+        section = find_server_section(api_manager.cfg, server_id)
+        docker_image = api_manager.cfg.get(section, "docker_image", None) if section else None
+        if docker_image:
+            _detected_images[server_id] = docker_image
+    if not docker_image:
+        response = await api_manager.make_request(f"{api_manager.base_url}/servers/{server_id}")
+        docker_image = response.get("attributes", {}).get("docker_image", "")
+        remember_docker_image(api_manager.cfg, server_id, docker_image)
+    return detect_game(docker_image)
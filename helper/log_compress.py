@@ -0,0 +1,176 @@
+import asyncio
+import gzip
+import os
+import queue
+import time
+from helper.log_fetcher import format_bytes
+from helper.logger import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_UPLOAD_LIMIT = 10 * 1024 * 1024
+# Compressed bytes still buffered inside the compressor when a part's size is checked
+PART_HEADROOM = 512 * 1024
+READ_BLOCK = 1024 * 1024
+# Data is fed to the compressor in slices this size, so one part never overshoots by more than this
+FEED_SLICE = 64 * 1024
+GZIP_LEVEL = 6
+# Chunks waiting for the compressor; when it falls behind, the download waits instead of buffering
+QUEUE_CHUNKS = 16
+ZSTD_LEVEL = 3
+
+class LogArchiver:
+    """
+    Sink for a log download that keeps the raw file while it fits Discord's upload limit, and switches
+    to compressing once it doesn't: the bytes written so far and every following chunk are compressed
+    in a worker thread (zstd when the `zstandard` package is installed, gzip otherwise) into parts that
+    each fit the limit. At most QUEUE_CHUNKS chunks wait for the compressor, so a download that outruns
+    it is slowed down rather than held in memory. Parts are independent archives of consecutive slices of the log, so concatenating
+    them (`cat *.gz | gunzip`) restores the file.
+    """
+    def __init__(self, raw_path: str, upload_limit: int = DEFAULT_UPLOAD_LIMIT):
+        self.raw_path = raw_path
+        self.upload_limit = upload_limit
+        self.raw_size = 0
+        self.compressed_size = 0
+        self.parts = []
+        self.use_zstd = zstandard is not None
+        self.extension = ".zst" if self.use_zstd else ".gz"
+        self._raw_file = open(raw_path, "wb")
+        self._queue = None
+        self._worker = None
+        self._started = None
+        self._elapsed = 0.0
+
+    @property
+    def compressing(self) -> bool:
+        return self._worker is not None
+
+    async def write(self, chunk: bytes):
+        self.raw_size += len(chunk)
+        if self._worker is not None:
+            await self._put(chunk)
+            return
+        self._raw_file.write(chunk)
+        if self.raw_size > self.upload_limit:
+            self._start_compression()
+
+    def _start_compression(self):
+        self._raw_file.close()
+        self._started = time.monotonic()
+        self._queue = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self._queue.put(("file", self.raw_path))
+        self._worker = asyncio.get_running_loop().run_in_executor(None, self._compress_worker)
+
+    async def _put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                pass
+            if self._worker.done():
+                # The worker stopped early; surface its error instead of waiting on a queue nobody drains
+                await self._worker
+                raise RuntimeError("Compression worker exited before the log was fully written")
+            try:
+                await asyncio.to_thread(self._queue.put, item, True, 0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _open_part(self):
+        base = os.path.basename(self.raw_path)
+        path = f"{self.raw_path}.part{len(self.parts) + 1:03d}{self.extension}"
+        self.parts.append(path)
+        out = open(path, "wb")
+        if self.use_zstd:
+            writer = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(out, closefd=False)
+        else:
+            writer = gzip.GzipFile(filename=base, mode="wb", fileobj=out, compresslevel=GZIP_LEVEL)
+        return out, writer
+
+    def _compress_worker(self):
+        part_limit = max(self.upload_limit - PART_HEADROOM, self.upload_limit // 2)
+        out, writer = self._open_part()
+
+        def feed(data: bytes):
+            nonlocal out, writer
+            for start in range(0, len(data), FEED_SLICE):
+                writer.write(data[start:start + FEED_SLICE])
+                if out.tell() >= part_limit:
+                    writer.close()
+                    self.compressed_size += out.tell()
+                    out.close()
+                    out, writer = self._open_part()
+
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                if isinstance(item, tuple):
+                    with open(item[1], "rb") as f:
+                        while block := f.read(READ_BLOCK):
+                            feed(block)
+                else:
+                    feed(item)
+        finally:
+            writer.close()
+            self.compressed_size += out.tell()
+            out.close()
+
+    async def finish(self) -> list[str]:
+        """
+        Finish writing and return the file(s) to upload: the raw file, or the compressed parts.
+        """
+        if self._worker is None:
+            self._raw_file.close()
+            return [self.raw_path]
+        await self._put(None)
+        await self._worker
+        self._elapsed = time.monotonic() - self._started
+        os.remove(self.raw_path)
+        if len(self.parts) > 1 and os.path.getsize(self.parts[-1]) <= 64:
+            # Part opened right at the end of the stream with nothing in it
+            self.compressed_size -= os.path.getsize(self.parts[-1])
+            os.remove(self.parts.pop())
+        if len(self.parts) == 1:
+            single = f"{self.raw_path}{self.extension}"
+            os.replace(self.parts[0], single)
+            self.parts[0] = single
+        logger.info(
+            f"Compressed {os.path.basename(self.raw_path)}: {format_bytes(self.raw_size)} -> "
+            f"{format_bytes(self.compressed_size)} ({self.ratio:.1f}x) in {self._elapsed:.2f}s "
+            f"using {'zstd' if self.use_zstd else 'gzip'}, {len(self.parts)} part(s)"
+        )
+        return list(self.parts)
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_size / self.compressed_size if self.compressed_size else 0.0
+
+    def summary(self) -> str:
+        if self._worker is None:
+            return ""
+        return (f"compressed {format_bytes(self.raw_size)} → {format_bytes(self.compressed_size)} "
+                f"({self.ratio:.1f}x, {self._elapsed:.1f}s, {len(self.parts)} part(s))")
+
+    async def cleanup(self):
+        if not self._raw_file.closed:
+            self._raw_file.close()
+        if self._worker is not None and not self._worker.done():
+            try:
+                await self._put(None)
+                await self._worker
+            except Exception as e:
+                logger.warning(f"Compression worker failed during cleanup: {e}")
+        for path in [self.raw_path, *self.parts]:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except Exception as e:
+                    logger.warning(f"Failed to delete cached file {path}: {e}")
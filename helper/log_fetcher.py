@@ -0,0 +1,292 @@
+import posixpath
+import re
+import time
+from collections import deque
+from contextlib import aclosing
+from urllib.parse import quote
+from helper.logger import logger
+
+TAIL_CHUNK_BYTES = 64 * 1024
+MAX_TAIL_CHUNK_BYTES = 4 * 1024 * 1024
+FIRST_SINCE_LINES = 500
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+class LogFetchResult:
+    """
+    Outcome of a log fetch: the data plus what it cost.
+    """
+    def __init__(self, data: bytes, bytes_transferred: int, elapsed: float, total_size: int | None,
+                 ranged: bool, start_offset: int = 0, cached: bool = False):
+        self.data = data
+        self.bytes_transferred = bytes_transferred
+        self.elapsed = elapsed
+        self.total_size = total_size
+        self.ranged = ranged
+        self.start_offset = start_offset
+        self.cached = cached
+
+    def summary(self) -> str:
+        if self.cached:
+            return f"{format_bytes(self.total_size or 0)} served from the local file cache in {self.elapsed * 1000:.0f} ms"
+        mode = "range request" if self.ranged else "full download"
+        return f"{format_bytes(self.bytes_transferred)} transferred in {self.elapsed * 1000:.0f} ms ({mode})"
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def parse_content_range(headers) -> tuple[int | None, int | None, int | None]:
+    """
+    Parse a Content-Range header into (start, end, total). Missing parts are None.
+    """
+    match = CONTENT_RANGE_PATTERN.search(headers.get("Content-Range", ""))
+    if not match:
+        return None, None, None
+    start, end, total = match.groups()
+    return (
+        int(start) if start else None,
+        int(end) if end else None,
+        int(total) if total and total != "*" else None,
+    )
+
+def take_last_lines(data: bytes, lines: int, drop_partial_first: bool) -> bytes:
+    parts = data.split(b"\n")
+    if drop_partial_first and len(parts) > 1:
+        parts = parts[1:]
+    if parts and parts[-1] == b"":
+        parts = parts[:-1]
+    return b"\n".join(parts[-lines:]) + (b"\n" if parts else b"")
+
+class LogFetcher:
+    """
+    Fetches server log files through the panel's signed download URLs, using HTTP Range requests
+    to read only the tail of a file or the bytes added since the last fetch. Falls back to streaming
+    (and discarding what isn't needed) when the file server ignores ranges.
+    Whole-file reads go through the shared FileCache when one is given; read offsets are kept in the
+    config SQLite DB when a config is given, so they survive a restart.
+    """
+    def __init__(self, api_manager, cache=None, config=None):
+        self.api_manager = api_manager
+        self.cache = cache
+        self.offsets = {}
+        self.conn = config.conn if config else None
+        if self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS log_fetch_offsets (
+                    server_id TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    PRIMARY KEY (server_id, path)
+                )
+            """)
+            self.conn.commit()
+
+    async def get_signed_url(self, server_id: str, path: str) -> str:
+        file_info = await self.api_manager.make_request(
+            f"{self.api_manager.base_url}/servers/{server_id}/files/download?file={quote(path)}"
+        )
+        signed_url = file_info.get("attributes", {}).get("url")
+        if not signed_url:
+            raise Exception("Failed to get signed URL for the log file.")
+        return signed_url
+
+    def _remember(self, server_id: str, path: str, size: int | None):
+        if size is None:
+            return
+        self.offsets[(server_id, path)] = size
+        if self.conn:
+            self.conn.execute(
+                "INSERT INTO log_fetch_offsets (server_id, path, offset) VALUES (?, ?, ?) "
+                "ON CONFLICT(server_id, path) DO UPDATE SET offset = excluded.offset",
+                (server_id, path, size)
+            )
+            self.conn.commit()
+
+    def _saved_offset(self, server_id: str, path: str) -> int | None:
+        offset = self.offsets.get((server_id, path))
+        if offset is None and self.conn:
+            row = self.conn.execute(
+                "SELECT offset FROM log_fetch_offsets WHERE server_id = ? AND path = ?", (server_id, path)
+            ).fetchone()
+            if row:
+                offset = self.offsets[(server_id, path)] = row[0]
+        return offset
+
+    async def stat(self, server_id: str, path: str) -> tuple[int, str] | None:
+        """
+        Return (size, modified_at) for a file from the panel's directory listing, or None if it isn't listed.
+        """
+        directory, name = posixpath.split(path.strip("/"))
+        listing = await self.api_manager.make_request(
+            f"{self.api_manager.base_url}/servers/{server_id}/files/list?directory={quote('/' + directory)}"
+        )
+        for entry in listing.get("data", []):
+            attributes = entry.get("attributes", {})
+            if attributes.get("name") == name and attributes.get("is_file", True):
+                return attributes.get("size", 0), attributes.get("modified_at", "")
+        return None
+
+    async def open_chunks(self, server_id: str, path: str) -> tuple[bool, object]:
+        """
+        Open the whole file as an async iterator of chunks. Served from the file cache when the panel
+        reports the same size and modified time as a cached copy; otherwise downloaded and cached on
+        the way through. Returns (cache_hit, chunks).
+        """
+        if self.cache is None:
+            return False, self.iter_chunks(server_id, path)
+        try:
+            stat = await self.stat(server_id, path)
+        except Exception as e:
+            logger.warning(f"Could not stat {path} on {server_id}, bypassing the file cache: {e}")
+            stat = None
+        if stat is None:
+            return False, self.iter_chunks(server_id, path)
+        cached_path = self.cache.get(server_id, path, *stat)
+        if cached_path:
+            return True, self._read_cached(cached_path)
+        return False, self.iter_chunks(server_id, path, stat)
+
+    @staticmethod
+    async def _read_cached(cached_path: str):
+        with open(cached_path, "rb") as f:
+            while block := f.read(TAIL_CHUNK_BYTES):
+                yield block
+
+    async def iter_chunks(self, server_id: str, path: str, cache_stat: tuple[int, str] | None = None):
+        """
+        Async generator over the whole file's body, written to the file cache under `cache_stat`
+        (size, modified) when given. Closing it early aborts the download (and discards the partial
+        cache entry).
+        """
+        cache_writer = None
+        completed = False
+        try:
+            url = await self.get_signed_url(server_id, path)
+            if cache_stat is not None:
+                cache_writer = self.cache.writer(server_id, path, *cache_stat)
+            async with aclosing(self.api_manager.stream_file(url)) as stream:
+                await anext(stream)
+                async for chunk in stream:
+                    if cache_writer:
+                        cache_writer.write(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            if cache_writer:
+                cache_writer.commit() if completed else cache_writer.abort()
+
+    async def fetch_full(self, server_id: str, path: str, sink=None) -> LogFetchResult:
+        """
+        Download the whole file. With an async `sink` callable, chunks are awaited into it as they
+        arrive instead of being kept in memory, so a slow sink slows the download down.
+        """
+        started = time.monotonic()
+        chunks = []
+        size = 0
+        cache_hit, source = await self.open_chunks(server_id, path)
+        async with aclosing(source) as stream:
+            async for chunk in stream:
+                size += len(chunk)
+                if sink:
+                    await sink(chunk)
+                else:
+                    chunks.append(chunk)
+        self._remember(server_id, path, size)
+        return LogFetchResult(b"".join(chunks), 0 if cache_hit else size, time.monotonic() - started, size,
+                              ranged=False, cached=cache_hit)
+
+    async def fetch_tail(self, server_id: str, path: str, lines: int) -> LogFetchResult:
+        """
+        Fetch the last `lines` lines, reading backwards from the end of the file in growing ranges.
+        """
+        started = time.monotonic()
+        url = await self.get_signed_url(server_id, path)
+        transferred = 0
+        chunk_size = TAIL_CHUNK_BYTES
+        data = b""
+        start = None
+        total = None
+        while True:
+            range_header = f"bytes=-{chunk_size}" if start is None else f"bytes={max(start - chunk_size, 0)}-{start - 1}"
+            async with aclosing(self.api_manager.stream_file(url, range_header)) as stream:
+                status, headers = await anext(stream)
+                if status == 416:
+                    self._remember(server_id, path, 0)
+                    return LogFetchResult(b"", transferred, time.monotonic() - started, 0, ranged=True)
+                if status == 200:
+                    # No range support: stream the whole file, keeping only the last lines
+                    tail, size = await self._stream_tail(stream, lines)
+                    self._remember(server_id, path, size)
+                    return LogFetchResult(tail, transferred + size, time.monotonic() - started, size, ranged=False)
+                body = b"".join([chunk async for chunk in stream])
+            transferred += len(body)
+            range_start, _, range_total = parse_content_range(headers)
+            total = range_total if total is None else total
+            start = range_start if range_start is not None else 0
+            data = body + data
+            if start == 0 or data.count(b"\n") > lines:
+                break
+            chunk_size = min(chunk_size * 2, MAX_TAIL_CHUNK_BYTES)
+        self._remember(server_id, path, total)
+        return LogFetchResult(take_last_lines(data, lines, drop_partial_first=start > 0), transferred,
+                              time.monotonic() - started, total, ranged=True, start_offset=start)
+
+    @staticmethod
+    async def _stream_tail(stream, lines: int) -> tuple[bytes, int]:
+        kept = deque(maxlen=lines)
+        pending = b""
+        size = 0
+        async for chunk in stream:
+            size += len(chunk)
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+            kept.extend(complete)
+        if pending:
+            kept.append(pending)
+        return b"\n".join(kept) + (b"\n" if kept else b""), size
+
+    async def fetch_since_last(self, server_id: str, path: str, first_lines: int | None = None) -> LogFetchResult:
+        """
+        Fetch only the bytes appended since the previous fetch of this file. If the file shrank
+        (rotated or truncated) it is read again from the start. With no saved offset yet, only the
+        last `first_lines` lines (FIRST_SINCE_LINES by default) are fetched.
+        """
+        offset = self._saved_offset(server_id, path)
+        if offset is None:
+            return await self.fetch_tail(server_id, path, first_lines or FIRST_SINCE_LINES)
+        started = time.monotonic()
+        url = await self.get_signed_url(server_id, path)
+        async with aclosing(self.api_manager.stream_file(url, f"bytes={offset}-")) as stream:
+            status, headers = await anext(stream)
+            if status == 416:
+                _, _, total = parse_content_range(headers)
+                if total is not None and total < offset:
+                    logger.info(f"Log {path} on {server_id} shrank below the saved offset, reading from the start.")
+                    self._remember(server_id, path, 0)
+                    return await self.fetch_since_last(server_id, path)
+                return LogFetchResult(b"", 0, time.monotonic() - started, total, ranged=True, start_offset=offset)
+
+            chunks = []
+            transferred = 0
+            position = 0
+            skip = offset if status == 200 else 0
+            async for chunk in stream:
+                transferred += len(chunk)
+                if position + len(chunk) > skip:
+                    chunks.append(chunk[max(skip - position, 0):])
+                position += len(chunk)
+        data = b"".join(chunks)
+        if status == 200:
+            if position < offset:
+                logger.info(f"Log {path} on {server_id} shrank below the saved offset, reading from the start.")
+                self._remember(server_id, path, 0)
+                return await self.fetch_since_last(server_id, path)
+            total = position
+        else:
+            _, _, total = parse_content_range(headers)
+            total = total if total is not None else offset + len(data)
+        self._remember(server_id, path, total)
+        return LogFetchResult(data, transferred, time.monotonic() - started, total,
+                              ranged=status == 206, start_offset=offset)
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import deque
+from helper.log_fetcher import LogFetcher
+from helper.logger import logger
+
+POLL_INTERVAL = 5.0
+MAX_POLL_BACKOFF = 60.0
+FLUSH_INTERVAL = 3.0
+# Discord allows about 5 messages per 5 seconds per channel; stay well under it
+MAX_MESSAGES_PER_FLUSH = 2
+MESSAGE_LIMIT = 2000
+MAX_BUFFERED_LINES = 2000
+INITIAL_TAIL_LINES = 20
+
+def pack_lines(lines: list[str], limit: int = MESSAGE_LIMIT) -> list[str]:
+    """
+    Pack log lines into code-block messages no longer than `limit` characters.
+    Overlong lines are truncated.
+    """
+    overhead = len("```\n```")
+    messages = []
+    current = []
+    size = 0
+    for line in lines:
+        line = line.replace("```", "`​``")
+        if len(line) > limit - overhead - 1:
+            line = line[:limit - overhead - 4] + "..."
+        if current and size + len(line) + 1 > limit - overhead:
+            messages.append("```\n" + "\n".join(current) + "```")
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        messages.append("```\n" + "\n".join(current) + "```")
+    return messages
+
+class LogFollower:
+    """
+    One Discord thread following a log. Lines are buffered and flushed on an interval.
+    """
+    def __init__(self, thread, key: tuple[str, str], expires_at: float):
+        self.thread = thread
+        self.key = key
+        self.expires_at = expires_at
+        self.buffer = deque(maxlen=MAX_BUFFERED_LINES)
+        self.dropped = 0
+        self.task = None
+
+    def push(self, lines: list[str]):
+        overflow = len(self.buffer) + len(lines) - MAX_BUFFERED_LINES
+        if overflow > 0:
+            self.dropped += overflow
+        self.buffer.extend(lines)
+
+class LogFollowManager:
+    """
+    Runs a single upstream reader per (server, log file) and fans new lines out to every follower.
+    The reader polls with offset-based range fetches and stops once nobody follows the file.
+    """
+    def __init__(self, api_manager):
+        self.fetcher = LogFetcher(api_manager)
+        self.readers = {}
+        self.followers = {}
+
+    def is_following(self, thread_id: int) -> bool:
+        return thread_id in self.followers
+
+    async def follow(self, server_id: str, path: str, thread, duration: float):
+        key = (server_id, path)
+        follower = LogFollower(thread, key, time.monotonic() + duration)
+        self.followers[thread.id] = follower
+        follower.task = asyncio.create_task(self._flush_loop(follower))
+        reader = self.readers.get(key)
+        if reader is None or reader["task"].done():
+            reader = {"followers": set(), "task": None}
+            self.readers[key] = reader
+            reader["followers"].add(thread.id)
+            reader["task"] = asyncio.create_task(self._read_loop(key))
+        else:
+            reader["followers"].add(thread.id)
+        logger.info(f"Following {path} on {server_id} in thread {thread.id} ({len(reader['followers'])} follower(s)).")
+
+    async def unfollow(self, thread_id: int, reason: str = "stopped") -> bool:
+        follower = self.followers.pop(thread_id, None)
+        if follower is None:
+            return False
+        reader = self.readers.get(follower.key)
+        if reader:
+            reader["followers"].discard(thread_id)
+        if follower.task and follower.task is not asyncio.current_task():
+            follower.task.cancel()
+        try:
+            await self._flush(follower)
+            await follower.thread.send(f"⏹️ Log follow {reason}.")
+            await follower.thread.edit(archived=True)
+        except Exception as e:
+            logger.warning(f"Failed to close log follow thread {thread_id}: {e}")
+        return True
+
+    async def unfollow_server(self, server_id: str) -> int:
+        thread_ids = [tid for tid, f in self.followers.items() if f.key[0] == server_id]
+        for thread_id in thread_ids:
+            await self.unfollow(thread_id)
+        return len(thread_ids)
+
+    async def close(self):
+        for thread_id in list(self.followers):
+            await self.unfollow(thread_id, reason="stopped (bot shutting down)")
+        for reader in self.readers.values():
+            reader["task"].cancel()
+        self.readers.clear()
+
+    async def _read_loop(self, key: tuple[str, str]):
+        server_id, path = key
+        reader = self.readers[key]
+        delay = POLL_INTERVAL
+        pending = ""
+        try:
+            result = await self.fetcher.fetch_tail(server_id, path, INITIAL_TAIL_LINES)
+            initial = result.data.decode("utf-8", errors="replace").splitlines()
+            for thread_id in list(reader["followers"]):
+                if thread_id in self.followers:
+                    self.followers[thread_id].push(initial)
+        except Exception as e:
+            logger.warning(f"Initial fetch for log follow {path} on {server_id} failed: {e}")
+
+        while reader["followers"]:
+            await asyncio.sleep(delay)
+            try:
+                result = await self.fetcher.fetch_since_last(server_id, path)
+                delay = POLL_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = min(delay * 2, MAX_POLL_BACKOFF)
+                logger.warning(f"Log follow poll for {path} on {server_id} failed, retrying in {delay:.0f}s: {e}")
+                continue
+            if not result.data:
+                continue
+            text = pending + result.data.decode("utf-8", errors="replace")
+            *lines, pending = text.split("\n")
+            if lines:
+                for thread_id in list(reader["followers"]):
+                    follower = self.followers.get(thread_id)
+                    if follower:
+                        follower.push(lines)
+        if self.readers.get(key) is reader:
+            del self.readers[key]
+        logger.info(f"Stopped reading {path} on {server_id}, no followers left.")
+
+    async def _flush(self, follower: LogFollower):
+        lines = list(follower.buffer)
+        follower.buffer.clear()
+        if follower.dropped:
+            lines.insert(0, f"... {follower.dropped} line(s) skipped to keep up ...")
+            follower.dropped = 0
+        messages = pack_lines(lines)
+        if len(messages) > MAX_MESSAGES_PER_FLUSH:
+            # Send what the rate budget allows and keep the rest for the next flush
+            remaining = sum(m.count("\n") for m in messages[MAX_MESSAGES_PER_FLUSH:])
+            follower.buffer.extendleft(reversed(lines[-remaining:]))
+            messages = messages[:MAX_MESSAGES_PER_FLUSH]
+        for message in messages:
+            await follower.thread.send(message)
+
+    async def _flush_loop(self, follower: LogFollower):
+        try:
+            while True:
+                await asyncio.sleep(FLUSH_INTERVAL)
+                if time.monotonic() >= follower.expires_at:
+                    await self.unfollow(follower.thread.id, reason="timed out")
+                    return
+                if follower.buffer or follower.dropped:
+                    try:
+                        await self._flush(follower)
+                    except Exception as e:
+                        logger.warning(f"Failed to post log lines to thread {follower.thread.id}: {e}")
+        except asyncio.CancelledError:
+            pass
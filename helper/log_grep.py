@@ -0,0 +1,154 @@
+import asyncio
+import queue
+import re
+import time
+from collections import deque
+from contextlib import aclosing
+from helper.log_fetcher import format_bytes
+
+QUEUE_CHUNKS = 16
+MAX_LINE_BYTES = 1024 * 1024
+DISPLAY_LINE_CHARS = 300
+
+class GrepMatch:
+    def __init__(self, line_no: int, line: bytes, before: list[tuple[int, bytes]]):
+        self.line_no = line_no
+        self.line = line
+        self.before = before
+        self.after = []
+
+    def render(self) -> str:
+        rows = [(no, line, "-") for no, line in self.before]
+        rows.append((self.line_no, self.line, ":"))
+        rows.extend((self.line_no + i + 1, line, "-") for i, line in enumerate(self.after))
+        rendered = []
+        for no, line, sep in rows:
+            text = line.decode("utf-8", errors="replace").rstrip("\r")
+            if len(text) > DISPLAY_LINE_CHARS:
+                text = text[:DISPLAY_LINE_CHARS] + "..."
+            rendered.append(f"{no}{sep} {text}")
+        return "\n".join(rendered)
+
+class LogGrep:
+    """
+    Streaming regex search over a log, run in a worker thread so the event loop only moves bytes.
+    Memory stays constant: chunks pass through a bounded queue, and only the previous `context` lines
+    are kept besides the matches. Chunks without a match are skipped with a single regex search over
+    the whole chunk instead of per-line work. Stops as soon as `max_matches` matches (with their trailing
+    context) are collected, which also aborts the download.
+    """
+    def __init__(self, pattern: str, context: int = 0, max_matches: int = 20, ignore_case: bool = False):
+        # MULTILINE so ^ and $ also match at the line breaks inside a block, as they do per line
+        self.regex = re.compile(pattern.encode("utf-8"), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        # \A and \Z only match at the ends of a block, so the block prefilter could miss their lines
+        self._prefilter = not re.search(r"\\[AZ]", pattern)
+        self.context = context
+        self.max_matches = max_matches
+        self.matches = []
+        self.lines = 0
+        self.bytes_scanned = 0
+        self.elapsed = 0.0
+        self.done = False
+        self._before = deque(maxlen=context)
+        self._open = []
+        self._pending = b""
+
+    def feed(self, chunk: bytes):
+        self.bytes_scanned += len(chunk)
+        data = self._pending + chunk
+        cut = data.rfind(b"\n")
+        if cut == -1:
+            if len(data) < MAX_LINE_BYTES:
+                self._pending = data
+                return
+            # A single line this long is scanned as-is rather than buffered without bound
+            block, self._pending = data, b""
+        else:
+            block, self._pending = data[:cut], data[cut + 1:]
+        self._scan(block)
+
+    def _scan(self, block: bytes):
+        if not self._open and self._prefilter and not self.regex.search(block):
+            self.lines += block.count(b"\n") + 1
+            if self.context:
+                start = self.lines - min(self.context, block.count(b"\n") + 1) + 1
+                self._before.extend(enumerate(block.rsplit(b"\n", self.context)[-self.context:], start))
+            return
+        for line in block.split(b"\n"):
+            self.lines += 1
+            if self._open:
+                for match in self._open:
+                    match.after.append(line)
+                self._open = [m for m in self._open if len(m.after) < self.context]
+            if len(self.matches) < self.max_matches and self.regex.search(line):
+                match = GrepMatch(self.lines, line, list(self._before))
+                self.matches.append(match)
+                if self.context:
+                    self._open.append(match)
+            elif len(self.matches) >= self.max_matches and not self._open:
+                self.done = True
+                return
+            if self.context:
+                self._before.append((self.lines, line))
+        if len(self.matches) >= self.max_matches and not self._open:
+            self.done = True
+
+    def finish(self):
+        if self._pending and not self.done:
+            block, self._pending = self._pending, b""
+            self._scan(block)
+        self.done = True
+
+    def _consume(self, chunks: queue.Queue):
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if not self.done:
+                self.feed(chunk)
+        self.finish()
+
+    @staticmethod
+    async def _put(chunks: queue.Queue, worker, item) -> bool:
+        """
+        Queue an item for the worker, giving up (returning False) if the worker has exited.
+        """
+        while not worker.done():
+            try:
+                chunks.put_nowait(item)
+                return True
+            except queue.Full:
+                pass
+            try:
+                await asyncio.to_thread(chunks.put, item, True, 0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def run(self, stream) -> "LogGrep":
+        """
+        Scan an async iterator of byte chunks (e.g. LogFetcher.iter_chunks) in a worker thread.
+        """
+        started = time.monotonic()
+        chunks = queue.Queue(maxsize=QUEUE_CHUNKS)
+        worker = asyncio.get_running_loop().run_in_executor(None, self._consume, chunks)
+        try:
+            async with aclosing(stream) as source:
+                async for chunk in source:
+                    if self.done or not await self._put(chunks, worker, chunk):
+                        break
+        finally:
+            await self._put(chunks, worker, None)
+            await worker
+            self.elapsed = time.monotonic() - started
+        return self
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        stopped = ", stopped early" if len(self.matches) >= self.max_matches else ""
+        return (f"{len(self.matches)} match(es) in {self.lines:,} lines ({format_bytes(self.bytes_scanned)}) "
+                f"in {self.elapsed:.2f}s, {self.lines_per_second:,.0f} lines/s{stopped}")
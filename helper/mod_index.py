@@ -0,0 +1,222 @@
+import asyncio
+import re
+import time
+from datetime import datetime
+from urllib.parse import quote
+from helper.get_game import get_game_name_and_data
+from helper.logger import logger
+
+INDEX_TTL_SECONDS = 300
+CRAWL_CONCURRENCY = 8
+MAX_DEPTH = 6
+MAX_DIRECTORIES = 500
+
+def parse_modified(modified_at: str | None) -> int | None:
+    if not modified_at:
+        return None
+    try:
+        return int(datetime.fromisoformat(modified_at.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return None
+
+async def get_mods_layout(api_manager, server_id: str) -> dict | None:
+    """
+    Return {"dirs": [...], "disabled_suffix": str} for a server's game, or None when it has no mods directory.
+    """
+    game_info = await get_game_name_and_data(api_manager, server_id)
+    if not game_info:
+        return None
+    _, game_data = game_info
+    dirs = [d.strip().strip("/") for d in game_data.get("mods_dirs") or [game_data.get("mods_dir", "")] if d and d.strip()]
+    if not dirs:
+        return None
+    return {"dirs": dirs, "disabled_suffix": game_data.get("mods_disabled_suffix") or ".disabled"}
+
+class ModIndex:
+    """
+    Per-server index of everything under the game's mods directories, crawled recursively with the
+    subdirectories of each level listed concurrently. Snapshots are reused for INDEX_TTL_SECONDS and
+    dropped after any rename; concurrent requests for the same server share a single crawl. A crawl
+    that was in flight when the server was invalidated is neither joined nor stored.
+
+    Each entry: {"path", "name", "dir", "size", "modified", "is_file", "disabled"} with `path` relative
+    to the server root (e.g. "mods/optional/Foo.jar").
+    """
+    def __init__(self, api_manager):
+        self.api_manager = api_manager
+        self.snapshots = {}
+        self._inflight = {}
+        self._generations = {}
+
+    async def _list_directory(self, server_id: str, directory: str) -> list[dict]:
+        url = f"{self.api_manager.base_url}/servers/{server_id}/files/list?directory={quote('/' + directory)}"
+        response = await self.api_manager.make_request(url)
+        return [file["attributes"] for file in response.get("data", []) if "attributes" in file]
+
+    async def _crawl(self, server_id: str, layout: dict) -> dict:
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(CRAWL_CONCURRENCY)
+        suffix = layout["disabled_suffix"]
+        entries = []
+        level = list(layout["dirs"])
+        visited = 0
+        truncated = False
+
+        async def list_one(directory: str):
+            async with semaphore:
+                try:
+                    return directory, await self._list_directory(server_id, directory)
+                except Exception as e:
+                    logger.warning(f"Failed to list mods directory /{directory} on {server_id}: {e}")
+                    return directory, []
+
+        for depth in range(MAX_DEPTH + 1):
+            if not level:
+                break
+            if visited + len(level) > MAX_DIRECTORIES:
+                level = level[:MAX_DIRECTORIES - visited]
+                truncated = True
+            visited += len(level)
+            next_level = []
+            for directory, files in await asyncio.gather(*(list_one(d) for d in level)):
+                for f in files:
+                    name = f.get("name", "")
+                    is_file = f.get("is_file", False)
+                    path = f"{directory}/{name}"
+                    entries.append({
+                        "path": path,
+                        "name": name,
+                        "dir": directory,
+                        "size": f.get("size", 0),
+                        "modified": parse_modified(f.get("modified_at")),
+                        "is_file": is_file,
+                        "disabled": is_file and name.endswith(suffix),
+                    })
+                    if not is_file and not f.get("is_symlink", False):
+                        if depth < MAX_DEPTH:
+                            next_level.append(path)
+                        else:
+                            truncated = True
+            level = next_level
+            if truncated:
+                break
+
+        entries.sort(key=lambda e: e["path"].lower())
+        elapsed = time.monotonic() - started
+        logger.info(f"Indexed {len(entries)} mod entries in {visited} director(ies) for {server_id} in {elapsed:.2f}s")
+        return {
+            "built": time.time(),
+            "dirs": layout["dirs"],
+            "disabled_suffix": suffix,
+            "entries": entries,
+            "directories": visited,
+            "truncated": truncated,
+        }
+
+    async def get(self, server_id: str, layout: dict, refresh: bool = False) -> dict:
+        """
+        Return the server's mod snapshot, crawling when there is none, it expired, the layout changed
+        or `refresh` is set.
+        """
+        snapshot = self.snapshots.get(server_id)
+        if (not refresh and snapshot and time.time() - snapshot["built"] < INDEX_TTL_SECONDS
+                and snapshot["dirs"] == layout["dirs"] and snapshot["disabled_suffix"] == layout["disabled_suffix"]):
+            return snapshot
+        generation = self._generations.get(server_id, 0)
+        task = self._inflight.get(server_id)
+        if task is None:
+            task = asyncio.ensure_future(self._crawl(server_id, layout))
+            self._inflight[server_id] = task
+            task.add_done_callback(lambda done: self._forget_crawl(server_id, done))
+        snapshot = await asyncio.shield(task)
+        if self._generations.get(server_id, 0) == generation:
+            # A crawl that was running when the server was invalidated may predate the change
+            self.snapshots[server_id] = snapshot
+        return snapshot
+
+    def _forget_crawl(self, server_id: str, task: asyncio.Future):
+        if self._inflight.get(server_id) is task:
+            del self._inflight[server_id]
+
+    def invalidate(self, server_id: str):
+        """
+        Drop the server's snapshot and detach any crawl in flight, so neither is served again.
+        """
+        self._generations[server_id] = self._generations.get(server_id, 0) + 1
+        self.snapshots.pop(server_id, None)
+        self._inflight.pop(server_id, None)
+
+MOD_EXTENSIONS = (".jar", ".dll", ".zip", ".pak", ".lua")
+LOADER_TOKENS = {"mc", "forge", "fabric", "neoforge", "quilt", "bukkit", "spigot", "paper", "universal", "all"}
+VERSION_TOKEN = re.compile(r"^(?:v|r|mc)?\d")
+
+def normalize_mod_name(name: str, suffix: str) -> str:
+    """
+    Reduce a mod filename to its identity, dropping the disabled suffix, extension, versions and loader tags:
+    'JustEnoughItems-1.20.1-forge-15.2.0.27.jar.disabled' -> 'justenoughitems'.
+    The name ends at the first version or loader token after its first token, which is always kept, so
+    'fabric-api-0.92.0+1.20.1.jar' stays 'fabric-api' rather than collapsing into 'forge-api' as 'api'.
+    """
+    base = name.lower()
+    if suffix and base.endswith(suffix.lower()):
+        base = base[:-len(suffix)]
+    for extension in MOD_EXTENSIONS:
+        if base.endswith(extension):
+            base = base[:-len(extension)]
+            break
+    tokens = []
+    for token in re.split(r"[-_+\s]+", base):
+        if not token:
+            continue
+        if tokens and (VERSION_TOKEN.match(token) or token in LOADER_TOKENS):
+            break
+        tokens.append(token)
+    return "-".join(tokens) or base
+
+def mod_inventory(snapshot: dict) -> dict[str, list[dict]]:
+    """
+    Group a snapshot's files by normalized mod name.
+    """
+    inventory = {}
+    suffix = snapshot["disabled_suffix"]
+    for entry in snapshot["entries"]:
+        if entry["is_file"]:
+            inventory.setdefault(normalize_mod_name(entry["name"], suffix), []).append(entry)
+    return inventory
+
+def diff_inventories(base: dict[str, list[dict]], other: dict[str, list[dict]],
+                     base_suffix: str, other_suffix: str) -> dict[str, list]:
+    """
+    Compare two mod inventories (see mod_inventory). Returns lists keyed by:
+      missing  - mods on base but not on other
+      extra    - mods on other but not on base
+      disabled - (mod, disabled on base, disabled on other) where only one side has it disabled
+      version  - (mod, base filenames, other filenames) where the files differ by name
+      changed  - (mod, filename) with the same filename but a different size
+    """
+    def enabled_name(entry: dict, suffix: str) -> str:
+        return entry["name"][:-len(suffix)] if entry["disabled"] else entry["name"]
+
+    base_keys, other_keys = base.keys(), other.keys()
+    result = {
+        "missing": sorted(base_keys - other_keys),
+        "extra": sorted(other_keys - base_keys),
+        "disabled": [],
+        "version": [],
+        "changed": [],
+    }
+    for key in sorted(base_keys & other_keys):
+        base_entries, other_entries = base[key], other[key]
+        base_disabled = all(e["disabled"] for e in base_entries)
+        other_disabled = all(e["disabled"] for e in other_entries)
+        if base_disabled != other_disabled:
+            result["disabled"].append((key, base_disabled, other_disabled))
+        base_files = {enabled_name(e, base_suffix): e for e in base_entries}
+        other_files = {enabled_name(e, other_suffix): e for e in other_entries}
+        if base_files.keys() != other_files.keys():
+            result["version"].append((key, sorted(base_files), sorted(other_files)))
+            continue
+        for filename, entry in base_files.items():
+            if entry["size"] != other_files[filename]["size"]:
+                result["changed"].append((key, filename))
+    return result
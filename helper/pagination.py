@@ -0,0 +1,77 @@
+import discord
+
+PAGE_CHAR_LIMIT = 3800
+VIEW_TIMEOUT = 300
+
+def paginate_lines(lines: list[str], limit: int = PAGE_CHAR_LIMIT, max_lines: int = 40) -> list[str]:
+    """
+    Group lines into page bodies of at most `limit` characters and `max_lines` lines.
+    """
+    pages = []
+    current = []
+    size = 0
+    for line in lines:
+        if current and (size + len(line) + 1 > limit or len(current) >= max_lines):
+            pages.append("\n".join(current))
+            current, size = [], 0
+        current.append(line[:limit])
+        size += len(line) + 1
+    if current:
+        pages.append("\n".join(current))
+    return pages or [""]
+
+class PaginatedEmbedView(discord.ui.View):
+    """
+    Previous/next buttons over a list of embeds. Buttons are disabled once the view times out.
+    """
+    def __init__(self, pages: list[discord.Embed], timeout: float = VIEW_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.index = 0
+        self.message = None
+        for number, page in enumerate(pages, start=1):
+            footer = f"Page {number}/{len(pages)}"
+            if page.footer and page.footer.text:
+                footer = f"{page.footer.text} • {footer}"
+            page.set_footer(text=footer)
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.index >= len(self.pages) - 1
+
+    async def send(self, interaction: discord.Interaction, **kwargs):
+        """
+        Send the first page as the interaction response (or followup if already deferred).
+        Single-page lists are sent without buttons.
+        """
+        view = self if len(self.pages) > 1 else discord.utils.MISSING
+        if interaction.response.is_done():
+            self.message = await interaction.followup.send(embed=self.pages[0], view=view, wait=True, **kwargs)
+        else:
+            await interaction.response.send_message(embed=self.pages[0], view=view, **kwargs)
+            self.message = await interaction.original_response()
+        if len(self.pages) <= 1:
+            self.stop()
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.index = max(self.index - 1, 0)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.pages[self.index], view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.index = min(self.index + 1, len(self.pages) - 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.pages[self.index], view=self)
+
+    async def on_timeout(self):
+        if self.message is None or len(self.pages) <= 1:
+            return
+        self.previous_page.disabled = True
+        self.next_page.disabled = True
+        try:
+            await self.message.edit(view=self)
+        except discord.HTTPException:
+            pass
@@ -1,6 +1,14 @@
 from helper.api_manager import APIManager
 from helper.logger import logger
 
+def parse_player(attr: dict) -> dict:
+    return {
+        "id": attr.get("id"),
+        "username": attr.get("username", "Unknown"),
+        "status": attr.get("status", "unknown"),
+        "last_seen": attr.get("last_seen"),
+    }
+
 async def fetch_full_player_list(api_manager: APIManager, server_id: str) -> list[dict]:
     """
     Fetches all players across all pages from the API.
@@ -19,13 +27,7 @@ async def fetch_full_player_list(api_manager: APIManager, server_id: str) -> lis
         if not data:
             break
         for player_obj in data:
-            attr = player_obj.get("attributes", {})
-            players.append({
-                "id": attr.get("id"),
-                "username": attr.get("username", "Unknown"),
-                "status": attr.get("status", "unknown"),
-                "last_seen": attr.get("last_seen"),
-            })
+            players.append(parse_player(player_obj.get("attributes", {})))
         pagination = response.get("meta", {}).get("pagination", {})
         total_pages = pagination.get("total_pages", 1)
         if page >= total_pages:
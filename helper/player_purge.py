@@ -0,0 +1,184 @@
+import asyncio
+import time
+from helper.api_manager import APIError
+from helper.logger import logger
+
+PURGE_CONCURRENCY = 8
+PROGRESS_INTERVAL = 5
+CHECKPOINT_EVERY = 25
+MAX_ATTEMPTS = 3
+
+class PurgeStore:
+    """
+    Checkpoints of running player purges in the config SQLite DB, so a purge interrupted by a restart
+    carries on with the players it hadn't deleted yet.
+
+    Tables:
+        player_purges       - one row per server with a purge in progress, and where its progress message is
+        player_purge_items  - every player selected for the purge: pending, done or failed (with the error)
+    """
+    def __init__(self, config):
+        self.conn = config.conn
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS player_purges (
+                server_id TEXT PRIMARY KEY,
+                server_name TEXT NOT NULL,
+                label TEXT NOT NULL,
+                channel_id TEXT,
+                message_id TEXT,
+                started REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS player_purge_items (
+                server_id TEXT NOT NULL,
+                player_id TEXT NOT NULL,
+                username TEXT,
+                state TEXT NOT NULL DEFAULT 'pending',
+                error TEXT,
+                PRIMARY KEY (server_id, player_id)
+            );
+        """)
+        self.conn.commit()
+
+    def create(self, server_id: str, server_name: str, label: str, players: list[dict]):
+        self.conn.execute("DELETE FROM player_purge_items WHERE server_id = ?", (server_id,))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO player_purges (server_id, server_name, label, started) VALUES (?, ?, ?, ?)",
+            (server_id, server_name, label, time.time())
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO player_purge_items (server_id, player_id, username) VALUES (?, ?, ?)",
+            [(server_id, str(p["id"]), p.get("username")) for p in players if p.get("id") is not None]
+        )
+        self.conn.commit()
+
+    def set_message(self, server_id: str, channel_id, message_id):
+        self.conn.execute(
+            "UPDATE player_purges SET channel_id = ?, message_id = ? WHERE server_id = ?",
+            (str(channel_id), str(message_id), server_id)
+        )
+        self.conn.commit()
+
+    def jobs(self) -> list[dict]:
+        rows = self.conn.execute(
+            "SELECT server_id, server_name, label, channel_id, message_id FROM player_purges"
+        ).fetchall()
+        keys = ("server_id", "server_name", "label", "channel_id", "message_id")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def pending(self, server_id: str) -> list[tuple[str, str]]:
+        return self.conn.execute(
+            "SELECT player_id, username FROM player_purge_items WHERE server_id = ? AND state = 'pending'",
+            (server_id,)
+        ).fetchall()
+
+    def counts(self, server_id: str) -> dict[str, int]:
+        rows = self.conn.execute(
+            "SELECT state, COUNT(*) FROM player_purge_items WHERE server_id = ? GROUP BY state", (server_id,)
+        ).fetchall()
+        return {"pending": 0, "done": 0, "failed": 0, **dict(rows)}
+
+    def mark(self, server_id: str, results: list[tuple[str, str, str | None]]):
+        """
+        Record (player_id, state, error) outcomes.
+        """
+        self.conn.executemany(
+            "UPDATE player_purge_items SET state = ?, error = ? WHERE server_id = ? AND player_id = ?",
+            [(state, error, server_id, player_id) for player_id, state, error in results]
+        )
+        self.conn.commit()
+
+    def failures(self, server_id: str, limit: int = 10) -> list[tuple[str, str]]:
+        return self.conn.execute(
+            "SELECT username, error FROM player_purge_items WHERE server_id = ? AND state = 'failed' LIMIT ?",
+            (server_id, limit)
+        ).fetchall()
+
+    def finish(self, server_id: str):
+        self.conn.execute("DELETE FROM player_purge_items WHERE server_id = ?", (server_id,))
+        self.conn.execute("DELETE FROM player_purges WHERE server_id = ?", (server_id,))
+        self.conn.commit()
+
+class PlayerPurge:
+    """
+    Deletes a server's pending purge players with PURGE_CONCURRENCY concurrent requests. Every request
+    still goes through the API manager's shared rate limiter, so a purge can't starve the other loops.
+
+    A player that is already gone (404) counts as deleted. While the API manager is blocked after a 429
+    the workers wait the block out instead of burning attempts; other errors are retried up to
+    MAX_ATTEMPTS times. Outcomes are checkpointed every CHECKPOINT_EVERY players and when the purge stops,
+    and `on_progress(counts)` is awaited every PROGRESS_INTERVAL seconds.
+    """
+    def __init__(self, api_manager, store: PurgeStore, server_id: str, player_store=None, on_progress=None):
+        self.api_manager = api_manager
+        self.store = store
+        self.server_id = server_id
+        self.player_store = player_store
+        self.on_progress = on_progress
+        self._results = []
+        self.counts = store.counts(server_id)
+
+    def _checkpoint(self):
+        if not self._results:
+            return
+        results, self._results = self._results, []
+        self.store.mark(self.server_id, results)
+        if self.player_store is not None:
+            self.player_store.remove(self.server_id, [pid for pid, state, _ in results if state == "done"])
+
+    def _record(self, player_id: str, state: str, error: str | None = None):
+        self._results.append((player_id, state, error))
+        self.counts["pending"] -= 1
+        self.counts[state] += 1
+        if len(self._results) >= CHECKPOINT_EVERY:
+            self._checkpoint()
+
+    async def _delete(self, player_id: str, username: str):
+        url = f"{self.api_manager.base_url}/servers/{self.server_id}/player/{player_id}"
+        attempt = 0
+        while True:
+            try:
+                await self.api_manager.make_request(url, method="DELETE")
+                self._record(player_id, "done")
+                return
+            except Exception as e:
+                if isinstance(e, APIError) and e.status == 404:
+                    self._record(player_id, "done")
+                    return
+                blocked_for = self.api_manager.rate_limited_for
+                if blocked_for > 0:
+                    await asyncio.sleep(blocked_for)
+                    continue
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS:
+                    logger.warning(f"Failed to delete player {username} from {self.server_id}: {e}")
+                    self._record(player_id, "failed", str(e)[:200])
+                    return
+                await asyncio.sleep(2 ** attempt)
+
+    async def _report_progress(self):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            self._checkpoint()
+            if self.on_progress:
+                try:
+                    await self.on_progress(dict(self.counts))
+                except Exception as e:
+                    logger.warning(f"Failed to report purge progress for {self.server_id}: {e}")
+
+    async def run(self) -> dict[str, int]:
+        queue = asyncio.Queue()
+        for player_id, username in self.store.pending(self.server_id):
+            queue.put_nowait((player_id, username))
+
+        async def worker():
+            while not queue.empty():
+                player_id, username = queue.get_nowait()
+                await self._delete(player_id, username)
+
+        reporter = asyncio.create_task(self._report_progress())
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(PURGE_CONCURRENCY, queue.qsize()))))
+        finally:
+            reporter.cancel()
+            self._checkpoint()
+        return dict(self.counts)
@@ -0,0 +1,410 @@
+import asyncio
+import time
+from datetime import datetime
+from helper.logger import logger
+from helper.player_list import parse_player
+
+DAY = 86400
+EVENT_RETENTION_SECONDS = 90 * DAY
+DAILY_RETENTION_SECONDS = 366 * DAY
+# Longer gaps between two syncs (bot down, loop stalled) end open sessions instead of counting as playtime.
+# The gap grows with the sync interval (ACCRUAL_GAP_INTERVALS missed syncs) but is never shorter than this.
+MAX_ACCRUAL_GAP = 900
+ACCRUAL_GAP_INTERVALS = 3
+# A full crawl of every page also picks up players deleted on the panel and status changes the
+# incremental sync can't see (e.g. a join that didn't move the player to the first page)
+FULL_SYNC_SECONDS = 3600
+SYNC_CONCURRENCY = 4
+
+def parse_timestamp(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+def is_online(status: str | None) -> bool:
+    return str(status or "").lower() == "online"
+
+class PlayerStore:
+    """
+    Local copy of each server's panel player list plus the join/leave events found by diffing syncs,
+    stored in the config SQLite DB.
+
+    Tables:
+        players            - one row per (server, player): username, status, last_seen, first_seen
+                             (first_seen is 0 for players already on the panel when tracking started)
+        player_events      - join/leave transitions observed between two syncs
+        player_sync        - per server: time of the last sync and last full sync, panel player total
+        player_sessions    - contiguous online intervals per player, end is NULL while ongoing
+        player_daily       - per server per UTC day per player: online seconds
+        player_daily_peak  - per server per UTC day: most players seen online at once
+    Reports read the daily summaries and sessions, never the raw player rows.
+    """
+    def __init__(self, config, max_accrual_gap: float = MAX_ACCRUAL_GAP):
+        self.conn = config.conn
+        self.max_accrual_gap = max_accrual_gap
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS players (
+                server_id TEXT NOT NULL,
+                player_id TEXT NOT NULL,
+                username TEXT NOT NULL,
+                status TEXT,
+                last_seen REAL,
+                first_seen REAL NOT NULL,
+                PRIMARY KEY (server_id, player_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_players_server_status ON players (server_id, status);
+            CREATE TABLE IF NOT EXISTS player_events (
+                server_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                player_id TEXT NOT NULL,
+                username TEXT,
+                type TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_player_events_server_ts ON player_events (server_id, ts);
+            CREATE TABLE IF NOT EXISTS player_sync (
+                server_id TEXT PRIMARY KEY,
+                synced REAL NOT NULL,
+                full_synced REAL NOT NULL,
+                total INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS player_sessions (
+                server_id TEXT NOT NULL,
+                player_id TEXT NOT NULL,
+                start REAL NOT NULL,
+                end REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_player_sessions_server_start ON player_sessions (server_id, start);
+            CREATE INDEX IF NOT EXISTS idx_player_sessions_open ON player_sessions (server_id, player_id, end);
+            CREATE TABLE IF NOT EXISTS player_daily (
+                server_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                player_id TEXT NOT NULL,
+                seconds REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (server_id, day, player_id)
+            );
+            CREATE TABLE IF NOT EXISTS player_daily_peak (
+                server_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                peak INTEGER NOT NULL,
+                PRIMARY KEY (server_id, day)
+            );
+        """)
+        self.conn.commit()
+
+    def load(self, server_id: str) -> dict[str, tuple]:
+        """
+        Return {player_id: (username, status, last_seen)} for diffing against a fresh page.
+        """
+        rows = self.conn.execute(
+            "SELECT player_id, username, status, last_seen FROM players WHERE server_id = ?", (server_id,)
+        ).fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def sync_state(self, server_id: str) -> dict | None:
+        row = self.conn.execute(
+            "SELECT synced, full_synced, total FROM player_sync WHERE server_id = ?", (server_id,)
+        ).fetchone()
+        return {"synced": row[0], "full_synced": row[1], "total": row[2]} if row else None
+
+    def _accrue(self, server_id: str, player_ids: set[str], start: float, end: float):
+        while start < end:
+            day = int(start // DAY)
+            chunk_end = min(end, (day + 1) * DAY)
+            self.conn.executemany(
+                "INSERT INTO player_daily (server_id, day, player_id, seconds) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(server_id, day, player_id) DO UPDATE SET seconds = seconds + excluded.seconds",
+                [(server_id, day, player_id, chunk_end - start) for player_id in player_ids]
+            )
+            start = chunk_end
+
+    def record_activity(self, server_id: str, previous: float | None, now: float,
+                        online_before: set[str], online_after: set[str]):
+        """
+        Turn two consecutive observations of who is online into playtime, sessions and the daily peak.
+        Players online at the previous sync are credited with the time in between. Written on the next apply().
+        """
+        if previous is not None and 0 < now - previous <= self.max_accrual_gap:
+            self._accrue(server_id, online_before, previous, now)
+            left = online_before - online_after
+            joined = online_after - online_before
+            self.conn.executemany(
+                "UPDATE player_sessions SET end = ? WHERE server_id = ? AND player_id = ? AND end IS NULL",
+                [(now, server_id, player_id) for player_id in left]
+            )
+        else:
+            # First sync, or too long since the last one to know what happened: sessions end where
+            # they were last observed and everyone online now starts a new one
+            self.conn.execute(
+                "UPDATE player_sessions SET end = MAX(start, ?) WHERE server_id = ? AND end IS NULL",
+                (previous or now, server_id)
+            )
+            joined = online_after
+        self.conn.executemany(
+            "INSERT INTO player_sessions (server_id, player_id, start) VALUES (?, ?, ?)",
+            [(server_id, player_id, now) for player_id in joined]
+        )
+        # Zero-second rows so players seen online only once still count as active that day
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO player_daily (server_id, day, player_id) VALUES (?, ?, ?)",
+            [(server_id, int(now // DAY), player_id) for player_id in joined]
+        )
+        self.conn.execute(
+            "INSERT INTO player_daily_peak (server_id, day, peak) VALUES (?, ?, ?) "
+            "ON CONFLICT(server_id, day) DO UPDATE SET peak = MAX(peak, excluded.peak)",
+            (server_id, int(now // DAY), len(online_after))
+        )
+
+    def apply(self, server_id: str, upserts: list[tuple], removed: list[str], events: list[tuple],
+              total: int, now: float, full: bool, baseline: bool = False):
+        """
+        Write one sync's result. `upserts` are (player_id, username, status, last_seen),
+        `events` are (player_id, username, type). With `baseline` (the first sync of a server)
+        new rows get first_seen 0, since those players predate tracking.
+        """
+        first_seen = 0 if baseline else now
+        self.conn.executemany(
+            "INSERT INTO players (server_id, player_id, username, status, last_seen, first_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(server_id, player_id) DO UPDATE SET "
+            "username = excluded.username, status = excluded.status, last_seen = excluded.last_seen",
+            [(server_id, player_id, username, status, last_seen, first_seen)
+             for player_id, username, status, last_seen in upserts]
+        )
+        self.conn.executemany(
+            "DELETE FROM players WHERE server_id = ? AND player_id = ?",
+            [(server_id, player_id) for player_id in removed]
+        )
+        self.conn.executemany(
+            "INSERT INTO player_events (server_id, ts, player_id, username, type) VALUES (?, ?, ?, ?, ?)",
+            [(server_id, now, player_id, username, event_type) for player_id, username, event_type in events]
+        )
+        self.conn.execute(
+            "INSERT INTO player_sync (server_id, synced, full_synced, total) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(server_id) DO UPDATE SET synced = excluded.synced, total = excluded.total, "
+            "full_synced = CASE WHEN ? THEN excluded.full_synced ELSE player_sync.full_synced END",
+            (server_id, now, now if full else 0, total, full)
+        )
+        self.conn.commit()
+
+    def remove(self, server_id: str, player_ids: list[str]):
+        self.conn.executemany(
+            "DELETE FROM players WHERE server_id = ? AND player_id = ?",
+            [(server_id, player_id) for player_id in player_ids]
+        )
+        self.conn.commit()
+
+    def online(self, server_id: str) -> list[str]:
+        rows = self.conn.execute(
+            "SELECT username FROM players WHERE server_id = ? AND status = 'online' ORDER BY username COLLATE NOCASE",
+            (server_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def inactive(self, server_id: str, seen_before: float) -> list[dict]:
+        """
+        Players that are offline and were last seen before `seen_before`.
+        """
+        rows = self.conn.execute(
+            "SELECT player_id, username, last_seen FROM players WHERE server_id = ? AND status != 'online' "
+            "AND last_seen IS NOT NULL AND last_seen < ? ORDER BY last_seen",
+            (server_id, seen_before)
+        ).fetchall()
+        return [{"id": row[0], "username": row[1], "last_seen": row[2]} for row in rows]
+
+    def prune(self, now: float | None = None):
+        now = time.time() if now is None else now
+        self.conn.execute("DELETE FROM player_events WHERE ts < ?", (now - EVENT_RETENTION_SECONDS,))
+        self.conn.execute("DELETE FROM player_sessions WHERE end < ?", (now - EVENT_RETENTION_SECONDS,))
+        oldest_day = int((now - DAILY_RETENTION_SECONDS) // DAY)
+        self.conn.execute("DELETE FROM player_daily WHERE day < ?", (oldest_day,))
+        self.conn.execute("DELETE FROM player_daily_peak WHERE day < ?", (oldest_day,))
+        self.conn.commit()
+
+    def report(self, server_id: str, window_seconds: float, now: float | None = None) -> dict:
+        """
+        Activity summary over the trailing window, at UTC-day resolution: total and average playtime,
+        daily active users, peak concurrency, new vs returning players and session count/length.
+        """
+        now = time.time() if now is None else now
+        since = now - window_seconds
+        first_day = int(since // DAY)
+        daily = self.conn.execute(
+            "SELECT day, COUNT(*), SUM(seconds) FROM player_daily WHERE server_id = ? AND day >= ? GROUP BY day",
+            (server_id, first_day)
+        ).fetchall()
+        active, new = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(p.first_seen >= ?), 0) FROM "
+            "(SELECT DISTINCT player_id FROM player_daily WHERE server_id = ? AND day >= ?) a "
+            "LEFT JOIN players p ON p.server_id = ? AND p.player_id = a.player_id",
+            (since, server_id, first_day, server_id)
+        ).fetchone()
+        observed_days, peak, peak_day = self.conn.execute(
+            "SELECT COUNT(*), MAX(peak), (SELECT day FROM player_daily_peak WHERE server_id = ? AND day >= ? "
+            "ORDER BY peak DESC, day DESC LIMIT 1) FROM player_daily_peak WHERE server_id = ? AND day >= ?",
+            (server_id, first_day, server_id, first_day)
+        ).fetchone()
+        sessions, average_session = self.conn.execute(
+            "SELECT COUNT(*), AVG(end - start) FROM player_sessions "
+            "WHERE server_id = ? AND start >= ? AND end IS NOT NULL",
+            (server_id, since)
+        ).fetchone()
+        total_seconds = sum(row[2] for row in daily)
+        daily_users = [row[1] for row in daily]
+        return {
+            "observed_days": observed_days,
+            "total_playtime": total_seconds,
+            "active_players": active,
+            "average_playtime": total_seconds / active if active else 0.0,
+            "average_dau": sum(daily_users) / observed_days if observed_days else 0.0,
+            "max_dau": max(daily_users, default=0),
+            "peak_concurrency": peak or 0,
+            "peak_day": peak_day * DAY if peak_day is not None else None,
+            "new_players": new,
+            "returning_players": active - new,
+            "sessions": sessions,
+            "average_session": average_session or 0.0,
+        }
+
+class PlayerSync:
+    """
+    Keeps PlayerStore up to date from the panel's paginated player list.
+
+    Pages are compared against the local table as they arrive. An incremental sync stops at the first
+    page that has no changes once it is safe to: the panel total matches the local count, every player
+    the table has as online has been seen again, and the pages so far were ordered by last_seen
+    descending (so the remaining pages only hold players older than this one). Anything else, and a
+    FULL_SYNC_SECONDS timer, falls back to reading every page. Concurrent syncs of one server share a lock.
+    """
+    def __init__(self, api_manager, config, sync_interval: float | None = None):
+        self.api_manager = api_manager
+        max_accrual_gap = max(MAX_ACCRUAL_GAP, ACCRUAL_GAP_INTERVALS * sync_interval) if sync_interval else MAX_ACCRUAL_GAP
+        self.store = PlayerStore(config, max_accrual_gap)
+        self._locks = {}
+        self._online_names = {}
+        self.pages_fetched = 0
+        self.pages_skipped = 0
+
+    async def _fetch_page(self, server_id: str, page: int) -> tuple[list[dict], int, int | None]:
+        url = f"{self.api_manager.base_url}/servers/{server_id}/player?page={page}"
+        response = await self.api_manager.make_request(url)
+        self.pages_fetched += 1
+        players = [parse_player(p.get("attributes", {})) for p in response.get("data", [])]
+        pagination = response.get("meta", {}).get("pagination", {})
+        return players, pagination.get("total_pages", 1), pagination.get("total")
+
+    async def sync_server(self, server_id: str, full: bool = False) -> dict:
+        """
+        Bring one server's table up to date. Returns {"pages", "changed", "joins", "leaves", "full"}.
+        """
+        lock = self._locks.setdefault(server_id, asyncio.Lock())
+        async with lock:
+            return await self._sync(server_id, full)
+
+    async def _sync(self, server_id: str, full: bool) -> dict:
+        now = time.time()
+        state = self.store.sync_state(server_id)
+        full = full or state is None or now - state["full_synced"] >= FULL_SYNC_SECONDS
+        local = self.store.load(server_id)
+        unseen_online = {pid for pid, (_, status, _) in local.items() if is_online(status)}
+        seen = set()
+        upserts = []
+        events = []
+        ordered = True
+        previous_seen = None
+        page = 1
+        total_pages = 1
+        total = None
+        complete = True
+        while True:
+            players, total_pages, total = await self._fetch_page(server_id, page)
+            if not players:
+                break
+            page_changed = False
+            for player in players:
+                player_id = str(player["id"])
+                if player["id"] is None or player_id in seen:
+                    continue
+                seen.add(player_id)
+                unseen_online.discard(player_id)
+                record = (player["username"], str(player["status"]).lower(), parse_timestamp(player["last_seen"]))
+                if record[2] is not None:
+                    if previous_seen is not None and record[2] > previous_seen:
+                        ordered = False
+                    previous_seen = record[2]
+                old = local.get(player_id)
+                if old == record:
+                    continue
+                page_changed = True
+                upserts.append((player_id, *record))
+                was_online = bool(old) and is_online(old[1])
+                if is_online(record[1]) and not was_online:
+                    events.append((player_id, record[0], "join"))
+                elif was_online and not is_online(record[1]):
+                    events.append((player_id, record[0], "leave"))
+            if page >= total_pages:
+                break
+            new_players = sum(1 for pid, _, _, _ in upserts if pid not in local)
+            if (not full and not page_changed and ordered and not unseen_online
+                    and total is not None and total == len(local) + new_players):
+                complete = False
+                self.pages_skipped += total_pages - page
+                break
+            page += 1
+
+        removed = []
+        if complete:
+            # Every page was read, so anything missing was deleted on the panel
+            removed = [pid for pid in local if pid not in seen]
+            for pid in removed:
+                if is_online(local[pid][1]):
+                    events.append((pid, local[pid][0], "leave"))
+        count = total if total is not None else len(local) + len(upserts) - len(removed)
+        online_before = {pid for pid, (_, status, _) in local.items() if is_online(status)}
+        online_after = set(online_before)
+        for player_id, _, status, _ in upserts:
+            if is_online(status):
+                online_after.add(player_id)
+            else:
+                online_after.discard(player_id)
+        online_after.difference_update(removed)
+        self.store.record_activity(server_id, state["synced"] if state else None, now, online_before, online_after)
+        self.store.apply(server_id, upserts, removed, events, count, now, complete, baseline=state is None)
+        names = {pid: username for pid, (username, _, _) in local.items()}
+        names.update({pid: username for pid, username, _, _ in upserts})
+        self._online_names[server_id] = sorted((names[pid] for pid in online_after if names.get(pid)), key=str.lower)
+        joins = sum(1 for event in events if event[2] == "join")
+        return {
+            "pages": page,
+            "changed": len(upserts) + len(removed),
+            "joins": joins,
+            "leaves": len(events) - joins,
+            "full": complete,
+        }
+
+    def online_names(self, server_id: str) -> list[str]:
+        """
+        Usernames online at the last sync, from memory (read from the table once per server).
+        """
+        if server_id not in self._online_names:
+            self._online_names[server_id] = self.store.online(server_id)
+        return self._online_names[server_id]
+
+    async def sync(self, server_ids: list[str]) -> dict:
+        semaphore = asyncio.Semaphore(SYNC_CONCURRENCY)
+
+        async def run(server_id: str) -> dict | None:
+            async with semaphore:
+                try:
+                    return await self.sync_server(server_id)
+                except Exception as e:
+                    logger.warning(f"Player sync failed for {server_id}: {e}")
+                    return None
+
+        results = [r for r in await asyncio.gather(*(run(server_id) for server_id in server_ids)) if r]
+        summary = {key: sum(r[key] for r in results) for key in ("pages", "changed", "joins", "leaves")}
+        if summary["changed"]:
+            logger.info(f"Player sync: {summary['pages']} page(s) from {len(results)} server(s), "
+                        f"{summary['changed']} change(s), {summary['joins']} join(s), {summary['leaves']} leave(s)")
+        return summary
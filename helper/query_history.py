@@ -0,0 +1,79 @@
+import time
+import numpy as np
+
+RETENTION_SECONDS = 30 * 86400
+
+class QueryHistory:
+    """
+    Compact time-series of Steam Query results (player count and ping) per server,
+    stored in the config SQLite DB. A failed poll is stored with NULL players/ping.
+    """
+    def __init__(self, config):
+        self.conn = config.conn
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS query_samples (
+                server_id TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                players INTEGER,
+                ping REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_query_samples_server_ts ON query_samples (server_id, ts);
+        """)
+        self.conn.commit()
+
+    def record(self, server_id: str, players: int | None, ping: float | None, ts: float | None = None):
+        ts = time.time() if ts is None else ts
+        self.conn.execute(
+            "INSERT INTO query_samples (server_id, ts, players, ping) VALUES (?, ?, ?, ?)",
+            (server_id, int(ts), players, None if ping is None else round(ping, 1))
+        )
+
+    def flush(self):
+        self.conn.commit()
+
+    def prune(self, now: float | None = None):
+        now = time.time() if now is None else now
+        self.conn.execute("DELETE FROM query_samples WHERE ts < ?", (int(now - RETENTION_SECONDS),))
+        self.conn.commit()
+
+    def report(self, server_id: str, window_seconds: float, now: float | None = None) -> dict:
+        """
+        Summary over the trailing window: samples, availability, peak players (and when),
+        busiest hour of day (UTC, by average players) and ping percentiles.
+        """
+        now = time.time() if now is None else now
+        rows = self.conn.execute(
+            "SELECT ts, players, ping FROM query_samples WHERE server_id = ? AND ts >= ? ORDER BY ts",
+            (server_id, int(now - window_seconds))
+        ).fetchall()
+        if not rows:
+            return {"samples": 0}
+        data = np.array([(ts, np.nan if p is None else p, np.nan if g is None else g) for ts, p, g in rows],
+                        dtype=np.float64)
+        ts, players, ping = data[:, 0], data[:, 1], data[:, 2]
+        answered = ~np.isnan(players)
+        report = {
+            "samples": len(rows),
+            "responded_pct": float(answered.mean() * 100),
+            "peak_players": None,
+            "peak_at": None,
+            "busiest_hour": None,
+            "ping_p50": None,
+            "ping_p95": None,
+            "ping_p99": None,
+        }
+        if answered.any():
+            peak_index = int(np.nanargmax(players))
+            report["peak_players"] = int(players[peak_index])
+            report["peak_at"] = int(ts[peak_index])
+            hours = (ts[answered] // 3600 % 24).astype(np.int64)
+            totals = np.bincount(hours, weights=players[answered], minlength=24)
+            counts = np.bincount(hours, minlength=24)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                averages = np.where(counts > 0, totals / counts, -1)
+            busiest = int(np.argmax(averages))
+            report["busiest_hour"] = (busiest, float(averages[busiest]))
+        pings = ping[~np.isnan(ping)]
+        if pings.size:
+            report["ping_p50"], report["ping_p95"], report["ping_p99"] = np.percentile(pings, [50, 95, 99]).tolist()
+        return report
@@ -0,0 +1,65 @@
+import numpy as np
+
+HISTORY_METRICS = ("mem_pct", "cpu_pct", "disk_pct")
+DEFAULT_CAPACITY = 1440  # 6 hours at the stats loop's 15 second interval
+
+class ResourceHistory:
+    """
+    Fixed-size ring buffer of resource samples for the whole fleet, stored as one
+    metrics × servers × time float32 array so detectors can work on every server at once.
+    Missing samples (offline server, failed fetch) are stored as NaN.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._rows = {}
+        self._server_ids = []
+        self._data = np.full((len(HISTORY_METRICS), 0, capacity), np.nan, dtype=np.float32)
+        self._timestamps = np.full(capacity, np.nan, dtype=np.float64)
+        self._cursor = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def server_ids(self) -> list[str]:
+        return list(self._server_ids)
+
+    def _row_for(self, server_id: str) -> int:
+        row = self._rows.get(server_id)
+        if row is None:
+            row = len(self._server_ids)
+            self._rows[server_id] = row
+            self._server_ids.append(server_id)
+            padding = np.full((len(HISTORY_METRICS), 1, self.capacity), np.nan, dtype=np.float32)
+            self._data = np.concatenate([self._data, padding], axis=1)
+        return row
+
+    def record(self, timestamp: float, samples: dict[str, dict]):
+        """
+        Append one stats loop tick. `samples` maps server ID to {"mem_pct": ..., "cpu_pct": ..., "disk_pct": ...}.
+        Servers without a sample this tick get NaN.
+        """
+        for server_id in samples:
+            self._row_for(server_id)
+        column = self._cursor
+        self._data[:, :, column] = np.nan
+        for server_id, sample in samples.items():
+            row = self._rows[server_id]
+            for m, metric in enumerate(HISTORY_METRICS):
+                value = sample.get(metric)
+                if value is not None:
+                    self._data[m, row, column] = value
+        self._timestamps[column] = timestamp
+        self._cursor = (self._cursor + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def window(self, metric: str, length: int | None = None) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """
+        Return (server_ids, servers × time matrix, timestamps) in chronological order,
+        limited to the most recent `length` samples.
+        """
+        length = self._count if length is None else min(length, self._count)
+        m = HISTORY_METRICS.index(metric)
+        idx = (self._cursor - length + np.arange(length)) % self.capacity
+        return self.server_ids, self._data[m][:, idx], self._timestamps[idx]
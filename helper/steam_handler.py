@@ -1,80 +1,196 @@
-from helper.get_game import get_game_name_and_data
-from helper.logger import logger
-from helper.utilities import resolve_server
-from steam.game_servers import a2s_info
 import asyncio
+from helper.get_game import detect_game
+from helper.logger import logger
+from helper.a2s import A2SClient
+
+# Shared by every query so all A2S traffic goes through a single UDP socket
+a2s_client = A2SClient(timeout=2)
+FLEET_QUERY_CONCURRENCY = 16
+FLEET_QUERY_TIMEOUT = 2.0
+# Consecutive failed probes before the endpoint is resolved again from the panel
+FAILURES_BEFORE_RESOLVE = 3
+
+# Resolved query endpoints keyed by server ID:
+# { "game": str, "ip": str, "port": int, "offset": int, "query_port": int } or None when the game can't be queried
+_endpoint_cache = {}
+# Consecutive failed probes, the last game port a server reported and its last panel state (from the
+# stats loop), per server ID
+_query_failures = {}
+_reported_ports = {}
+_server_states = {}
+
+def get_default_allocation(attributes: dict) -> dict | None:
+    allocations = attributes.get("relationships", {}).get("allocations", {}).get("data", [])
+    for alloc in allocations:
+        alloc_attrs = alloc.get("attributes", {})
+        if alloc_attrs.get("is_default", False):
+            return alloc_attrs
+    return None
 
-async def query_server(api_manager, panel_config, server_input):
+def build_query_endpoint(attributes: dict) -> dict | None:
     """
-    Query a server's Steam Query info given a server ID or partial name.
-    Returns tuple (Steam Query info dict, ip, port) or None.
+    Work out the Steam Query endpoint from a server's panel attributes (docker image + default allocation).
+    Returns None if the game is unknown, doesn't support Steam Query, or has no usable allocation.
     """
-    resolved = resolve_server(panel_config, server_input)
-    if not resolved:
-        logger.warning(f"Could not resolve server from input '{server_input}'")
+    match = detect_game(attributes.get("docker_image", ""))
+    if not match:
+        return None
+    game_name, game_data = match
+    steam_settings = game_data.get("steam", {})
+    if not steam_settings.get("query", False):
+        return None
+    default_allocation = get_default_allocation(attributes)
+    if not default_allocation:
         return None
-
-    server_id, server_name = resolved
-
     try:
-        game_info = await get_game_name_and_data(api_manager, server_name)
-        if not game_info:
-            logger.warning(f"Game data not found for server '{server_name}'")
-            return None
-
-        game_name, game_data = game_info
-
-        steam_settings = game_data.get("steam", {})
-        if not steam_settings.get("query", False):
-            logger.info(f"Steam Query not supported for game '{game_name}'")
-            return None
+        port_offset = int(steam_settings.get("port", 0))
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid port offset for game '{game_name}', defaulting to 0")
+        port_offset = 0
+    ip = default_allocation.get("ip")
+    base_port = default_allocation.get("port")
+    if not ip or not base_port:
+        return None
+    return {
+        "game": game_name,
+        "ip": ip,
+        "port": base_port,
+        "offset": port_offset,
+        "query_port": base_port + port_offset,
+    }
 
-        url = f"{api_manager.base_url}?filter[name]={server_name}"
-        response = await api_manager.make_request(url)
-        server_list = response.get("data", [])
-        if not server_list:
-            logger.warning(f"No server data found for '{server_name}'")
-            return None
-        server = server_list[0]
-        allocations = server.get("attributes", {}).get("relationships", {}).get("allocations", {}).get("data", [])
-        if not allocations:
-            logger.warning(f"No allocations found for server '{server_name}'")
-            return None
+def refresh_query_endpoint(server_id: str, attributes: dict):
+    """
+    Rebuild a server's endpoint from freshly fetched attributes (e.g. from the stats loop) without an extra API call.
+    Keeps the cache in step with allocation and egg changes.
+    """
+    endpoint = build_query_endpoint(attributes)
+    cached = _endpoint_cache.get(server_id)
+    if server_id in _endpoint_cache and cached != endpoint:
+        logger.info(f"Query endpoint changed for server {server_id}, cache updated.")
+    _endpoint_cache[server_id] = endpoint
 
-        default_allocation = None
-        for alloc in allocations:
-            alloc_attrs = alloc.get("attributes", {})
-            if alloc_attrs.get("is_default", False):
-                default_allocation = alloc_attrs
-                break
+def invalidate_query_endpoint(server_id: str | None = None):
+    if server_id is None:
+        _endpoint_cache.clear()
+        _query_failures.clear()
+    else:
+        _endpoint_cache.pop(server_id, None)
+        _query_failures.pop(server_id, None)
 
-        if not default_allocation:
-            logger.warning(f"No valid allocation found for server '{server_name}'")
-            return None
+def note_server_state(server_id: str, state: str | None):
+    """
+    Record the panel's current_state for a server (from the stats loop), so failed probes of a server
+    the panel reports as stopped don't trigger a new endpoint lookup.
+    """
+    _server_states[server_id] = state
 
-        ip = default_allocation.get("ip")
-        base_port = default_allocation.get("port")
-        try:
-            port_offset = int(steam_settings.get("port", 0))
-        except (ValueError, TypeError):
-            logger.warning(f"Invalid port offset for game '{game_name}', defaulting to 0")
-            port_offset = 0
-        query_port = base_port + port_offset
+def record_query_result(server_id: str, info: dict | None):
+    """
+    Decide from a probe's outcome whether the cached endpoint is still trustworthy. A timeout usually just
+    means the server is offline, so the endpoint is only resolved again when the game port the server
+    reports changes between answers, or after FAILURES_BEFORE_RESOLVE consecutive failures while the panel
+    doesn't report it as stopped. Repeat queries of a stopped server never reach the panel.
+    """
+    if info is not None:
+        _query_failures.pop(server_id, None)
+        reported_port = info.get("port")
+        previous_port = _reported_ports.get(server_id)
+        if reported_port:
+            _reported_ports[server_id] = reported_port
+        if reported_port and previous_port and reported_port != previous_port:
+            logger.info(f"Server {server_id} now reports game port {reported_port} instead of {previous_port}, "
+                        f"resolving its query endpoint again.")
+            invalidate_query_endpoint(server_id)
+        return
+    failures = _query_failures.get(server_id, 0) + 1
+    state = _server_states.get(server_id)
+    if failures >= FAILURES_BEFORE_RESOLVE and state in (None, "running"):
+        # The allocation may have moved; resolve again on the next query
+        invalidate_query_endpoint(server_id)
+    else:
+        _query_failures[server_id] = failures
 
-        if not ip or not query_port:
-            logger.warning(f"Invalid IP or port for server '{server_name}'")
-            return None
+async def resolve_query_endpoint(api_manager, server_id: str) -> dict | None:
+    """
+    Return the cached query endpoint for a server, resolving it with a single panel API call on a cache miss.
+    """
+    if server_id in _endpoint_cache:
+        return _endpoint_cache[server_id]
+    response = await api_manager.make_request(f"{api_manager.base_url}/servers/{server_id}")
+    endpoint = build_query_endpoint(response.get("attributes", {}))
+    _endpoint_cache[server_id] = endpoint
+    return endpoint
 
-        query_addr = (ip, query_port)
-        try:
-            loop = asyncio.get_running_loop()
-            info = await loop.run_in_executor(None, lambda: a2s_info(query_addr, timeout=2))
-            logger.info(f"Query ran successfully for server %s - %s:%s", server_id, ip, query_port)
-            return info, ip, query_port
-        except Exception as e:
-            logger.error(f"Query failed for server %s - %s:%s - %s", server_id, ip, query_port, e)
-            return None
+async def query_server(api_manager, server_id: str, server_name: str):
+    """
+    Query a server's Steam Query info given an already resolved server ID.
+    Returns tuple (Steam Query info dict, ip, port) or None.
+    """
+    try:
+        endpoint = await resolve_query_endpoint(api_manager, server_id)
+    except Exception as e:
+        logger.error(f"Error resolving query endpoint for server '{server_name}': {e}")
+        return None
+    if not endpoint:
+        logger.info(f"Steam Query not supported or no valid allocation for server '{server_name}'")
+        return None
 
+    ip, query_port = endpoint["ip"], endpoint["query_port"]
+    try:
+        info = await a2s_client.info((ip, query_port))
+        logger.info(f"Query ran successfully for server %s - %s:%s", server_id, ip, query_port)
+        record_query_result(server_id, info)
+        return info, ip, query_port
     except Exception as e:
-        logger.error(f"Error querying Steam server: {e}")
+        logger.error(f"Query failed for server %s - %s:%s - %s", server_id, ip, query_port, e)
+        record_query_result(server_id, None)
         return None
+
+async def query_servers(api_manager, servers: list[tuple[str, str]], game: str | None = None,
+                        concurrency: int = FLEET_QUERY_CONCURRENCY, timeout: float = FLEET_QUERY_TIMEOUT,
+                        spread: float = 0) -> list[dict]:
+    """
+    Query many servers concurrently, at most `concurrency` at a time, each bounded by `timeout`.
+    With `spread` > 0, probe start times are staggered evenly over that many seconds instead of bursting.
+    Servers whose game doesn't support Steam Query (or doesn't match `game`) are left out.
+    Returns a list of {"server_id", "server_name", "game", "ip", "port", "status", "info"} where status is
+    "ok", "timeout" or "error".
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    game_filter = game.strip().lower() if game else None
+
+    async def probe(index: int, server_id: str, server_name: str) -> dict | None:
+        if spread > 0:
+            await asyncio.sleep(spread * index / len(servers))
+        async with semaphore:
+            try:
+                endpoint = await resolve_query_endpoint(api_manager, server_id)
+            except Exception as e:
+                logger.warning(f"Could not resolve query endpoint for '{server_name}': {e}")
+                return None
+            if not endpoint or (game_filter and game_filter not in endpoint["game"].lower()):
+                return None
+            result = {
+                "server_id": server_id,
+                "server_name": server_name,
+                "game": endpoint["game"],
+                "ip": endpoint["ip"],
+                "port": endpoint["query_port"],
+                "status": "ok",
+                "info": None,
+            }
+            try:
+                result["info"] = await a2s_client.info((endpoint["ip"], endpoint["query_port"]), timeout=timeout)
+            except (TimeoutError, asyncio.TimeoutError):
+                result["status"] = "timeout"
+            except Exception as e:
+                logger.warning(f"Query failed for server {server_id} - {endpoint['ip']}:{endpoint['query_port']} - {e}")
+                result["status"] = "error"
+            record_query_result(server_id, result["info"])
+            return result
+
+    results = await asyncio.gather(*(
+        probe(index, server_id, server_name) for index, (server_id, server_name) in enumerate(servers)
+    ))
+    return [r for r in results if r]
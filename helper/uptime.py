@@ -0,0 +1,143 @@
+import time
+from helper.logger import logger
+
+HOUR = 3600
+MAX_ACCRUAL_GAP = 120  # Seconds; longer gaps between observations (bot down, loop stalled) are not counted
+
+class UptimeTracker:
+    """
+    Records server state transitions from the stats loop and keeps hourly availability summaries.
+
+    Tables (in the config SQLite DB):
+        state_events   - one row per state change (server_id, ts, state)
+        uptime_hourly  - per server per hour: observed/running seconds, crash and restart counts
+        outages        - contiguous non-running spans, end is NULL while ongoing
+    Reports read the hourly summaries and outage spans, never the raw events.
+    """
+    def __init__(self, config):
+        self.conn = config.conn
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS state_events (
+                server_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                state TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_state_events_server_ts ON state_events (server_id, ts);
+            CREATE TABLE IF NOT EXISTS uptime_hourly (
+                server_id TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                observed REAL NOT NULL DEFAULT 0,
+                running REAL NOT NULL DEFAULT 0,
+                crashes INTEGER NOT NULL DEFAULT 0,
+                restarts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (server_id, hour)
+            );
+            CREATE TABLE IF NOT EXISTS outages (
+                server_id TEXT NOT NULL,
+                start REAL NOT NULL,
+                end REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_outages_server_start ON outages (server_id, start);
+        """)
+        self.conn.commit()
+        self._last = {}
+
+    def _last_state(self, server_id: str) -> str | None:
+        row = self.conn.execute(
+            "SELECT state FROM state_events WHERE server_id = ? ORDER BY ts DESC LIMIT 1",
+            (server_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _accrue(self, server_id: str, state: str, start: float, end: float):
+        while start < end:
+            hour = int(start // HOUR)
+            chunk_end = min(end, (hour + 1) * HOUR)
+            elapsed = chunk_end - start
+            self.conn.execute(
+                "INSERT INTO uptime_hourly (server_id, hour, observed, running) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(server_id, hour) DO UPDATE SET "
+                "observed = observed + excluded.observed, running = running + excluded.running",
+                (server_id, hour, elapsed, elapsed if state == "running" else 0)
+            )
+            start = chunk_end
+
+    def _count(self, server_id: str, ts: float, column: str):
+        self.conn.execute(
+            f"INSERT INTO uptime_hourly (server_id, hour, {column}) VALUES (?, ?, 1) "
+            f"ON CONFLICT(server_id, hour) DO UPDATE SET {column} = {column} + 1",
+            (server_id, int(ts // HOUR))
+        )
+
+    def observe(self, server_id: str, state: str, now: float | None = None):
+        """
+        Feed the state seen for a server on this tick. Only state changes are written as events.
+        """
+        now = time.time() if now is None else now
+        state = (state or "offline").lower()
+        previous = self._last.get(server_id)
+        if previous is None:
+            last_state = self._last_state(server_id)
+            self._last[server_id] = (state, now)
+            if last_state != state:
+                self._transition(server_id, last_state, state, now)
+            return
+
+        prev_state, prev_ts = previous
+        if 0 < now - prev_ts <= MAX_ACCRUAL_GAP:
+            self._accrue(server_id, prev_state, prev_ts, now)
+        self._last[server_id] = (state, now)
+        if state != prev_state:
+            self._transition(server_id, prev_state, state, now)
+
+    def _transition(self, server_id: str, old: str | None, new: str, now: float):
+        self.conn.execute(
+            "INSERT INTO state_events (server_id, ts, state) VALUES (?, ?, ?)",
+            (server_id, now, new)
+        )
+        if old == "running" and new == "offline":
+            self._count(server_id, now, "crashes")
+            logger.warning(f"Server {server_id} went from running to offline without stopping.")
+        if new == "starting" and old is not None:
+            self._count(server_id, now, "restarts")
+        if new == "running":
+            self.conn.execute(
+                "UPDATE outages SET end = ? WHERE server_id = ? AND end IS NULL",
+                (now, server_id)
+            )
+        elif old == "running" or old is None:
+            open_outage = self.conn.execute(
+                "SELECT 1 FROM outages WHERE server_id = ? AND end IS NULL", (server_id,)
+            ).fetchone()
+            if not open_outage:
+                self.conn.execute("INSERT INTO outages (server_id, start) VALUES (?, ?)", (server_id, now))
+
+    def flush(self):
+        self.conn.commit()
+
+    def report(self, server_id: str, window_seconds: float, now: float | None = None) -> dict:
+        """
+        Availability summary for a server over the trailing window (hourly resolution).
+        Returns uptime_pct, mtbf (seconds or None), crashes, restarts, longest_outage (seconds), observed (seconds).
+        """
+        now = time.time() if now is None else now
+        start = now - window_seconds
+        observed, running, crashes, restarts = self.conn.execute(
+            "SELECT COALESCE(SUM(observed), 0), COALESCE(SUM(running), 0), "
+            "COALESCE(SUM(crashes), 0), COALESCE(SUM(restarts), 0) "
+            "FROM uptime_hourly WHERE server_id = ? AND hour >= ?",
+            (server_id, int(start // HOUR))
+        ).fetchone()
+        longest = self.conn.execute(
+            "SELECT MAX(MIN(COALESCE(end, ?), ?) - MAX(start, ?)) FROM outages "
+            "WHERE server_id = ? AND start < ? AND (end IS NULL OR end > ?)",
+            (now, now, start, server_id, now, start)
+        ).fetchone()[0]
+        return {
+            "observed": observed,
+            "uptime_pct": (running / observed * 100) if observed else None,
+            "mtbf": (running / crashes) if crashes else None,
+            "crashes": crashes,
+            "restarts": restarts,
+            "longest_outage": max(longest or 0, 0),
+        }
@@ -1,3 +1,6 @@
+import re
+from datetime import timedelta
+from fnmatch import fnmatch
 from typing import Any
 import aiohttp
 import requests
@@ -14,6 +17,58 @@ def is_server_hidden(panel_config, server_id: str) -> bool:
             return server.get("hide", False)
     return False
 
+def find_server_section(config, server_id: str) -> str | None:
+    """
+    Return the config section name (e.g. 'server_3') holding the given server ID.
+    """
+    for key in config.all_sections():
+        if key.startswith("server_") and str(config.get(key, "id", "")).lower() == server_id.lower():
+            return key
+    return None
+
+def get_visible_servers(config) -> list[dict]:
+    """
+    Return the config sections of every server that has an ID and isn't hidden.
+    """
+    servers = []
+    for key in config.all_sections():
+        if not key.startswith("server_"):
+            continue
+        server = config.get_section(key)
+        if server.get("id") and not server.get("hide", False):
+            servers.append(server)
+    return servers
+
+def parse_duration(duration_str: str):
+    """
+    Parse a duration string that may contain multiple time units concatenated,
+    e.g. '2d12h15m', '1 week 3 days', '5h30m', etc.
+    Returns a timedelta or None if invalid.
+    """
+    pattern = re.compile(r"(\d+)\s*(d|w|mo|h|m|day|week|month|hour|minute)s?", re.IGNORECASE)
+    matches = pattern.findall(duration_str)
+    if not matches:
+        return None
+
+    total = timedelta()
+    for value, unit in matches:
+        value = int(value)
+        unit = unit.lower()
+        if unit in ("d", "day"):
+            total += timedelta(days=value)
+        elif unit in ("w", "week"):
+            total += timedelta(weeks=value)
+        elif unit in ("mo", "month"):
+            total += timedelta(days=value * 30)  # Approximate month
+        elif unit in ("h", "hour"):
+            total += timedelta(hours=value)
+        elif unit in ("m", "minute"):
+            total += timedelta(minutes=value)
+        else:
+            pass
+
+    return total if total.total_seconds() > 0 else None
+
 def version_tuple(v: str):
     return tuple(int(x) for x in v.split("."))
 
@@ -58,6 +113,29 @@ def resolve_server(panel_config, input_str: str) -> tuple[str, str] | None:
             return server.get("id", ""), server.get("name", "")
     return None
 
+def resolve_server_targets(panel_config, target: str) -> list[tuple[str, str]]:
+    """
+    Resolve a fleet target to (server_id, server_name) pairs of visible servers. Accepts "all",
+    "tag:<tag>" (or a bare tag), a glob over names and IDs such as "survival-*", or a single server.
+    """
+    target_clean = target.strip().lower()
+    servers = get_visible_servers(panel_config)
+    if target_clean == "all":
+        matched = servers
+    else:
+        tag = target_clean[4:] if target_clean.startswith("tag:") else target_clean
+        matched = [s for s in servers if str(s.get("tag") or "").strip().lower() == tag]
+        if not matched and any(c in target_clean for c in "*?["):
+            matched = [
+                s for s in servers
+                if fnmatch(str(s.get("name", "")).lower(), target_clean) or fnmatch(str(s["id"]).lower(), target_clean)
+            ]
+        if not matched and not target_clean.startswith("tag:"):
+            resolved = resolve_server(panel_config, target)
+            if resolved and not is_server_hidden(panel_config, resolved[0]):
+                return [resolved]
+    return [(s["id"], s.get("name", s["id"])) for s in matched]
+
 async def validate_command_context(interaction, panel_config, control_channel, server_input):
     if str(interaction.channel.id) != str(control_channel):
         return False, None, None, "⚠️ Commands can only be used in the designated control channel."
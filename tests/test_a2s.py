@@ -0,0 +1,238 @@
+import asyncio
+import bz2
+import struct
+import time
+import zlib
+import pytest
+from helper.a2s import A2SClient, A2SError
+
+CHALLENGE = b"\x11\x22\x33\x44"
+
+def info_payload(name: str = "Stand-in", players: int = 3) -> bytes:
+    return (b"\xFF\xFF\xFF\xFF" + b"I" + bytes([17]) + name.encode() + b"\x00" + b"de_dust2\x00" + b"csgo\x00"
+            + b"Counter-Strike\x00" + struct.pack("<H", 730) + bytes([players, 32, 0]) + b"dl" + bytes([0, 1])
+            + b"1.0.0\x00" + bytes([0x80]) + struct.pack("<H", 27015))
+
+def players_payload(count: int) -> bytes:
+    body = b"".join(bytes([i]) + f"player-{i:03d}".encode() + b"\x00" + struct.pack("<lf", i * 10, 60.0 + i)
+                    for i in range(count))
+    return b"\xFF\xFF\xFF\xFF" + b"D" + bytes([count]) + body
+
+def split_packets(payload: bytes, fragment_size: int, compress: bool, packet_id: int = 7) -> list[bytes]:
+    body = bz2.compress(payload) if compress else payload
+    if compress:
+        packet_id |= 0x80000000
+    pieces = [body[i:i + fragment_size] for i in range(0, len(body), fragment_size)]
+    packets = []
+    for number, piece in enumerate(pieces):
+        header = struct.pack("<lLBBH", -2, packet_id, len(pieces), number, 1248)
+        if compress and number == 0:
+            header += struct.pack("<LL", len(payload), zlib.crc32(payload))
+        packets.append(header + piece)
+    return packets
+
+class StandInServer(asyncio.DatagramProtocol):
+    """
+    Answers A2S requests on 127.0.0.1 the way a game server would, with knobs for the awkward cases.
+    """
+    def __init__(self, *, challenge: bool = False, players: int = 2, fragment_size: int = 0,
+                 compress: bool = False, reverse_fragments: bool = False, silent: bool = False, delay: float = 0.0):
+        self.challenge = challenge
+        self.players = players
+        self.fragment_size = fragment_size
+        self.compress = compress
+        self.reverse_fragments = reverse_fragments
+        self.silent = silent
+        self.delay = delay
+        self.requests = []
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        self.requests.append(data)
+        if self.silent:
+            return
+        asyncio.get_running_loop().create_task(self._answer(data, addr))
+
+    async def _answer(self, data: bytes, addr):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        kind = data[4:5]
+        if self.challenge and not data.endswith(CHALLENGE):
+            self._send([b"\xFF\xFF\xFF\xFFA" + CHALLENGE], addr)
+            return
+        payload = info_payload(players=self.players) if kind == b"T" else players_payload(self.players)
+        if self.fragment_size:
+            packets = split_packets(payload, self.fragment_size, self.compress)
+            if self.reverse_fragments:
+                packets.reverse()
+            self._send(packets, addr)
+        else:
+            self._send([payload], addr)
+
+    def _send(self, packets: list[bytes], addr):
+        for packet in packets:
+            self.transport.sendto(packet, addr)
+
+async def start_server(**kwargs) -> tuple[asyncio.DatagramTransport, StandInServer, tuple[str, int]]:
+    server = StandInServer(**kwargs)
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: server, local_addr=("127.0.0.1", 0)
+    )
+    return transport, server, transport.get_extra_info("sockname")[:2]
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_info_without_challenge():
+    async def scenario():
+        transport, server, address = await start_server()
+        client = A2SClient(timeout=1.0)
+        try:
+            info = await client.info(address)
+        finally:
+            await client.close()
+            transport.close()
+        assert info["name"] == "Stand-in"
+        assert info["players"] == 2 and info["max_players"] == 32
+        assert info["port"] == 27015
+        assert info["_ping"] >= 0
+        assert len(server.requests) == 1
+
+    run(scenario())
+
+def test_challenge_handshake_is_replayed():
+    async def scenario():
+        transport, server, address = await start_server(challenge=True, players=4)
+        client = A2SClient(timeout=1.0)
+        try:
+            info = await client.info(address)
+            players = await client.players(address)
+        finally:
+            await client.close()
+            transport.close()
+        assert info["players"] == 4
+        assert [p["name"] for p in players] == [f"player-{i:03d}" for i in range(4)]
+        assert server.requests[1].endswith(CHALLENGE)
+        assert server.requests[2] == b"\xFF\xFF\xFF\xFFU\xFF\xFF\xFF\xFF"
+        assert server.requests[3] == b"\xFF\xFF\xFF\xFFU" + CHALLENGE
+
+    run(scenario())
+
+def test_split_response_is_reassembled():
+    async def scenario():
+        transport, _, address = await start_server(players=60, fragment_size=400)
+        client = A2SClient(timeout=1.0)
+        try:
+            players = await client.players(address)
+        finally:
+            await client.close()
+            transport.close()
+        assert len(players) == 60
+        assert players[59]["name"] == "player-059" and players[59]["score"] == 590
+
+    run(scenario())
+
+def test_bz2_split_response_is_decompressed():
+    async def scenario():
+        transport, _, address = await start_server(players=120, fragment_size=300, compress=True)
+        client = A2SClient(timeout=1.0)
+        try:
+            players = await client.players(address)
+        finally:
+            await client.close()
+            transport.close()
+        assert len(players) == 120
+
+    run(scenario())
+
+def test_out_of_order_fragments():
+    async def scenario():
+        transport, _, address = await start_server(players=60, fragment_size=250, compress=True,
+                                                   reverse_fragments=True)
+        client = A2SClient(timeout=1.0)
+        try:
+            players = await client.players(address)
+        finally:
+            await client.close()
+            transport.close()
+        assert [p["index"] for p in players] == list(range(60))
+
+    run(scenario())
+
+def test_corrupt_compressed_payload_is_rejected():
+    async def scenario():
+        transport, server, address = await start_server()
+        payload = players_payload(5)
+        packets = split_packets(payload, 1000, compress=True)
+        # Same data, wrong CRC
+        packets[0] = packets[0][:12] + struct.pack("<LL", len(payload), zlib.crc32(payload) ^ 1) + packets[0][20:]
+        server.silent = True
+        client = A2SClient(timeout=1.0)
+        try:
+            request = asyncio.ensure_future(client.players(address))
+            while not server.requests:
+                await asyncio.sleep(0.01)
+            for packet in packets:
+                server.transport.sendto(packet, client._transport.get_extra_info("sockname")[:2])
+            with pytest.raises(A2SError):
+                await request
+        finally:
+            await client.close()
+            transport.close()
+
+    run(scenario())
+
+def test_silent_server_times_out():
+    async def scenario():
+        transport, _, address = await start_server(silent=True)
+        client = A2SClient(timeout=0.2)
+        started = time.monotonic()
+        try:
+            with pytest.raises(TimeoutError):
+                await client.info(address)
+        finally:
+            await client.close()
+            transport.close()
+        assert 0.15 <= time.monotonic() - started < 1.0
+        assert client._pending == {}
+
+    run(scenario())
+
+def test_concurrent_queries_to_the_same_host():
+    async def scenario():
+        transport, server, address = await start_server(challenge=True, players=3, delay=0.02)
+        client = A2SClient(timeout=2.0)
+        try:
+            results = await asyncio.gather(
+                *(client.info(address) for _ in range(5)),
+                *(client.players(address) for _ in range(5)),
+            )
+        finally:
+            await client.close()
+            transport.close()
+        infos, player_lists = results[:5], results[5:]
+        assert all(info["name"] == "Stand-in" for info in infos)
+        assert all(len(players) == 3 for players in player_lists)
+        # Each query (and its challenge round) was answered before the next one went out
+        assert len(server.requests) == 20
+
+    run(scenario())
+
+def test_concurrent_queries_to_different_hosts_overlap():
+    async def scenario():
+        servers = [await start_server(delay=0.2) for _ in range(10)]
+        client = A2SClient(timeout=2.0)
+        started = time.monotonic()
+        try:
+            infos = await asyncio.gather(*(client.info(address) for _, _, address in servers))
+        finally:
+            await client.close()
+            for transport, _, _ in servers:
+                transport.close()
+        assert len(infos) == 10
+        assert time.monotonic() - started < 1.0
+
+    run(scenario())
@@ -0,0 +1,72 @@
+import yaml
+from helper.game_catalog import GameCatalog, literal_prefix
+
+def load(tmp_path, games: dict) -> GameCatalog:
+    path = tmp_path / "games.yaml"
+    path.write_text(yaml.safe_dump({"games": games}, sort_keys=False), encoding="utf-8")
+    return GameCatalog(str(path))
+
+def match(catalog: GameCatalog, image: str) -> str | None:
+    result = catalog.match_image(image, "")
+    return result[0] if result else None
+
+def test_glob_and_regex_patterns_match_in_catalog_order(tmp_path):
+    catalog = load(tmp_path, {
+        "Minecraft": {"images": ["ghcr.io/pterodactyl/yolks:java_*"]},
+        "Generic": {"images": ["ghcr.io/*"]},
+        "Rust": {"images": ["re:.*rust.*"]},
+    })
+    assert match(catalog, "ghcr.io/pterodactyl/yolks:java_17") == "Minecraft"
+    assert match(catalog, "ghcr.io/other/thing") == "Generic"
+    assert match(catalog, "docker.io/rust/server") == "Rust"
+    assert match(catalog, "docker.io/unknown") is None
+
+def test_global_flags_keep_the_rest_of_the_catalog(tmp_path):
+    catalog = load(tmp_path, {
+        "Foo": {"images": ["re:(?i)foo.*"]},
+        "Bar": {"images": ["re:bar.*"]},
+    })
+    assert set(catalog.games) == {"Foo", "Bar"}
+    assert match(catalog, "FOOBAR") == "Foo"
+    assert match(catalog, "bar:latest") == "Bar"
+
+def test_numbered_backreference_keeps_its_own_groups(tmp_path):
+    catalog = load(tmp_path, {
+        "First": {"images": ["re:(x)y\\1"]},
+        "Repeat": {"images": ["re:(ab)-\\1"]},
+    })
+    assert match(catalog, "ab-ab") == "Repeat"
+    assert match(catalog, "ab-x") is None
+    assert match(catalog, "xyx") == "First"
+
+def test_standalone_pattern_respects_catalog_order(tmp_path):
+    catalog = load(tmp_path, {
+        "Early": {"images": ["re:(?i)game.*"]},
+        "Late": {"images": ["re:game-server"]},
+    })
+    assert match(catalog, "game-server") == "Early"
+
+def test_invalid_pattern_only_drops_itself(tmp_path):
+    catalog = load(tmp_path, {
+        "Broken": {"images": ["re:foo(", "broken/*"]},
+        "Fine": {"images": ["fine/*"]},
+    })
+    assert match(catalog, "fine/image") == "Fine"
+    assert match(catalog, "broken/image") == "Broken"
+
+def test_top_level_alternation_matches_every_alternative(tmp_path):
+    catalog = load(tmp_path, {
+        "Minecraft": {"images": ["re:itzg/minecraft-server|ghcr.io/foo/mc.*"]},
+    })
+    assert match(catalog, "itzg/minecraft-server") == "Minecraft"
+    assert match(catalog, "ghcr.io/foo/mc:latest") == "Minecraft"
+
+def test_alternation_inside_a_group_keeps_the_prefix():
+    assert literal_prefix("ghcr\\.io/foo/(mc|minecraft).*", True) == "ghcr.io/foo/"
+    assert literal_prefix("itzg/[|]x|y", True) == ""
+
+def test_optional_separator_is_not_part_of_the_prefix(tmp_path):
+    assert literal_prefix("itzg/?foo", True) == "itzg"
+    catalog = load(tmp_path, {"Foo": {"images": ["re:itzg/?foo.*"]}})
+    assert match(catalog, "itzgfoo:latest") == "Foo"
+    assert match(catalog, "itzg/foo:latest") == "Foo"
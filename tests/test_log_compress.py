@@ -0,0 +1,101 @@
+import asyncio
+import gzip
+import os
+import random
+import time
+from helper.log_compress import LogArchiver, QUEUE_CHUNKS
+
+def make_log(size: int) -> bytes:
+    rng = random.Random(1)
+    words = [b"INFO", b"WARN", b"player", b"joined", b"left", b"tick", b"chunk", b"saved", b"error"]
+    lines = []
+    total = 0
+    while total < size:
+        line = b"[12:%02d:%02d] " % (rng.randrange(60), rng.randrange(60)) + b" ".join(
+            rng.choice(words) for _ in range(8)) + b" %d\n" % rng.randrange(10 ** 6)
+        lines.append(line)
+        total += len(line)
+    return b"".join(lines)
+
+def gzip_archiver(path: str, upload_limit: int) -> LogArchiver:
+    archiver = LogArchiver(path, upload_limit)
+    archiver.use_zstd = False
+    archiver.extension = ".gz"
+    return archiver
+
+class SlowWriter:
+    """
+    Wraps a compressor writer so compression is slower than the download.
+    """
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, data: bytes):
+        time.sleep(0.001)
+        self.writer.write(data)
+
+    def close(self):
+        self.writer.close()
+
+def test_small_log_is_kept_raw(tmp_path):
+    async def scenario():
+        archiver = gzip_archiver(str(tmp_path / "latest.log"), 1024 * 1024)
+        await archiver.write(b"hello\n")
+        paths = await archiver.finish()
+        assert paths == [str(tmp_path / "latest.log")]
+        assert not archiver.compressing
+
+    asyncio.run(scenario())
+
+def test_large_log_is_split_into_parts_that_restore_it(tmp_path):
+    data = make_log(6 * 1024 * 1024)
+
+    async def scenario():
+        archiver = gzip_archiver(str(tmp_path / "latest.log"), 1024 * 1024)
+        for start in range(0, len(data), 65536):
+            await archiver.write(data[start:start + 65536])
+        return archiver, await archiver.finish()
+
+    archiver, paths = asyncio.run(scenario())
+    assert archiver.compressing
+    assert all(os.path.getsize(path) <= 1024 * 1024 for path in paths)
+    restored = b"".join(gzip.decompress(open(path, "rb").read()) for path in paths)
+    assert restored == data
+    assert not os.path.exists(tmp_path / "latest.log")
+
+def test_slow_compressor_applies_backpressure(tmp_path):
+    data = make_log(4 * 1024 * 1024)
+    high_water = 0
+
+    class SlowArchiver(LogArchiver):
+        def _open_part(self):
+            out, writer = super()._open_part()
+            return out, SlowWriter(writer)
+
+    async def scenario():
+        nonlocal high_water
+        archiver = SlowArchiver(str(tmp_path / "latest.log"), 256 * 1024)
+        archiver.use_zstd = False
+        archiver.extension = ".gz"
+        for start in range(0, len(data), 8192):
+            await archiver.write(data[start:start + 8192])
+            if archiver._queue is not None:
+                high_water = max(high_water, archiver._queue.qsize())
+        return await archiver.finish()
+
+    paths = asyncio.run(scenario())
+    assert 0 < high_water <= QUEUE_CHUNKS
+    assert b"".join(gzip.decompress(open(path, "rb").read()) for path in paths) == data
+
+def test_part_names_sort_in_order(tmp_path):
+    data = os.urandom(3 * 1024 * 1024)
+
+    async def scenario():
+        archiver = gzip_archiver(str(tmp_path / "latest.log"), 256 * 1024)
+        for start in range(0, len(data), 65536):
+            await archiver.write(data[start:start + 65536])
+        return await archiver.finish()
+
+    paths = asyncio.run(scenario())
+    assert len(paths) >= 10
+    assert sorted(paths) == paths
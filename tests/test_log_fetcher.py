@@ -0,0 +1,122 @@
+import asyncio
+import os
+import pytest
+import sqlite3
+from helper.file_cache import FileCache
+from helper.log_fetcher import LogFetcher
+
+BODY = b"line\n" * 1000
+
+class FakeAPI:
+    base_url = "https://panel.test/api/client"
+
+    def __init__(self, fail_signed_url: bool = False):
+        self.fail_signed_url = fail_signed_url
+
+    async def make_request(self, url, method="GET", payload=None):
+        if "/files/download" in url:
+            if self.fail_signed_url:
+                raise Exception("API request failed: 500 - boom")
+            return {"attributes": {"url": "https://files.test/latest.log"}}
+        return {"data": [{"attributes": {"name": "latest.log", "is_file": True, "size": len(BODY),
+                                         "modified_at": "2026-01-01T00:00:00+00:00"}}]}
+
+    async def stream_file(self, url, range_header=None, chunk_size=65536):
+        yield 200, {}
+        for start in range(0, len(BODY), 1024):
+            yield BODY[start:start + 1024]
+
+def cache_files(cache: FileCache) -> list[str]:
+    return sorted(os.listdir(cache.directory))
+
+async def read_all(fetcher: LogFetcher) -> bytes:
+    result = await fetcher.fetch_full("srv", "logs/latest.log")
+    return result.data
+
+def test_download_is_cached_and_served_again(tmp_path):
+    cache = FileCache(str(tmp_path))
+    fetcher = LogFetcher(FakeAPI(), cache)
+    assert asyncio.run(read_all(fetcher)) == BODY
+    assert len(cache_files(cache)) == 1
+    assert asyncio.run(fetcher.fetch_full("srv", "logs/latest.log")).cached
+
+def test_failed_signed_url_leaves_no_temp_file(tmp_path):
+    cache = FileCache(str(tmp_path))
+    fetcher = LogFetcher(FakeAPI(fail_signed_url=True), cache)
+    with pytest.raises(Exception, match="500"):
+        asyncio.run(read_all(fetcher))
+    assert cache_files(cache) == []
+
+def test_unstarted_generator_opens_nothing(tmp_path):
+    cache = FileCache(str(tmp_path))
+    fetcher = LogFetcher(FakeAPI(), cache)
+
+    async def open_and_close():
+        cache_hit, chunks = await fetcher.open_chunks("srv", "logs/latest.log")
+        assert not cache_hit
+        assert cache_files(cache) == []
+        await chunks.aclose()
+
+    asyncio.run(open_and_close())
+    assert cache_files(cache) == []
+
+def test_early_close_discards_partial_entry(tmp_path):
+    cache = FileCache(str(tmp_path))
+    fetcher = LogFetcher(FakeAPI(), cache)
+
+    async def read_one_chunk():
+        _, chunks = await fetcher.open_chunks("srv", "logs/latest.log")
+        await anext(chunks)
+        await chunks.aclose()
+
+    asyncio.run(read_one_chunk())
+    assert cache_files(cache) == []
+
+class FakeConfig:
+    def __init__(self, conn):
+        self.conn = conn
+
+class RangeAPI(FakeAPI):
+    def __init__(self, body: bytes):
+        super().__init__()
+        self.body = body
+        self.ranges = []
+
+    async def stream_file(self, url, range_header=None, chunk_size=65536):
+        self.ranges.append(range_header)
+        size = len(self.body)
+        spec = range_header.removeprefix("bytes=")
+        if spec.startswith("-"):
+            start = max(size - int(spec[1:]), 0)
+        else:
+            start = int(spec.split("-")[0])
+        if start >= size:
+            yield 416, {"Content-Range": f"bytes */{size}"}
+            return
+        yield 206, {"Content-Range": f"bytes {start}-{size - 1}/{size}"}
+        yield self.body[start:]
+
+def test_since_offset_survives_a_restart():
+    conn = sqlite3.connect(":memory:")
+    api = RangeAPI(BODY)
+    asyncio.run(LogFetcher(api, config=FakeConfig(conn)).fetch_since_last("srv", "logs/latest.log"))
+    api.body += b"new\n"
+    result = asyncio.run(LogFetcher(api, config=FakeConfig(conn)).fetch_since_last("srv", "logs/latest.log"))
+    assert result.data == b"new\n"
+    assert api.ranges[-1] == f"bytes={len(BODY)}-"
+
+def test_first_since_fetch_reads_only_the_tail():
+    api = RangeAPI(BODY * 100)
+    result = asyncio.run(LogFetcher(api).fetch_since_last("srv", "logs/latest.log", 10))
+    assert result.data == b"line\n" * 10
+    assert result.bytes_transferred < len(api.body)
+    assert api.ranges[0].startswith("bytes=-")
+
+def test_rotated_log_is_read_from_the_start():
+    conn = sqlite3.connect(":memory:")
+    api = RangeAPI(BODY)
+    fetcher = LogFetcher(api, config=FakeConfig(conn))
+    asyncio.run(fetcher.fetch_since_last("srv", "logs/latest.log"))
+    api.body = b"fresh\n"
+    result = asyncio.run(fetcher.fetch_since_last("srv", "logs/latest.log"))
+    assert result.data == b"fresh\n"
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+import time
+from helper.log_grep import LogGrep
+
+LOG = b"".join(
+    b"[12:00:%02d] INFO tick %d\n" % (i % 60, i) for i in range(200)
+) + b"Exception in thread main\n    at Foo.bar(Foo.java:1) here\n" + b"[12:01:00] INFO done\n" * 50
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def grep(pattern: str, chunk_size: int = 4096, **kwargs) -> LogGrep:
+    return asyncio.run(LogGrep(pattern, **kwargs).run(chunked(LOG, chunk_size)))
+
+def test_unanchored_pattern_matches():
+    result = grep("Exception")
+    assert [m.line_no for m in result.matches] == [201]
+
+def test_start_anchor_matches_inside_a_block():
+    result = grep("^Exception")
+    assert [m.line for m in result.matches] == [b"Exception in thread main"]
+
+def test_end_anchor_matches_inside_a_block():
+    result = grep("here$")
+    assert [m.line_no for m in result.matches] == [202]
+
+def test_string_anchors_match_per_line():
+    result = grep(r"\AException")
+    assert [m.line_no for m in result.matches] == [201]
+
+def test_anchored_pattern_with_small_chunks_and_context():
+    result = grep("^Exception", chunk_size=7, context=1)
+    assert len(result.matches) == 1
+    assert result.matches[0].before == [(200, b"[12:00:19] INFO tick 199")]
+    assert result.matches[0].after == [b"    at Foo.bar(Foo.java:1) here"]
+
+def test_line_count_with_anchor_and_no_match():
+    result = grep("^Nothing$")
+    assert result.matches == []
+    assert result.lines == 252
+
+class FailingGrep(LogGrep):
+    def feed(self, chunk: bytes):
+        time.sleep(0.2)
+        raise ValueError("bad chunk")
+
+def test_worker_failure_with_a_full_queue_is_raised():
+    with pytest.raises(ValueError, match="bad chunk"):
+        asyncio.run(FailingGrep("Exception").run(chunked(LOG * 20, 16)))
@@ -0,0 +1,80 @@
+import asyncio
+from helper.mod_index import ModIndex, diff_inventories, mod_inventory, normalize_mod_name
+
+LAYOUT = {"dirs": ["mods"], "disabled_suffix": ".disabled"}
+
+class FakeAPI:
+    base_url = "https://panel.test/api/client"
+
+    def __init__(self):
+        self.files = ["Foo.jar"]
+        self.listings = 0
+        self.gate = None
+
+    async def make_request(self, url, method="GET", payload=None):
+        self.listings += 1
+        files = list(self.files)
+        if self.gate is not None:
+            await self.gate.wait()
+        return {"data": [{"attributes": {"name": name, "is_file": True, "size": 1,
+                                         "modified_at": "2026-01-01T00:00:00+00:00"}} for name in files]}
+
+def names(snapshot: dict) -> list[str]:
+    return [entry["name"] for entry in snapshot["entries"]]
+
+def test_snapshot_is_reused_until_invalidated():
+    async def scenario():
+        api = FakeAPI()
+        index = ModIndex(api)
+        await index.get("srv", LAYOUT)
+        await index.get("srv", LAYOUT)
+        assert api.listings == 1
+        api.files = ["Foo.jar.disabled"]
+        index.invalidate("srv")
+        assert names(await index.get("srv", LAYOUT)) == ["Foo.jar.disabled"]
+        assert api.listings == 2
+
+    asyncio.run(scenario())
+
+def test_crawl_in_flight_during_invalidate_is_not_stored():
+    async def scenario():
+        api = FakeAPI()
+        api.gate = asyncio.Event()
+        index = ModIndex(api)
+        stale = asyncio.ensure_future(index.get("srv", LAYOUT))
+        while api.listings == 0:
+            await asyncio.sleep(0)
+        # A rename lands while the crawl that listed the old name is still running
+        api.files = ["Foo.jar.disabled"]
+        index.invalidate("srv")
+        fresh = asyncio.ensure_future(index.get("srv", LAYOUT))
+        await asyncio.sleep(0)
+        api.gate.set()
+        assert names(await stale) == ["Foo.jar"]
+        assert names(await fresh) == ["Foo.jar.disabled"]
+        assert api.listings == 2
+        assert names(await index.get("srv", LAYOUT)) == ["Foo.jar.disabled"]
+        assert api.listings == 2
+
+    asyncio.run(scenario())
+
+def test_normalize_mod_name_strips_versions_and_loaders():
+    assert normalize_mod_name("JustEnoughItems-1.20.1-forge-15.2.0.27.jar.disabled", ".disabled") == "justenoughitems"
+    assert normalize_mod_name("sodium-fabric-mc1.20.1-0.5.3.jar", ".disabled") == "sodium"
+    assert normalize_mod_name("Oxide.Rust.dll", ".disabled") == "oxide.rust"
+
+def test_normalize_mod_name_keeps_a_leading_loader_token():
+    assert normalize_mod_name("fabric-api-0.92.0+1.20.1.jar", ".disabled") == "fabric-api"
+    assert normalize_mod_name("fabric-language-kotlin-1.10.10+kotlin.1.9.10.jar", ".disabled") == "fabric-language-kotlin"
+    assert normalize_mod_name("quilt-standard-libraries-7.0.0.jar", ".disabled") == "quilt-standard-libraries"
+    assert normalize_mod_name("forge-api-1.0.jar", ".disabled") != normalize_mod_name("fabric-api-1.0.jar", ".disabled")
+
+def test_drift_reports_distinct_mods_that_share_a_suffix():
+    def inventory(*names):
+        return mod_inventory({"disabled_suffix": ".disabled", "entries": [
+            {"name": name, "is_file": True, "disabled": False, "size": 1} for name in names
+        ]})
+
+    diff = diff_inventories(inventory("fabric-api-0.92.0.jar"), inventory("forge-api-1.0.jar"), ".disabled", ".disabled")
+    assert diff["missing"] and diff["extra"]
+    assert not diff["version"]
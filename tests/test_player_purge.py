@@ -0,0 +1,55 @@
+import asyncio
+import sqlite3
+from helper.api_manager import APIError
+from helper.player_purge import PROGRESS_INTERVAL, PlayerPurge, PurgeStore
+
+class FakeConfig:
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+
+class FakeAPI:
+    base_url = "https://panel.test/api/client"
+    rate_limited_for = 0
+
+    def __init__(self, outcomes: dict):
+        self.outcomes = outcomes
+        self.calls = 0
+
+    async def make_request(self, url, method="GET", payload=None):
+        self.calls += 1
+        outcome = self.outcomes.get(url.rsplit("/", 1)[-1])
+        if outcome is not None:
+            raise outcome
+        return {"message": "Request completed successfully."}
+
+def run_purge(outcomes: dict, players: int = 4) -> tuple[dict, FakeAPI, PurgeStore]:
+    store = PurgeStore(FakeConfig())
+    store.create("srv", "Server", "inactive", [{"id": i, "username": f"p{i}"} for i in range(players)])
+    api = FakeAPI(outcomes)
+
+    async def scenario():
+        return await PlayerPurge(api, store, "srv").run()
+
+    return asyncio.run(scenario()), api, store
+
+def test_already_deleted_players_count_as_done():
+    counts, api, _ = run_purge({"1": APIError("API request failed: 404 - Not Found", 404)})
+    assert counts == {"pending": 0, "done": 4, "failed": 0}
+    assert api.calls == 4
+
+def test_not_found_is_recognised_by_status_not_wording():
+    counts, _, _ = run_purge({"1": APIError("Player does not exist", 404)})
+    assert counts["done"] == 4
+
+def test_other_errors_are_retried_then_recorded(monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def short_backoff(seconds):
+        # Skip the retry backoff but keep the progress reporter's interval
+        await real_sleep(0 if seconds < PROGRESS_INTERVAL else seconds)
+    monkeypatch.setattr(asyncio, "sleep", short_backoff)
+    counts, api, store = run_purge({"2": APIError("API request failed: 500 - boom", 500),
+                                    "3": Exception("API request failed: 404 - untyped")})
+    assert counts == {"pending": 0, "done": 2, "failed": 2}
+    assert api.calls == 2 + 3 * 2
+    assert {name for name, _ in store.failures("srv")} == {"p2", "p3"}
@@ -0,0 +1,110 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+import pytest
+from helper import player_store
+from helper.player_store import PlayerSync
+
+START = 1_760_000_000.0
+
+class FakeConfig:
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+
+class FakePanel:
+    """
+    Paginated panel player list. `players` is served in the given order, `page_size` per page.
+    """
+    base_url = "https://panel.test/api/client"
+
+    def __init__(self, players: list[dict], page_size: int = 2):
+        self.players = players
+        self.page_size = page_size
+        self.pages = []
+
+    async def make_request(self, url, method="GET", payload=None):
+        page = int(url.rsplit("page=", 1)[1])
+        self.pages.append(page)
+        start = (page - 1) * self.page_size
+        total_pages = max(1, -(-len(self.players) // self.page_size))
+        return {
+            "data": [{"attributes": p} for p in self.players[start:start + self.page_size]],
+            "meta": {"pagination": {"total": len(self.players), "total_pages": total_pages}},
+        }
+
+def player(player_id: int, status: str = "offline", seen: float = 0) -> dict:
+    last_seen = datetime.fromtimestamp(START - seen, timezone.utc).isoformat()
+    return {"id": player_id, "username": f"p{player_id}", "status": status, "last_seen": last_seen}
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": START}
+    monkeypatch.setattr(player_store.time, "time", lambda: now["t"])
+    return now
+
+def sync(player_sync: PlayerSync, full: bool = False) -> dict:
+    return asyncio.run(player_sync.sync_server("srv", full=full))
+
+def test_playtime_is_credited_with_a_long_sync_interval(clock):
+    panel = FakePanel([player(1, "online")])
+    player_sync = PlayerSync(panel, FakeConfig(), sync_interval=1200)
+    sync(player_sync)
+    clock["t"] += 1200
+    sync(player_sync)
+    report = player_sync.store.report("srv", 86400, now=clock["t"])
+    assert report["total_playtime"] == pytest.approx(1200)
+
+def test_gap_beyond_the_limit_credits_nothing(clock):
+    panel = FakePanel([player(1, "online")])
+    player_sync = PlayerSync(panel, FakeConfig())
+    sync(player_sync)
+    clock["t"] += player_store.MAX_ACCRUAL_GAP + 60
+    sync(player_sync)
+    assert player_sync.store.report("srv", 86400, now=clock["t"])["total_playtime"] == 0
+
+def ordered_players(count: int = 6) -> list[dict]:
+    return [player(i, seen=60 * i) for i in range(1, count + 1)]
+
+def test_unchanged_incremental_sync_stops_after_the_first_page(clock):
+    panel = FakePanel(ordered_players())
+    player_sync = PlayerSync(panel, FakeConfig())
+    assert sync(player_sync)["full"]
+    panel.pages.clear()
+    clock["t"] += 60
+    result = sync(player_sync)
+    assert panel.pages == [1]
+    assert not result["full"]
+    assert player_sync.pages_skipped == 2
+
+def test_out_of_order_page_forces_a_full_read(clock):
+    players = ordered_players()
+    players[0], players[1] = players[1], players[0]
+    panel = FakePanel(players)
+    player_sync = PlayerSync(panel, FakeConfig())
+    sync(player_sync)
+    panel.pages.clear()
+    clock["t"] += 60
+    assert sync(player_sync)["full"]
+    assert panel.pages == [1, 2, 3]
+
+def test_online_player_not_seen_yet_forces_a_full_read(clock):
+    players = ordered_players()
+    players[-1]["status"] = "online"
+    panel = FakePanel(players)
+    player_sync = PlayerSync(panel, FakeConfig())
+    sync(player_sync)
+    panel.pages.clear()
+    clock["t"] += 60
+    assert sync(player_sync)["full"]
+    assert panel.pages == [1, 2, 3]
+
+def test_full_sync_removes_deleted_players(clock):
+    panel = FakePanel(ordered_players())
+    player_sync = PlayerSync(panel, FakeConfig())
+    sync(player_sync)
+    del panel.players[-1]
+    clock["t"] += 60
+    result = sync(player_sync, full=True)
+    assert result["full"]
+    assert result["changed"] == 1
+    assert "6" not in player_sync.store.load("srv")
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from helper import steam_handler
+
+class FakeAPI:
+    base_url = "https://panel.test/api/client"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def make_request(self, url, method="GET", payload=None):
+        self.calls += 1
+        return {"attributes": {}}
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    steam_handler.invalidate_query_endpoint()
+    steam_handler._reported_ports.clear()
+    steam_handler._server_states.clear()
+    monkeypatch.setattr(steam_handler, "build_query_endpoint", lambda attributes: {
+        "game": "VRising", "ip": "10.0.0.5", "port": 27015, "offset": 1, "query_port": 27016,
+    })
+    yield
+    steam_handler.invalidate_query_endpoint()
+
+def answer_with(monkeypatch, outcome):
+    async def info(address, timeout=None):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return dict(outcome)
+    monkeypatch.setattr(steam_handler.a2s_client, "info", info)
+
+def query_times(api: FakeAPI, times: int):
+    async def scenario():
+        return [await steam_handler.query_server(api, "srv", "Server") for _ in range(times)]
+    return asyncio.run(scenario())
+
+def test_repeat_queries_of_a_stopped_server_stay_off_the_panel(monkeypatch):
+    answer_with(monkeypatch, TimeoutError("timed out"))
+    steam_handler.note_server_state("srv", "offline")
+    api = FakeAPI()
+    assert query_times(api, 10) == [None] * 10
+    assert api.calls == 1
+
+def test_failures_while_running_resolve_again_after_a_few_probes(monkeypatch):
+    answer_with(monkeypatch, TimeoutError("timed out"))
+    steam_handler.note_server_state("srv", "running")
+    api = FakeAPI()
+    query_times(api, steam_handler.FAILURES_BEFORE_RESOLVE)
+    assert api.calls == 1
+    query_times(api, 1)
+    assert api.calls == 2
+
+def test_success_resets_the_failure_count(monkeypatch):
+    api = FakeAPI()
+    for _ in range(3):
+        answer_with(monkeypatch, TimeoutError("timed out"))
+        query_times(api, steam_handler.FAILURES_BEFORE_RESOLVE - 1)
+        answer_with(monkeypatch, {"name": "up", "port": 27015})
+        query_times(api, 1)
+    assert api.calls == 1
+
+def test_changed_reported_port_resolves_again(monkeypatch):
+    api = FakeAPI()
+    answer_with(monkeypatch, {"name": "up", "port": 7777})
+    query_times(api, 5)
+    assert api.calls == 1
+    answer_with(monkeypatch, {"name": "up", "port": 7778})
+    query_times(api, 2)
+    assert api.calls == 2